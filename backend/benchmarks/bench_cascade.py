@@ -0,0 +1,113 @@
+"""Latency and strong-model calls with and without the model cascade.
+
+The fake DeepSeek server answers a "fast" model quickly and a "strong"
+model slowly. The fast model reports a low confidence on a share of its
+tool calls. With ``cascade_model`` set, query generation and reflection
+try the fast model first and escalate only those low-confidence answers.
+Reports run latency, time spent in the two cascaded nodes, how many
+calls reached the strong model, and the escalation rate.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_cascade.py --runs 20 --low-confidence 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import fake_llm_server, fake_search_server  # noqa: E402
+from harness import load_builder, run_research  # noqa: E402
+
+FAST, STRONG = "fast-chat", "deepseek-chat"
+
+
+def node_seconds(graph: str, nodes: tuple[str, ...]) -> float:
+    from agents.common.metrics import NODE_DURATION
+
+    total = 0.0
+    for metric in NODE_DURATION.collect():
+        for sample in metric.samples:
+            if (
+                sample.name.endswith("_sum")
+                and sample.labels["graph"] == graph
+                and sample.labels["node"] in nodes
+            ):
+                total += sample.value
+    return total
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--fast-latency", type=float, default=0.15)
+    parser.add_argument("--strong-latency", type=float, default=0.8)
+    parser.add_argument("--low-confidence", type=float, default=0.2)
+    parser.add_argument("--agent", default="research_agent")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    lock = threading.Lock()
+    models: list[str] = []
+
+    def latency(model: str) -> float:
+        with lock:
+            models.append(model)
+        return args.fast_latency if model == FAST else args.strong_latency
+
+    def confidence(model: str) -> float:
+        if model == FAST:
+            with lock:
+                return 0.3 if rng.random() < args.low_confidence else 0.9
+        return 0.9
+
+    with fake_llm_server(latency_fn=latency, confidence_fn=confidence) as llm, fake_search_server(
+        0.05
+    ) as search:
+        os.environ["DEEPSEEK_API_BASE"] = llm.url + "/v1"
+        os.environ["SEARCHAPI_BASE_URL"] = search.url + "/search"
+        builder = load_builder(args.agent)
+
+        print(
+            f"{'cascade':8} {'run p50':>8} {'nodes/run':>10} {'strong calls':>13} "
+            f"{'fast calls':>11} {'escalated':>10}"
+        )
+        for cascade in ("", FAST):
+            configurable = {
+                "cascade_model": cascade,
+                "max_research_loops": 2,
+                "require_search_approval": False,
+                "novelty_threshold": 0,
+            }
+            models.clear()
+            before = node_seconds(args.agent, ("generate_query", "reflection"))
+            wall, escalations = [], 0
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                values = asyncio.run(
+                    run_research(builder, "大模型推理优化", configurable, str(uuid.uuid4()))
+                )
+                wall.append(time.perf_counter() - start)
+                escalations += values["run_stats"].get("cascade_escalations", 0)
+            nodes = (node_seconds(args.agent, ("generate_query", "reflection")) - before) / args.runs
+            # finalize_answer always uses the strong model; count only the cascaded nodes
+            strong = models.count(STRONG) - args.runs
+            fast = models.count(FAST)
+            rate = f"{escalations / fast:.0%}" if fast else "-"
+            print(
+                f"{cascade or 'off':8} {statistics.median(wall):7.2f}s {nodes:9.2f}s "
+                f"{strong:13d} {fast:11d} {rate:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""Encode/decode CPU time vs. bytes saved for the compressed checkpoint serializer.
+
+Builds research states like the ones the graph checkpoints (messages plus
+gathered sources with Chinese titles and snippets), serializes each of
+them with the default serializer and with ``CompressedSerializer`` at a
+few zstd levels, with and without a dictionary trained on a separate set
+of snippets, and reports bytes and per-checkpoint CPU time.
+
+Snippets are drawn from a fixed vocabulary with a seeded RNG, which
+compresses somewhat better than real search results. Pass ``--corpus``
+with a ``BLOB_STORE_URI`` directory from real runs to train the dictionary
+and build the states from real snippets instead.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_checkpoint_serde.py --sources 10,50,200
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+import zstandard  # noqa: E402
+from langchain_core.messages import AIMessage, HumanMessage  # noqa: E402
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer  # noqa: E402
+
+from agents.common.checkpoint_serde import (  # noqa: E402
+    CompressedSerializer,
+    blob_store_corpus,
+    train_dictionary,
+)
+
+VOCABULARY = (
+    "大模型 推理 优化 显存 量化 张量 并行 流水线 吞吐量 延迟 批处理 注意力 缓存 "
+    "投机解码 蒸馏 剪枝 算子 融合 内核 带宽 调度 请求 服务 部署 框架 基准 测试 "
+    "实验 结果 表明 相比 提升 降低 方法 模型 参数 精度 损失 训练 数据 集群 节点 "
+    "硬件 芯片 显卡 内存 计算 效率 成本 方案 开源 社区 版本 发布 支持 性能 稳定"
+).split()
+PUNCTUATION = "，。、；："
+
+
+def random_text(rng: random.Random, chars: int) -> str:
+    out = []
+    while sum(map(len, out)) < chars:
+        out.append(rng.choice(VOCABULARY))
+        if rng.random() < 0.2:
+            out.append(rng.choice(PUNCTUATION))
+    return "".join(out)[:chars]
+
+
+def synthetic_snippets(rng: random.Random, count: int) -> list[str]:
+    return [random_text(rng, rng.randint(80, 240)) for _ in range(count)]
+
+
+def make_state(rng: random.Random, snippets: list[str], sources: int) -> dict:
+    gathered = []
+    for i in range(sources):
+        snippet = snippets[i % len(snippets)]
+        gathered.append({
+            "label": snippet[:20],
+            "short_url": f"https://www.baidu.com/link?url={rng.getrandbits(96):x}",
+            "value": f"https://www.baidu.com/link?url={rng.getrandbits(96):x}",
+            "title": snippet[:24],
+            "snippet": snippet,
+            "display_link": f"www.example{i % 17}.com",
+            "date": "2024-05-01",
+            "query": f"查询{i % 5}",
+            "simhash": rng.getrandbits(63),
+        })
+    return {
+        "messages": [
+            HumanMessage(content="大模型推理优化的主要方法有哪些？"),
+            AIMessage(content=random_text(rng, 1500)),
+        ],
+        "sources_gathered": gathered,
+        "search_query": [f"查询{i}" for i in range(5)],
+    }
+
+
+def measure(serde, states: list[dict], repeat: int) -> tuple[int, float, float]:
+    dumped = [serde.dumps_typed(state) for state in states]
+    size = sum(len(data) for _, data in dumped)
+    start = time.process_time()
+    for _ in range(repeat):
+        for state in states:
+            serde.dumps_typed(state)
+    encode = (time.process_time() - start) / (repeat * len(states))
+    start = time.process_time()
+    for _ in range(repeat):
+        for item in dumped:
+            serde.loads_typed(item)
+    decode = (time.process_time() - start) / (repeat * len(states))
+    return size, encode, decode
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", default="10,50,200")
+    parser.add_argument("--states", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--dict-size", type=int, default=64 * 1024)
+    parser.add_argument("--corpus", help="FileBlobStore directory with real sources")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    if args.corpus:
+        corpus = list(blob_store_corpus(args.corpus))
+        rng.shuffle(corpus)
+        half = len(corpus) // 2
+        training, snippets = corpus[:half], corpus[half:]
+    else:
+        training, snippets = synthetic_snippets(rng, 2000), synthetic_snippets(rng, 500)
+    dictionary = zstandard.ZstdCompressionDict(train_dictionary(training, args.dict_size))
+
+    plain = JsonPlusSerializer()
+    variants = {
+        "zstd-1": CompressedSerializer(plain, level=1),
+        "zstd-3": CompressedSerializer(plain, level=3),
+        "zstd-9": CompressedSerializer(plain, level=9),
+        "zstd-3+dict": CompressedSerializer(plain, level=3, dictionary=dictionary),
+    }
+    for sources in (int(x) for x in args.sources.split(",")):
+        states = [make_state(rng, rng.sample(snippets, min(sources, len(snippets))), sources)
+                  for _ in range(args.states)]
+        base_size, base_enc, base_dec = measure(plain, states, args.repeat)
+        print(f"\nsources={sources}  ({args.states} states)")
+        print(f"  {'serializer':12} {'bytes/state':>12} {'saved':>7} {'encode':>10} {'decode':>10}")
+        print(
+            f"  {'msgpack':12} {base_size // args.states:12,d} {'':>7} "
+            f"{base_enc * 1e6:8.0f}us {base_dec * 1e6:8.0f}us"
+        )
+        for name, serde in variants.items():
+            size, enc, dec = measure(serde, states, args.repeat)
+            print(
+                f"  {name:12} {size // args.states:12,d} {1 - size / base_size:6.0%} "
+                f"{enc * 1e6:8.0f}us {dec * 1e6:8.0f}us"
+            )
+
+
+if __name__ == "__main__":
+    main()
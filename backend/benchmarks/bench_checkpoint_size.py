@@ -0,0 +1,118 @@
+"""Checkpoint bytes per run with state payloads inline vs. in the blob store.
+
+Runs the research graph against local fake DeepSeek and searchapi.io
+servers and counts the bytes the checkpointer serializes: checkpoints
+(changed channel values + metadata, one per superstep) and pending
+writes (node outputs). With ``BLOB_STORE_URI`` set, ``sources_gathered``
+and ``research_digests`` are written as content-addressed segments by the
+nodes and the checkpoint only holds one short reference per segment, so the
+last superstep's checkpoint stays about the same size as the number of loops
+grows.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_checkpoint_size.py --loops 1,3,5 --queries 3
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import fake_llm_server, fake_search_server  # noqa: E402
+from harness import load_builder, run_research  # noqa: E402
+from langgraph.checkpoint.memory import InMemorySaver  # noqa: E402
+
+
+class CountingSerde:
+    """Serializer wrapper that counts the bytes of every typed dump."""
+
+    def __init__(self, serde):
+        self._serde = serde
+        self.bytes = 0
+
+    def dumps_typed(self, obj):
+        type_, data = self._serde.dumps_typed(obj)
+        self.bytes += len(data)
+        return type_, data
+
+    def loads_typed(self, data):
+        return self._serde.loads_typed(data)
+
+
+class MeasuringSaver(InMemorySaver):
+    def __init__(self):
+        super().__init__()
+        self.serde = CountingSerde(self.serde)
+        self.checkpoint_sizes: list[int] = []
+
+    def put(self, config, checkpoint, metadata, new_versions):
+        before = self.serde.bytes
+        try:
+            return super().put(config, checkpoint, metadata, new_versions)
+        finally:
+            self.checkpoint_sizes.append(self.serde.bytes - before)
+
+
+def measure(builder, configurable: dict, blob_uri: str) -> dict:
+    from agents.common.blob_store import get_blob_store
+    from agents.common.search_cache import get_search_cache
+
+    if blob_uri:
+        os.environ["BLOB_STORE_URI"] = blob_uri
+    else:
+        os.environ.pop("BLOB_STORE_URI", None)
+    store = get_blob_store()
+    blob_before = store.stats["bytes_written"] if store else 0
+    get_search_cache().clear()
+    saver = MeasuringSaver()
+    asyncio.run(
+        run_research(builder, "大模型推理优化的主要方法", configurable, "bench", checkpointer=saver)
+    )
+    checkpoints = sum(saver.checkpoint_sizes)
+    return {
+        "checkpoints": checkpoints,
+        "writes": saver.serde.bytes - checkpoints,
+        "last_checkpoint": saver.checkpoint_sizes[-1],
+        "largest_checkpoint": max(saver.checkpoint_sizes),
+        "blob_bytes": (store.stats["bytes_written"] if store else 0) - blob_before,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--loops", default="1,2,3,5")
+    parser.add_argument("--queries", type=int, default=3)
+    parser.add_argument("--search-results", type=int, default=5)
+    parser.add_argument("--snippet-chars", type=int, default=400)
+    args = parser.parse_args()
+
+    with fake_llm_server(0.0, 0.0) as llm, fake_search_server(
+        0.0, args.search_results, args.snippet_chars
+    ) as search:
+        os.environ["DEEPSEEK_API_BASE"] = f"{llm.url}/v1"
+        os.environ["SEARCHAPI_BASE_URL"] = f"{search.url}/search"
+        builder = load_builder()
+        print(
+            f"{'loops':>5} {'mode':>7} {'checkpoints':>12} {'writes':>9} "
+            f"{'largest':>9} {'last':>9} {'blob store':>11}   (bytes per run)"
+        )
+        for loops in (int(x) for x in args.loops.split(",")):
+            configurable = {
+                "number_of_initial_queries": args.queries,
+                "max_research_loops": loops,
+                "require_search_approval": False,
+            }
+            for mode, uri in (("inline", ""), ("blob", "memory://")):
+                r = measure(builder, configurable, uri)
+                print(
+                    f"{loops:5d} {mode:>7} {r['checkpoints']:12,d} {r['writes']:9,d} "
+                    f"{r['largest_checkpoint']:9,d} {r['last_checkpoint']:9,d} {r['blob_bytes']:11,d}"
+                )
+
+
+if __name__ == "__main__":
+    main()
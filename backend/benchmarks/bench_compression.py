@@ -0,0 +1,77 @@
+"""Token savings and end-to-end latency of per-query search result compression.
+
+Runs the research graph against local fake DeepSeek and searchapi.io
+servers with ``compress_search_results`` off and on. The fake LLM's
+latency grows with prompt size, so smaller reflection/answer prompts show
+up in wall time.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_compression.py --loops 3 --queries 3
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import fake_llm_server, fake_search_server  # noqa: E402
+from harness import load_builder, run_research  # noqa: E402
+
+
+async def run(builder, configurable: dict, runs: int) -> tuple[float, dict]:
+    stats: dict = {}
+    start = time.perf_counter()
+    for i in range(runs):
+        values = await run_research(builder, "大语言模型推理优化有哪些方法？", configurable, f"bench-{i}")
+        for key, value in values.get("run_stats", {}).items():
+            stats[key] = stats.get(key, 0) + value
+    return (time.perf_counter() - start) / runs, {k: v / runs for k, v in stats.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--loops", type=int, default=3)
+    parser.add_argument("--queries", type=int, default=3)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency-per-1k", type=float, default=0.05)
+    parser.add_argument("--search-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with fake_llm_server(args.llm_latency, args.llm_latency_per_1k) as llm, fake_search_server(
+        args.search_latency
+    ) as search:
+        os.environ["DEEPSEEK_API_BASE"] = f"{llm.url}/v1"
+        os.environ["SEARCHAPI_BASE_URL"] = f"{search.url}/api/v1/search"
+        builder = load_builder()
+        base = {
+            "number_of_initial_queries": args.queries,
+            "max_research_loops": args.loops,
+            "bypass_search_cache": True,
+        }
+        results = {
+            "raw": asyncio.run(run(builder, {**base, "compress_search_results": False}, args.runs)),
+            "compressed": asyncio.run(run(builder, {**base, "compress_search_results": True}, args.runs)),
+        }
+
+    print(f"runs={args.runs} loops={args.loops} queries={args.queries}")
+    for name, (wall, stats) in results.items():
+        prompt_tokens = stats.get("reflection_prompt_tokens", 0) + stats.get("answer_prompt_tokens", 0)
+        print(
+            f"{name:10}: wall {wall * 1000:8.1f} ms/run  reflection+answer prompt tokens {prompt_tokens:8.0f}"
+            f"  compression {stats.get('compression_raw_tokens', 0):.0f} -> {stats.get('compression_digest_tokens', 0):.0f}"
+        )
+    saved = sum(
+        results["raw"][1].get(k, 0) - results["compressed"][1].get(k, 0)
+        for k in ("reflection_prompt_tokens", "answer_prompt_tokens")
+    )
+    print(f"prompt tokens saved per run: {saved:.0f}")
+
+
+if __name__ == "__main__":
+    main()
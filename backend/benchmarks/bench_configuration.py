@@ -0,0 +1,67 @@
+"""Cost of Configuration.from_runnable_config on the hot path of a 20-branch run.
+
+A run with 20 web_research branches resolves the configuration about
+25 times: once per branch plus generate_query, reflection,
+evaluate_research and finalize_answer. "uncached" reproduces the
+previous implementation (read os.environ and build a new model on every
+call); "memoized" is the current ``from_runnable_config``.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_configuration.py --branches 20 --runs 2000
+"""
+
+import argparse
+import os
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from agents.research_agent.configuration import Configuration  # noqa: E402
+
+
+def uncached(config):
+    configurable = config["configurable"] if config and "configurable" in config else {}
+    raw_values = {
+        name: os.environ.get(name.upper(), configurable.get(name))
+        for name in Configuration.model_fields.keys()
+    }
+    return Configuration(**{k: v for k, v in raw_values.items() if v is not None})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--branches", type=int, default=20)
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    # What LangGraph passes to nodes: user configurables plus runtime keys.
+    config = {
+        "configurable": {
+            "thread_id": "4b0ccc12-2e74-4a55-a85e-c512e7867c26",
+            "checkpoint_ns": "",
+            "number_of_initial_queries": args.branches,
+            "max_research_loops": 2,
+            "query_generator_model": "deepseek-chat",
+        }
+    }
+    calls_per_run = args.branches + 4
+
+    def one_run(resolve):
+        for _ in range(calls_per_run):
+            resolve(config)
+
+    t_uncached = timeit.timeit(lambda: one_run(uncached), number=args.runs) / args.runs
+    t_cached = timeit.timeit(
+        lambda: one_run(Configuration.from_runnable_config), number=args.runs
+    ) / args.runs
+
+    print(f"branches={args.branches} calls/run={calls_per_run}")
+    print(f"uncached : {t_uncached * 1e6:8.1f} us/run ({t_uncached / calls_per_run * 1e6:.2f} us/call)")
+    print(f"memoized : {t_cached * 1e6:8.1f} us/run ({t_cached / calls_per_run * 1e6:.2f} us/call)")
+
+
+if __name__ == "__main__":
+    main()
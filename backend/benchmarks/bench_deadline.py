@@ -0,0 +1,108 @@
+"""Run latency with and without a per-run deadline under heavy-tailed upstreams.
+
+Runs many research threads concurrently against a fake DeepSeek server and
+a fake search server whose latencies are mostly fast with an occasional
+multi-second tail. Without a deadline every run does ``max_research_loops``
+loops and pays for every slow call it hits; with ``deadline_seconds`` calls
+are capped at the remaining time and the router stops looping once another
+loop would not fit. Reports run latency percentiles, loops per run and how
+many calls were cut off.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_deadline.py --runs 60 --deadline 4
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import fake_llm_server, fake_search_server  # noqa: E402
+from harness import load_builder, run_research  # noqa: E402
+
+
+def make_latency_fn(seed: int, median: float, tail_probability: float, tail: float):
+    rng = random.Random(seed)
+    lock = threading.Lock()
+
+    def latency(*_) -> float:
+        with lock:
+            if rng.random() < tail_probability:
+                return tail
+            return rng.lognormvariate(math.log(median), 0.3)
+
+    return latency
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def run_all(builder, configurable: dict, runs: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    results = []
+
+    async def one() -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            values = await run_research(builder, "大模型推理优化", configurable, str(uuid.uuid4()))
+            results.append((time.perf_counter() - start, values))
+
+    await asyncio.gather(*(one() for _ in range(runs)))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=60)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--deadline", type=float, default=4.0)
+    parser.add_argument("--max-loops", type=int, default=4)
+    parser.add_argument("--tail-probability", type=float, default=0.05)
+    parser.add_argument("--agent", default="research_agent")
+    args = parser.parse_args()
+
+    llm_latency = make_latency_fn(0, 0.25, args.tail_probability, 4.0)
+    search_latency = make_latency_fn(1, 0.1, args.tail_probability, 3.0)
+    with fake_llm_server(latency_fn=llm_latency) as llm, fake_search_server(
+        latency_fn=search_latency
+    ) as search:
+        os.environ["DEEPSEEK_API_BASE"] = llm.url + "/v1"
+        os.environ["SEARCHAPI_BASE_URL"] = search.url + "/search"
+        builder = load_builder(args.agent)
+
+        print(f"{'deadline':>9} {'p50':>7} {'p95':>7} {'p99':>7} {'max':>7} {'loops':>6} {'cutoffs':>8}")
+        for deadline in (0, args.deadline):
+            configurable = {
+                "max_research_loops": args.max_loops,
+                "bypass_search_cache": True,
+                "deadline_seconds": deadline,
+            }
+            results = asyncio.run(run_all(builder, configurable, args.runs, args.concurrency))
+            wall = [seconds for seconds, _ in results]
+            loops = sum(values.get("research_loop_count", 0) for _, values in results) / len(results)
+            cutoffs = sum(values["run_stats"].get("deadline_cutoffs", 0) for _, values in results)
+            cut_searches = sum(
+                1
+                for _, values in results
+                for text in values.get("web_research_result") or []
+                if text and "超时" in text
+            )
+            print(
+                f"{deadline or 'off':>9} {percentile(wall, 50):6.2f}s {percentile(wall, 95):6.2f}s "
+                f"{percentile(wall, 99):6.2f}s {max(wall):6.2f}s {loops:6.2f} {cutoffs + cut_searches:8d}"
+            )
+
+
+if __name__ == "__main__":
+    main()
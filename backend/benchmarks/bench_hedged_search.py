@@ -0,0 +1,90 @@
+"""Tail latency of single-engine vs. hedged multi-engine search.
+
+The fake searchapi.io server draws each request's latency from a
+per-engine distribution: Baidu is usually fast but has a heavy tail,
+Bing is a little slower with a light tail. The same query stream is sent
+through ``get_search_provider("baidu")`` and ``get_search_provider("baidu,bing")``.
+The hedged provider fires Bing once Baidu exceeds its recent p95 latency.
+The report shows latency percentiles and how many extra upstream requests
+hedging cost.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_hedged_search.py --queries 400 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import fake_search_server  # noqa: E402
+
+
+def make_latency_fn(seed: int, tail_probability: float):
+    rng = random.Random(seed)
+
+    def latency(engine: str) -> float:
+        if engine == "baidu":
+            if rng.random() < tail_probability:
+                return rng.uniform(1.0, 2.0)
+            return rng.lognormvariate(math.log(0.08), 0.3)
+        return rng.lognormvariate(math.log(0.12), 0.2)
+
+    return latency
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def run(engines: str, queries: int, concurrency: int, warmup: int) -> list[float]:
+    from agents.common.search_providers import get_search_provider
+
+    provider = get_search_provider(engines)
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+
+    async def one(i: int) -> None:
+        async with semaphore:
+            start = time.perf_counter()
+            await provider.search(f"查询 {i}")
+            if i >= warmup:
+                latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(queries)))
+    return latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=40, help="queries excluded while p95 is learned")
+    parser.add_argument("--tail-probability", type=float, default=0.06)
+    args = parser.parse_args()
+
+    with fake_search_server(latency_fn=make_latency_fn(0, args.tail_probability)) as search:
+        # SearchClient reads the URL at import time.
+        os.environ["SEARCHAPI_BASE_URL"] = f"{search.url}/search"
+        print(f"{'engines':12} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8} {'requests/query':>15}")
+        for engines in ("baidu", "baidu,bing"):
+            before = len(search.httpd.arrivals)
+            latencies = asyncio.run(run(engines, args.queries, args.concurrency, args.warmup))
+            requests = len(search.httpd.arrivals) - before
+            ms = [x * 1000 for x in latencies]
+            print(
+                f"{engines:12} {percentile(ms, 50):6.0f}ms {percentile(ms, 95):6.0f}ms "
+                f"{percentile(ms, 99):6.0f}ms {max(ms):6.0f}ms {requests / args.queries:15.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
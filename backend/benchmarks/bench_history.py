@@ -0,0 +1,93 @@
+"""Prompt size and turn latency over a long multi-turn thread.
+
+Runs ``--turns`` research turns on one thread (in-memory checkpointer)
+against the fake DeepSeek server, whose answers are ``--answer-chars``
+long and whose latency grows with prompt size. Without windowing
+(``max_history_tokens=0``) every node gets the whole conversation, so the
+prompts and the turn latency grow with the thread. With windowing the
+history stays under the limit: older turns are folded into a rolling
+summary that is stored in the thread and reused by the following nodes and
+turns. Reports the answer prompt size and latency at a few turns and the
+number of summarization calls.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_history.py --turns 200 --max-history-tokens 0 4000
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import fake_llm_server, fake_search_server  # noqa: E402
+from harness import load_builder  # noqa: E402
+from langgraph.checkpoint.memory import InMemorySaver  # noqa: E402
+
+QUESTIONS = [
+    "大模型推理如何降低显存占用",
+    "那 KV cache 量化呢",
+    "对精度的影响有多大",
+    "生产环境一般怎么选",
+]
+
+
+async def run_thread(builder, turns: int, configurable: dict, report: set[int]):
+    graph = builder.compile(checkpointer=InMemorySaver())
+    config = {"configurable": {**configurable, "thread_id": str(uuid.uuid4())}}
+    rows, previous = [], {}
+    for turn in range(1, turns + 1):
+        payload = {"messages": [{"role": "user", "content": QUESTIONS[turn % len(QUESTIONS)]}]}
+        start = time.perf_counter()
+        await graph.ainvoke(payload, config)
+        elapsed = time.perf_counter() - start
+        # run_stats accumulate over the thread; keep this turn's share
+        stats = (await graph.aget_state(config)).values["run_stats"]
+        delta = {key: value - previous.get(key, 0) for key, value in stats.items()}
+        previous = stats
+        if turn in report:
+            rows.append((turn, delta.get("answer_prompt_tokens", 0), elapsed))
+    return rows, previous.get("history_summaries", 0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--answer-chars", type=int, default=400)
+    parser.add_argument("--prefill-per-1k", type=float, default=0.01)
+    parser.add_argument("--max-history-tokens", type=int, nargs="+", default=[0, 4000])
+    parser.add_argument("--agent", default="research_agent")
+    args = parser.parse_args()
+
+    report = {1, *range(25, args.turns + 1, 25), args.turns}
+    with fake_llm_server(
+        latency=0.01, latency_per_1k_tokens=args.prefill_per_1k, answer_chars=args.answer_chars
+    ) as llm, fake_search_server(0.01) as search:
+        os.environ["DEEPSEEK_API_BASE"] = llm.url + "/v1"
+        os.environ["SEARCHAPI_BASE_URL"] = search.url + "/search"
+        builder = load_builder(args.agent)
+        # Warm up imports and connections so turn 1 is comparable across settings.
+        asyncio.run(run_thread(builder, 1, {"require_search_approval": False}, set()))
+        for max_tokens in args.max_history_tokens:
+            configurable = {
+                "require_search_approval": False,
+                "max_research_loops": 1,
+                "max_history_tokens": max_tokens,
+            }
+            started = time.perf_counter()
+            rows, summaries = asyncio.run(run_thread(builder, args.turns, configurable, report))
+            total = time.perf_counter() - started
+            print(f"max_history_tokens={max_tokens or 'off'}")
+            print(f"{'turn':>6} {'answer prompt tokens':>21} {'turn time':>10}")
+            for turn, tokens, elapsed in rows:
+                print(f"{turn:6d} {tokens:21d} {elapsed:9.2f}s")
+            print(f"summarization calls {summaries}, total {total:.1f}s\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Import-time profile of the agent graph modules (``python -X importtime``).
+
+Imports each module in a fresh interpreter several times and reports the
+fastest wall time, the ``-X importtime`` cumulative time of the module, and
+the slowest imports underneath it. DEEPSEEK_API_KEY is removed from the
+child environment: importing a graph must not require it.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_import.py
+    python benchmarks/bench_import.py --module agents.research_agent.graph --top 20 --json
+
+With ``--json`` the report is written to
+``benchmarks/results/import-<commit>.json`` for comparison between commits.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+from suite import RESULTS_DIR, git_revision
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def profile(module: str) -> tuple[float, list[tuple[str, int, int, int]]]:
+    """Return (wall seconds, [(name, depth, self_us, cumulative_us), ...])."""
+    env = {k: v for k, v in os.environ.items() if k != "DEEPSEEK_API_KEY"}
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(SRC), env.get("PYTHONPATH")]))
+    code = (
+        "import time; t = time.perf_counter(); "
+        f"import {module}; "
+        "print(time.perf_counter() - t)"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", code],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header line
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return float(proc.stdout.strip().splitlines()[-1]), rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--module", action="append",
+        help="module to import (repeatable); default: both agent graphs",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--json", action="store_true", help="write results/import-<commit>.json")
+    args = parser.parse_args()
+    modules = args.module or ["agents.research_agent.graph", "agents.diagnostic_agent.graph"]
+
+    report = {**git_revision(), "python": sys.version.split()[0], "modules": {}}
+    for module in modules:
+        runs = [profile(module) for _ in range(args.repeat)]
+        wall, rows = min(runs, key=lambda run: run[0])
+        base = min(depth for _, depth, _, _ in rows)
+        top_level = {name: cum for name, depth, _, cum in rows if depth == base}
+        root = module.split(".")[0]
+        agents_total = sum(cum for name, cum in top_level.items() if name.split(".")[0] == root)
+        slowest = sorted(rows, key=lambda row: row[2], reverse=True)[: args.top]
+        print(f"{module}: wall {wall * 1000:.1f} ms (best of {args.repeat}), "
+              f"importtime cumulative {agents_total / 1000:.1f} ms")
+        print(f"  {'self ms':>8} {'cum ms':>8}  module")
+        for name, _, self_us, cumulative_us in slowest:
+            print(f"  {self_us / 1000:8.1f} {cumulative_us / 1000:8.1f}  {name}")
+        heavy = ("langchain_deepseek", "openai", "numpy", "langgraph", "httpx", "prometheus_client")
+        loaded = {name for name, *_ in rows}
+        print("  heavy packages imported:", ", ".join(h for h in heavy if h in loaded) or "none")
+        report["modules"][module] = {
+            "wall_ms": round(wall * 1000, 1),
+            "cumulative_ms": round(agents_total / 1000, 1),
+            "top_level_ms": {k: round(v / 1000, 1) for k, v in top_level.items()},
+            "slowest_self_ms": {name: round(self_us / 1000, 1) for name, _, self_us, _ in slowest},
+        }
+
+    if args.json:
+        output = RESULTS_DIR / (
+            f"import-{report['commit']}{'-dirty' if report['dirty'] else ''}.json"
+        )
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(report, indent=2))
+        print(f"\nresults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
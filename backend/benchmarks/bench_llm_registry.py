@@ -0,0 +1,83 @@
+"""Measure per-node LLM setup overhead: fresh ChatDeepSeek per call vs the registry.
+
+"before" reproduces the previous node code: build a new ``ChatDeepSeek``
+and call ``with_structured_output`` on every invocation. "after" fetches
+the cached runnable from ``agents.common.llm_registry``. Both invoke a
+local OpenAI-compatible server, so the difference is client construction,
+schema conversion and connection setup.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_llm_registry.py --calls 200
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import fake_llm_server  # noqa: E402
+
+PROMPT = "请为以下主题生成搜索查询：大语言模型推理优化"
+
+
+def before(model: str, schema) -> None:
+    from langchain_deepseek import ChatDeepSeek
+
+    llm = ChatDeepSeek(
+        model=model,
+        temperature=1.0,
+        max_retries=2,
+        api_key=os.getenv("DEEPSEEK_API_KEY"),
+    )
+    llm.with_structured_output(schema).invoke(PROMPT)
+
+
+def after(model: str, schema) -> None:
+    from agents.common.llm_registry import get_structured_model
+
+    get_structured_model(model, 1.0, schema).invoke(PROMPT)
+
+
+def measure(fn, calls: int, *args) -> list[float]:
+    fn(*args)  # warm imports and, for the registry, the cache itself
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("DEEPSEEK_API_KEY", "bench")
+    with fake_llm_server(latency=args.latency) as server:
+        os.environ["DEEPSEEK_API_BASE"] = f"{server.url}/v1"
+        from agents.research_agent.tools_and_schemas import SearchQueryList
+
+        results = {
+            "before": measure(before, args.calls, "deepseek-chat", SearchQueryList),
+            "after": measure(after, args.calls, "deepseek-chat", SearchQueryList),
+        }
+
+    print(f"calls={args.calls} server latency={args.latency}s")
+    for name, samples in results.items():
+        samples.sort()
+        p50 = statistics.median(samples) * 1000
+        p99 = samples[int(len(samples) * 0.99) - 1] * 1000
+        print(f"{name:6}: mean {statistics.fmean(samples) * 1000:7.2f} ms  p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+    overhead = statistics.fmean(results["before"]) - statistics.fmean(results["after"])
+    print(f"per-node overhead removed: {overhead * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Per-call overhead of the node and token instrumentation.
+
+Times a trivial node with and without ``instrument_node`` and
+``record_node``, and one ``TokenUsageHandler.on_llm_end`` call. Real nodes
+take milliseconds to seconds, so the overhead is a few microseconds
+against that.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_metrics.py --number 200000
+"""
+
+import argparse
+import asyncio
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from langchain_core.messages import AIMessage  # noqa: E402
+from langchain_core.outputs import ChatGeneration, LLMResult  # noqa: E402
+
+from agents.common.instrumentation import (  # noqa: E402
+    TOKEN_USAGE_HANDLER,
+    instrument_node,
+    record_node,
+)
+
+
+def node(state, config):
+    return {"pending_queries": state["q"]}
+
+
+@instrument_node("bench")
+def instrumented_node(state, config):
+    record_node(model="deepseek-chat", results=len(state["q"]))
+    return {"pending_queries": state["q"]}
+
+
+async def async_node(state, config):
+    return {"pending_queries": state["q"]}
+
+
+@instrument_node("bench")
+async def instrumented_async_node(state, config):
+    record_node(model="deepseek-chat", results=len(state["q"]))
+    return {"pending_queries": state["q"]}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+    state, config = {"q": ["a", "b", "c"]}, {}
+
+    def per_call(fn) -> float:
+        return min(timeit.repeat(fn, number=args.number, repeat=3)) / args.number * 1e6
+
+    plain = per_call(lambda: node(state, config))
+    wrapped = per_call(lambda: instrumented_node(state, config))
+    print(f"sync node   plain {plain:6.2f} us  instrumented {wrapped:6.2f} us  overhead {wrapped - plain:5.2f} us")
+
+    loop = asyncio.new_event_loop()
+
+    def run_async(fn):
+        coro = fn(state, config)
+        try:
+            coro.send(None)
+        except StopIteration:
+            pass
+
+    plain = per_call(lambda: run_async(async_node))
+    wrapped = per_call(lambda: run_async(instrumented_async_node))
+    loop.close()
+    print(f"async node  plain {plain:6.2f} us  instrumented {wrapped:6.2f} us  overhead {wrapped - plain:5.2f} us")
+
+    message = AIMessage(
+        content="",
+        usage_metadata={"input_tokens": 1200, "output_tokens": 80, "total_tokens": 1280},
+        response_metadata={"model_name": "deepseek-chat"},
+    )
+    result = LLMResult(generations=[[ChatGeneration(message=message)]])
+    handler = per_call(lambda: TOKEN_USAGE_HANDLER.on_llm_end(result))
+    print(f"token usage handler on_llm_end {handler:6.2f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""DeepSeek context-cache hit ratio per node across research runs.
+
+Runs the research graph for a series of different questions against a
+fake DeepSeek server that emulates the prefix cache (hit tokens are
+reported in usage and skip the prefill delay). Query generation and
+compression keep their static instructions first and share a cached
+prefix across runs; reflection and the final answer share the research
+context (topic and summaries) first, so each reflection reuses the
+previous loop's summaries and the answer reuses the last reflection.
+Reports the prompt cache hit ratio of each node (from ``run_stats``) and
+the mean run time.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_prompt_cache.py --runs 10 --prefill-per-1k 0.2
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import fake_llm_server, fake_search_server  # noqa: E402
+from harness import load_builder, run_research  # noqa: E402
+
+QUESTIONS = [
+    "大模型推理如何降低显存占用",
+    "KV cache 量化对精度的影响",
+    "投机解码在生产环境的加速效果",
+    "连续批处理如何提升吞吐",
+    "MoE 模型的部署成本",
+    "长上下文推理的主要瓶颈",
+    "FlashAttention 各版本的差异",
+    "推理服务的自动扩缩容策略",
+    "模型蒸馏在端侧的效果",
+    "多卡张量并行的通信开销",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--prefill-per-1k", type=float, default=0.2)
+    parser.add_argument("--compress", action="store_true", help="also compress search results")
+    parser.add_argument("--agent", default="research_agent")
+    args = parser.parse_args()
+
+    with fake_llm_server(
+        latency=0.05, latency_per_1k_tokens=args.prefill_per_1k, prompt_cache=True
+    ) as llm, fake_search_server(0.02, snippet_chars=300) as search:
+        os.environ["DEEPSEEK_API_BASE"] = llm.url + "/v1"
+        os.environ["SEARCHAPI_BASE_URL"] = search.url + "/search"
+        builder = load_builder(args.agent)
+        configurable = {
+            "require_search_approval": False,
+            "max_research_loops": 2,
+            "novelty_threshold": 0,
+            "compress_search_results": args.compress,
+        }
+        totals: dict[str, list[int]] = defaultdict(lambda: [0, 0])
+        wall = []
+        for i in range(args.runs):
+            question = QUESTIONS[i % len(QUESTIONS)]
+            start = time.perf_counter()
+            values = asyncio.run(run_research(builder, question, configurable, str(uuid.uuid4())))
+            wall.append(time.perf_counter() - start)
+            for key, value in values["run_stats"].items():
+                if key.endswith("_cache_hit_tokens"):
+                    totals[key[: -len("_cache_hit_tokens")]][0] += value
+                elif key.endswith("_cache_miss_tokens"):
+                    totals[key[: -len("_cache_miss_tokens")]][1] += value
+
+        print(f"{'node':18} {'hit tokens':>11} {'miss tokens':>12} {'hit ratio':>10}")
+        for node, (hit, miss) in totals.items():
+            print(f"{node:18} {hit:11d} {miss:12d} {hit / max(hit + miss, 1):10.1%}")
+        print(f"mean run time {statistics.mean(wall):.2f}s over {args.runs} runs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Upstream limiter under concurrent runs: peak concurrency, rate and fairness.
+
+One "heavy" run fans out many searches while several "light" runs issue
+a handful each, all on one event loop against the fake search server.
+Scenarios:
+
+- unlimited: no limiter, every branch hits the upstream at once.
+- fifo:      limited, all requests share one queue (no per-run fairness).
+- fair:      limited, requests queue per LangGraph thread_id (round-robin).
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_rate_limit.py --heavy 60 --light 5 --concurrency 8 --rate 100
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import fake_search_server  # noqa: E402
+from langchain_core.runnables.config import var_child_runnable_config  # noqa: E402
+
+
+async def run_scenario(url: str, args, limited: bool, fair: bool) -> dict:
+    from agents.common.rate_limit import get_limiter, reset_limiters
+    from agents.common.search_client import close_search_client, get_search_client
+
+    os.environ["SEARCHAPI_MAX_CONCURRENCY"] = str(args.concurrency if limited else 0)
+    os.environ["SEARCHAPI_RATE_PER_SEC"] = str(args.rate if limited else 0)
+    reset_limiters()
+    await close_search_client()
+    client = get_search_client()
+    client.base_url = url
+
+    async def one_run(thread_id: str, n: int) -> float:
+        key = thread_id if fair else "shared"
+        var_child_runnable_config.set({"configurable": {"thread_id": key}})
+        start = time.perf_counter()
+        await asyncio.gather(*(client.search(f"{thread_id} 查询 {i}") for i in range(n)))
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    heavy, *light = await asyncio.gather(
+        one_run("heavy", args.heavy),
+        *(one_run(f"light-{i}", args.light_queries) for i in range(args.light)),
+    )
+    elapsed = time.perf_counter() - start
+    total = args.heavy + args.light * args.light_queries
+    await close_search_client()
+    limiter = get_limiter("searchapi")
+    assert limiter.in_flight == 0 and limiter.queued == 0
+    return {
+        "elapsed": elapsed,
+        "rate": total / elapsed,
+        "heavy": heavy,
+        "light_p50": statistics.median(light),
+        "light_max": max(light),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--heavy", type=int, default=60)
+    parser.add_argument("--light", type=int, default=5)
+    parser.add_argument("--light-queries", type=int, default=3)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=100.0)
+    parser.add_argument("--latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    with fake_search_server(args.latency) as server:
+        for name, limited, fair in (
+            ("unlimited", False, False),
+            ("fifo", True, False),
+            ("fair", True, True),
+        ):
+            server.httpd.peak_in_flight = 0
+            r = asyncio.run(run_scenario(server.url + "/search", args, limited, fair))
+            print(
+                f"{name:9s} peak_in_flight={server.httpd.peak_in_flight:3d} "
+                f"rate={r['rate']:6.1f}/s total={r['elapsed'] * 1000:7.1f} ms "
+                f"heavy={r['heavy'] * 1000:7.1f} ms "
+                f"light p50={r['light_p50'] * 1000:6.1f} ms max={r['light_max'] * 1000:6.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
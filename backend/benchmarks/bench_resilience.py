@@ -0,0 +1,125 @@
+"""Retries, timeouts and circuit breaking for searchapi.io calls.
+
+Sends a stream of searches through the shared SearchClient to a fake
+server with injected failures and compares resilience settings:
+
+- flaky: 15% of requests return 503; no retries vs. up to 2 jittered retries.
+- stuck: 5% of requests hang for 5 s; a 10 s read timeout vs. 0.5 s with retry.
+- outage: every request returns 503; breaker disabled vs. enabled. With
+  the breaker open, calls fail fast without reaching the upstream.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_resilience.py --queries 300
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import fake_search_server  # noqa: E402
+
+SCENARIOS = {
+    "flaky": (
+        {"status": 0.15, "hang": 0.0},
+        [
+            ("no retries", {"SEARCHAPI_MAX_RETRIES": "0"}),
+            ("2 retries", {"SEARCHAPI_MAX_RETRIES": "2"}),
+        ],
+    ),
+    "stuck": (
+        {"status": 0.0, "hang": 0.05},
+        [
+            ("read timeout 10s", {"SEARCHAPI_TIMEOUT": "10", "SEARCHAPI_MAX_RETRIES": "0"}),
+            ("0.5s + retry", {"SEARCHAPI_TIMEOUT": "0.5", "SEARCHAPI_MAX_RETRIES": "2"}),
+        ],
+    ),
+    "outage": (
+        {"status": 1.0, "hang": 0.0},
+        [
+            ("no breaker", {"SEARCHAPI_BREAKER_FAILURES": "0"}),
+            ("breaker", {"SEARCHAPI_BREAKER_FAILURES": "5"}),
+        ],
+    ),
+}
+DEFAULTS = {
+    "SEARCHAPI_MAX_RETRIES": "2",
+    "SEARCHAPI_TIMEOUT": "10",
+    "SEARCHAPI_BREAKER_FAILURES": "5",
+    "SEARCHAPI_BACKOFF_BASE": "0.05",
+}
+
+
+def percentile(values: list[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100 * len(ordered)))]
+
+
+async def run(queries: int, concurrency: int) -> tuple[int, list[float]]:
+    from agents.common.search_client import SearchAPIError, get_search_client
+
+    client = get_search_client()
+    semaphore = asyncio.Semaphore(concurrency)
+    ok = 0
+    latencies: list[float] = []
+
+    async def one(i: int) -> None:
+        nonlocal ok
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await client.search(f"查询 {i}")
+                ok += 1
+            except SearchAPIError:
+                pass
+            latencies.append(time.perf_counter() - start)
+
+    await asyncio.gather(*(one(i) for i in range(queries)))
+    return ok, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    from agents.common.resilience import reset_retry_policies
+
+    rng = random.Random(0)
+    failure = {"status": 0.0, "hang": 0.0}
+
+    def latency_fn(engine: str) -> float:
+        return 5.0 if rng.random() < failure["hang"] else args.latency
+
+    def status_fn(engine: str) -> int:
+        return 503 if rng.random() < failure["status"] else 200
+
+    with fake_search_server(latency_fn=latency_fn, status_fn=status_fn) as search:
+        os.environ["SEARCHAPI_BASE_URL"] = f"{search.url}/search"
+        os.environ["SEARCHAPI_MAX_CONCURRENCY"] = "0"
+        print(f"{'scenario':8} {'setting':18} {'success':>8} {'p50':>8} {'p99':>8} {'upstream/query':>15}")
+        for scenario, (injected, settings) in SCENARIOS.items():
+            failure.update(injected)
+            for label, env in settings:
+                os.environ.update({**DEFAULTS, **env})
+                reset_retry_policies()
+                before = len(search.httpd.arrivals)
+                ok, latencies = asyncio.run(run(args.queries, args.concurrency))
+                requests = len(search.httpd.arrivals) - before
+                print(
+                    f"{scenario:8} {label:18} {ok / args.queries:8.1%} "
+                    f"{percentile(latencies, 50) * 1000:6.0f}ms {percentile(latencies, 99) * 1000:6.0f}ms "
+                    f"{requests / args.queries:15.2f}"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""Memory and serialization cost of SourceRecord vs. the old 9-key source dicts.
+
+Builds thousands of sources the way ``web_research`` does (five results
+per query, Chinese titles and snippets) in both representations and
+reports:
+
+- Python memory held by the list (tracemalloc); records are what the nodes
+  build from the state with ``load_sources``,
+- checkpoint encode/decode time and bytes with JsonPlusSerializer (records
+  are checkpointed as the ``SourceList`` of ``to_dict()`` dicts the reducer
+  returns),
+- blob store segment encode/decode time and bytes.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_source_records.py --sources 1000,5000
+"""
+
+import argparse
+import sys
+import timeit
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import make_search_payload  # noqa: E402
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer  # noqa: E402
+
+from agents.common.blob_store import decode_json, encode_json  # noqa: E402
+from agents.common.source_index import SourceList, source_fingerprint  # noqa: E402
+from agents.common.source_record import SourceRecord  # noqa: E402
+
+
+def build(n: int, as_record: bool) -> list:
+    sources = []
+    for q in range(n // 5):
+        # Per-query strings come from a fresh JSON response, as in web_research.
+        query = f"大模型推理优化 方法{q}"
+        for item in make_search_payload(query, 5, 200)["organic_results"]:
+            snippet = item["snippet"]
+            if as_record:
+                sources.append(SourceRecord(
+                    url=item["link"],
+                    title=item["title"],
+                    snippet=snippet,
+                    display_link=item["display_link"],
+                    date=item["date"],
+                    query="" + query,
+                    simhash=source_fingerprint(snippet),
+                ))
+            else:
+                title, display_link = item["title"], item["display_link"]
+                sources.append({
+                    "label": title or display_link,
+                    "short_url": item["link"],
+                    "value": item["link"],
+                    "title": title,
+                    "snippet": snippet,
+                    "display_link": display_link,
+                    "date": item["date"],
+                    "query": "" + query,
+                    "simhash": source_fingerprint(snippet),
+                })
+    return sources
+
+
+def measure_memory(n: int, as_record: bool) -> int:
+    tracemalloc.start()
+    sources = build(n, as_record)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del sources
+    return size
+
+
+def best(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=1, repeat=repeat))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sources", default="1000,5000")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    serde = JsonPlusSerializer()
+    for n in (int(x) for x in args.sources.split(",")):
+        print(f"\n{n} sources")
+        print(f"  {'':8} {'memory':>10} {'ckpt bytes':>11} {'dump':>8} {'load':>8} "
+              f"{'blob bytes':>11} {'encode':>8} {'decode':>8}")
+        for name, as_record in (("dict", False), ("record", True)):
+            memory = measure_memory(n, as_record)
+            sources = build(n, as_record)
+            if as_record:
+                sources = SourceList(source.to_dict() for source in sources)
+            dumped = serde.dumps_typed(sources)
+            assert serde.loads_typed(dumped) == sources
+            blob = encode_json({"count": n, "items": list(sources)})
+            assert decode_json(blob)["items"] == list(sources)
+            print(
+                f"  {name:8} {memory / 1024:8.0f}KB {len(dumped[1]):11,d} "
+                f"{best(lambda: serde.dumps_typed(sources), args.repeat) * 1000:6.1f}ms "
+                f"{best(lambda: serde.loads_typed(dumped), args.repeat) * 1000:6.1f}ms "
+                f"{len(blob):11,d} "
+                f"{best(lambda: encode_json(list(sources)), args.repeat) * 1000:6.1f}ms "
+                f"{best(lambda: decode_json(blob), args.repeat) * 1000:6.1f}ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
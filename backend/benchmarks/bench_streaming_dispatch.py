@@ -0,0 +1,70 @@
+"""Time to first search with and without streaming query dispatch.
+
+Runs the research graph (approval off, one research loop) against a fake
+DeepSeek server that streams tool-call arguments slowly and a fake
+search server with fixed latency. Reports when the first search request
+reached the search server and the total wall time of each run.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_streaming_dispatch.py --chunk-delay 0.03 --search-latency 0.3
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import fake_llm_server, fake_search_server  # noqa: E402
+from harness import load_builder, run_research  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--chunk-delay", type=float, default=0.03)
+    parser.add_argument("--chunk-chars", type=int, default=8)
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    parser.add_argument("--agent", default="research_agent")
+    args = parser.parse_args()
+
+    with fake_llm_server(
+        stream_chunk_chars=args.chunk_chars, stream_chunk_delay=args.chunk_delay
+    ) as llm, fake_search_server(args.search_latency) as search:
+        os.environ["DEEPSEEK_API_BASE"] = llm.url + "/v1"
+        os.environ["SEARCHAPI_BASE_URL"] = search.url + "/search"
+        builder = load_builder(args.agent)
+        from agents.common.search_cache import get_search_cache
+
+        for streaming in (False, True):
+            configurable = {
+                "require_search_approval": False,
+                "streaming_query_dispatch": streaming,
+                "max_research_loops": 1,
+            }
+            first, wall = [], []
+            for _ in range(args.runs):
+                get_search_cache().clear()
+                search.httpd.arrivals.clear()
+                start = time.perf_counter()
+                values = asyncio.run(
+                    run_research(builder, "大模型推理优化", configurable, str(uuid.uuid4()))
+                )
+                wall.append(time.perf_counter() - start)
+                first.append(min(search.httpd.arrivals) - start)
+            print(
+                f"streaming_query_dispatch={streaming!s:5s} "
+                f"first search {statistics.median(first) * 1000:7.1f} ms  "
+                f"wall {statistics.median(wall) * 1000:7.1f} ms  "
+                f"run_stats={values['run_stats']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Compare web_research branch throughput: blocking requests vs shared async client.
+
+The synchronous path mirrors the previous implementation: one
+``requests.get`` per branch, no connection reuse, executed on a thread
+pool the way LangGraph runs sync nodes. The async path runs every branch
+on one event loop through the process-wide ``SearchClient``.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/bench_web_research.py --branches 60 --latency 0.05
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+# Measure raw client throughput, not the upstream limiter.
+os.environ.setdefault("SEARCHAPI_MAX_CONCURRENCY", "0")
+
+from fake_servers import fake_search_server  # noqa: E402
+
+
+def run_sync(url: str, queries: list[str], workers: int) -> float:
+    def branch(query: str) -> int:
+        params = {"engine": "baidu", "q": query, "api_key": "bench"}
+        response = requests.get(url, params=params)
+        return len(response.json()["organic_results"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        list(pool.map(branch, queries))
+    return time.perf_counter() - start
+
+
+def run_async(url: str, queries: list[str]) -> float:
+    from agents.common.search_client import close_search_client, get_search_client
+
+    async def main() -> float:
+        client = get_search_client()
+        client.base_url = url
+        # Warm the pool once so both paths are compared in steady state.
+        await client.search("warmup")
+        start = time.perf_counter()
+        await asyncio.gather(*(client.search(q) for q in queries))
+        elapsed = time.perf_counter() - start
+        await close_search_client()
+        return elapsed
+
+    return asyncio.run(main())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--branches", type=int, default=60)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=min(32, (os.cpu_count() or 1) + 4),
+        help="Thread pool size for the sync path (ThreadPoolExecutor default)",
+    )
+    args = parser.parse_args()
+
+    queries = [f"查询 {i}" for i in range(args.branches)]
+    with fake_search_server(latency=args.latency) as server:
+        url = f"{server.url}/api/v1/search"
+        sync_elapsed = run_sync(url, queries, args.workers)
+        async_elapsed = run_async(url, queries)
+
+    print(f"branches={args.branches} latency={args.latency}s workers={args.workers}")
+    print(f"sync  requests.get : {args.branches / sync_elapsed:8.1f} branches/s ({sync_elapsed:.3f}s)")
+    print(f"async SearchClient : {args.branches / async_elapsed:8.1f} branches/s ({async_elapsed:.3f}s)")
+
+
+if __name__ == "__main__":
+    main()
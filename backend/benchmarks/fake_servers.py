@@ -0,0 +1,404 @@
+"""Local stand-ins for upstream services used by the benchmarks.
+
+The servers run in a background thread on 127.0.0.1 and answer with
+payloads shaped like the real APIs, after an artificial delay.
+"""
+
+import hashlib
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Optional
+from urllib.parse import parse_qs, urlparse
+
+
+def make_search_payload(query: str, num_results: int = 5, snippet_chars: int = 0) -> dict:
+    """Build a searchapi.io-shaped response for ``query``.
+
+    ``snippet_chars`` sets the snippet length; 0 keeps the short default.
+    """
+
+    def snippet(i: int) -> str:
+        sentence = f"这是关于{query}的第{i + 1}条搜索摘要。"
+        if not snippet_chars:
+            return sentence * 4
+        return (sentence * (snippet_chars // len(sentence) + 1))[:snippet_chars]
+
+    return {
+        "search_parameters": {"engine": "baidu", "q": query},
+        "organic_results": [
+            {
+                "position": i + 1,
+                "title": f"{query} - 结果 {i + 1}",
+                "link": f"http://www.baidu.com/link?url=fake-{abs(hash(query)) % 10**8}-{i}",
+                "display_link": f"example{i}.com",
+                "date": "2025年1月1日",
+                "snippet": snippet(i),
+            }
+            for i in range(num_results)
+        ],
+    }
+
+
+class _SearchHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        params = parse_qs(urlparse(self.path).query)
+        query = params.get("q", [""])[0]
+        engine = params.get("engine", [""])[0]
+        latency_fn = self.server.latency_fn
+        with self.server.lock:
+            self.server.arrivals.append(time.perf_counter())
+            self.server.in_flight += 1
+            self.server.peak_in_flight = max(self.server.peak_in_flight, self.server.in_flight)
+        time.sleep(latency_fn(engine) if latency_fn else self.server.latency)
+        with self.server.lock:
+            self.server.in_flight -= 1
+        status = self.server.status_fn(engine) if self.server.status_fn else 200
+        if status != 200:
+            body = b'{"error": "injected failure"}'
+        else:
+            payload = make_search_payload(query, self.server.num_results, self.server.snippet_chars)
+            body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _Server(ThreadingHTTPServer):
+    # The default backlog of 5 drops SYNs when many branches connect at once.
+    request_queue_size = 256
+
+    def handle_error(self, request, client_address):
+        # Hedged and cancelled requests close the connection before the reply.
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+
+class FakeServer:
+    """Run a ThreadingHTTPServer in a background thread."""
+
+    def __init__(self, handler, **attrs):
+        self.httpd = _Server(("127.0.0.1", 0), handler)
+        self.httpd.daemon_threads = True
+        # Concurrency seen by the server, for checking client-side limits.
+        self.httpd.lock = threading.Lock()
+        self.httpd.in_flight = 0
+        self.httpd.peak_in_flight = 0
+        self.httpd.arrivals = []
+        for name, value in attrs.items():
+            setattr(self.httpd, name, value)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# Distinct enough that query deduplication keeps all of them.
+QUERY_POOL = [
+    "大模型推理 显存优化",
+    "KV cache 量化方案对比",
+    "投机解码 加速效果",
+    "张量并行 通信开销",
+    "FlashAttention 原理",
+    "模型蒸馏 精度损失",
+    "混合专家 路由策略",
+    "长上下文 位置编码",
+    "推理服务 冷启动",
+    "GPU 利用率 监控",
+    "稀疏注意力 实现",
+    "低比特 权重量化",
+]
+FOLLOW_UP_POOL = [
+    "连续批处理 吞吐量 基准测试",
+    "PagedAttention 内存碎片",
+    "推测采样 接受率",
+    "算子融合 编译器",
+    "多卡部署 负载均衡",
+    "请求调度 排队延迟",
+    "显存带宽 瓶颈分析",
+    "量化感知训练 成本",
+]
+_NUMBER_QUERIES_RE = re.compile(r"查询数量上限：(\d+)")
+
+
+def make_tool_arguments(tool_name: str, prompt: str) -> dict:
+    """Canned structured-output arguments for the schemas used by the graphs.
+
+    Query generation returns as many queries as the prompt allows; reflection
+    returns the first follow-up query that does not appear in the prompt yet,
+    so every research loop searches something new.
+    """
+    if tool_name == "SearchQueryList":
+        match = _NUMBER_QUERIES_RE.search(prompt)
+        count = int(match.group(1)) if match else 3
+        return {
+            "query": [QUERY_POOL[i % len(QUERY_POOL)] for i in range(count)],
+            "rationale": "覆盖问题的不同方面。",
+        }
+    if tool_name == "Reflection":
+        follow_ups = [q for q in FOLLOW_UP_POOL if q not in prompt][:1]
+        return {
+            "is_sufficient": False,
+            "knowledge_gap": "缺少最新的数据。",
+            "follow_up_queries": follow_ups,
+        }
+    return {}
+
+
+def make_chat_completion(body: dict, answer_chars: int = 0) -> dict:
+    """Build an OpenAI chat.completions response for the request ``body``.
+
+    ``answer_chars`` sets the length of free-text answers; 0 keeps the short default.
+    """
+    prompt = "".join(str(m.get("content", "")) for m in body.get("messages", []))
+    message = {"role": "assistant", "content": ""}
+    tools = body.get("tools") or []
+    if tools:
+        name = tools[0]["function"]["name"]
+        message["tool_calls"] = [
+            {
+                "id": "call_0",
+                "type": "function",
+                "function": {
+                    "name": name,
+                    "arguments": json.dumps(make_tool_arguments(name, prompt), ensure_ascii=False),
+                },
+            }
+        ]
+    elif body.get("max_tokens"):
+        # Fill the budget (about 0.6 tokens per Chinese character).
+        sentence = "这是基准测试生成的摘要要点。"
+        message["content"] = sentence * max(1, int(body["max_tokens"] / 0.6) // len(sentence))
+    else:
+        sentence = "这是基准测试生成的答案。"
+        message["content"] = (
+            (sentence * (answer_chars // len(sentence) + 1))[:answer_chars]
+            if answer_chars
+            else sentence
+        )
+    prompt_tokens = max(1, len(prompt) // 2)
+    return {
+        "id": "chatcmpl-bench",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "deepseek-chat"),
+        "choices": [{"index": 0, "message": message, "finish_reason": "stop"}],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": 32,
+            "total_tokens": prompt_tokens + 32,
+        },
+    }
+
+
+class PrefixCache:
+    """Emulate DeepSeek's context cache: prompt prefixes are stored in fixed units.
+
+    A request hits the cache for the longest stored prefix, counted in whole
+    units (128 characters, about 64 tokens at the benchmark's 2 characters
+    per token). Every prefix of the request is then stored.
+    """
+
+    def __init__(self, unit_chars: int = 128):
+        self.unit_chars = unit_chars
+        self._prefixes: set[bytes] = set()
+        self._lock = threading.Lock()
+
+    def match_and_store(self, prompt: str) -> int:
+        """Return the number of cached prompt characters."""
+        h = hashlib.sha1()
+        digests = []
+        for start in range(0, len(prompt) - self.unit_chars + 1, self.unit_chars):
+            h.update(prompt[start : start + self.unit_chars].encode())
+            digests.append(h.copy().digest())
+        with self._lock:
+            hit = 0
+            for digest in digests:
+                if digest not in self._prefixes:
+                    break
+                hit += 1
+            self._prefixes.update(digests)
+        return hit * self.unit_chars
+
+
+class _ChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        # /models, used for connection pre-warming
+        body = json.dumps({"object": "list", "data": []}).encode()
+        self._send(body)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        response = make_chat_completion(request, self.server.answer_chars)
+        model = request.get("model", "")
+        if self.server.confidence_fn:
+            for call in response["choices"][0]["message"].get("tool_calls", []):
+                arguments = json.loads(call["function"]["arguments"])
+                arguments["confidence"] = self.server.confidence_fn(model)
+                call["function"]["arguments"] = json.dumps(arguments, ensure_ascii=False)
+        # Prefill cost grows with the prompt, so long prompts are slower.
+        usage = response["usage"]
+        prompt_tokens = usage["prompt_tokens"]
+        if self.server.prompt_cache is not None:
+            # Cached prefix tokens are reported like DeepSeek does and skip prefill.
+            prompt = "".join(str(m.get("content", "")) for m in request.get("messages", []))
+            hit = min(prompt_tokens, self.server.prompt_cache.match_and_store(prompt) // 2)
+            usage["prompt_cache_hit_tokens"] = hit
+            usage["prompt_cache_miss_tokens"] = prompt_tokens - hit
+            usage["prompt_tokens_details"] = {"cached_tokens": hit}
+            prompt_tokens -= hit
+        latency = self.server.latency_fn(model) if self.server.latency_fn else self.server.latency
+        time.sleep(latency + prompt_tokens / 1000 * self.server.latency_per_1k_tokens)
+        if request.get("stream"):
+            self._stream(response, request)
+        else:
+            # Without streaming the client still waits for the whole generation.
+            time.sleep(self._pieces(response) * self.server.stream_chunk_delay)
+            self._send(json.dumps(response, ensure_ascii=False).encode())
+
+    def _pieces(self, response: dict) -> int:
+        message = response["choices"][0]["message"]
+        size = self.server.stream_chunk_chars
+        text = (message.get("content") or "") + "".join(
+            call["function"]["arguments"] for call in message.get("tool_calls", [])
+        )
+        return -(-len(text) // size)
+
+    def _stream(self, response: dict, request: dict):
+        """Replay ``response`` as chat.completion.chunk SSE events.
+
+        Content and tool-call arguments are split into ``stream_chunk_chars``
+        pieces sent ``stream_chunk_delay`` seconds apart, like token streaming.
+        """
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        message = response["choices"][0]["message"]
+        size = self.server.stream_chunk_chars
+
+        def event(delta: dict, finish_reason=None):
+            chunk = {
+                "id": response["id"],
+                "object": "chat.completion.chunk",
+                "created": response["created"],
+                "model": response["model"],
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+            data = f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+            self.wfile.flush()
+
+        event({"role": "assistant", "content": ""})
+        for call in message.get("tool_calls", []):
+            event({"tool_calls": [{"index": 0, "id": call["id"], "type": "function",
+                                   "function": {"name": call["function"]["name"], "arguments": ""}}]})
+            arguments = call["function"]["arguments"]
+            for i in range(0, len(arguments), size):
+                time.sleep(self.server.stream_chunk_delay)
+                event({"tool_calls": [{"index": 0, "function": {"arguments": arguments[i : i + size]}}]})
+        content = message.get("content") or ""
+        for i in range(0, len(content), size):
+            time.sleep(self.server.stream_chunk_delay)
+            event({"content": content[i : i + size]})
+        event({}, "tool_calls" if message.get("tool_calls") else "stop")
+        if (request.get("stream_options") or {}).get("include_usage"):
+            usage = {k: v for k, v in response.items() if k != "choices"}
+            usage.update(object="chat.completion.chunk", choices=[])
+            data = f"data: {json.dumps(usage)}\n\n".encode()
+            self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        data = b"data: [DONE]\n\n"
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n0\r\n\r\n")
+        self.wfile.flush()
+
+    def _send(self, body: bytes):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def fake_search_server(
+    latency: float = 0.05,
+    num_results: int = 5,
+    snippet_chars: int = 0,
+    latency_fn: Optional[Callable[[str], float]] = None,
+    status_fn: Optional[Callable[[str], int]] = None,
+) -> FakeServer:
+    """Create a searchapi.io-compatible server; use as a context manager.
+
+    ``latency_fn(engine)``, when given, draws each request's latency instead
+    of the fixed ``latency``, e.g. a heavy-tailed distribution per engine.
+    ``status_fn(engine)`` likewise picks the HTTP status, to inject failures.
+    """
+    return FakeServer(
+        _SearchHandler,
+        latency=latency,
+        num_results=num_results,
+        snippet_chars=snippet_chars,
+        latency_fn=latency_fn,
+        status_fn=status_fn,
+    )
+
+
+def fake_llm_server(
+    latency: float = 0.0,
+    latency_per_1k_tokens: float = 0.0,
+    stream_chunk_chars: int = 8,
+    stream_chunk_delay: float = 0.0,
+    answer_chars: int = 0,
+    latency_fn: Optional[Callable[[str], float]] = None,
+    confidence_fn: Optional[Callable[[str], float]] = None,
+    prompt_cache: bool = False,
+) -> FakeServer:
+    """Create an OpenAI-compatible chat completions server.
+
+    Each request takes ``latency`` plus ``latency_per_1k_tokens`` for every
+    thousand prompt tokens before the first byte. Streaming requests then
+    emit ``stream_chunk_chars`` characters every ``stream_chunk_delay`` seconds.
+    ``answer_chars`` sets the length of free-text answers. ``latency_fn(model)``,
+    when given, draws each request's base latency instead of ``latency``, and
+    ``confidence_fn(model)`` adds a self-reported confidence to tool calls.
+    ``prompt_cache`` emulates DeepSeek's prefix cache (see ``PrefixCache``):
+    usage reports cache hit/miss tokens and cached tokens skip the prefill delay.
+    """
+    return FakeServer(
+        _ChatHandler,
+        latency=latency,
+        latency_per_1k_tokens=latency_per_1k_tokens,
+        stream_chunk_chars=stream_chunk_chars,
+        stream_chunk_delay=stream_chunk_delay,
+        answer_chars=answer_chars,
+        latency_fn=latency_fn,
+        confidence_fn=confidence_fn,
+        prompt_cache=PrefixCache() if prompt_cache else None,
+    )
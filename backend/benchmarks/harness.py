@@ -0,0 +1,34 @@
+"""Drive the research graph end to end for benchmarks.
+
+Compiles the agent's ``builder`` with an in-memory checkpointer and
+approves every human-in-the-loop interrupt until the run finishes.
+"""
+
+import importlib
+import os
+
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.types import Command
+
+
+def load_builder(agent: str = "research_agent"):
+    # Models are only built with a key set; the fake server ignores it.
+    os.environ.setdefault("DEEPSEEK_API_KEY", "bench")
+    return importlib.import_module(f"agents.{agent}.graph").builder
+
+
+async def run_research(
+    builder, question: str, configurable: dict, thread_id: str, checkpointer=None, callbacks=None
+):
+    """Run one research thread to completion and return the final state values."""
+    graph = builder.compile(checkpointer=checkpointer or InMemorySaver())
+    config = {"configurable": {**configurable, "thread_id": thread_id}}
+    if callbacks:
+        config["callbacks"] = callbacks
+    payload = {"messages": [{"role": "user", "content": question}]}
+    while True:
+        await graph.ainvoke(payload, config)
+        snapshot = await graph.aget_state(config)
+        if not snapshot.next:
+            return snapshot.values
+        payload = Command(resume={i.id: True for i in snapshot.interrupts})
@@ -0,0 +1,272 @@
+"""Offline benchmark suite for the research graph.
+
+Runs the whole graph against local stand-ins for DeepSeek and
+searchapi.io (see ``fake_servers.py``) over a grid of
+``number_of_initial_queries`` x ``max_research_loops`` settings and
+reports, for every grid point:
+
+- per-node latency p50/p99 (from LangChain callbacks),
+- total wall time p50/p99 per run,
+- peak Python memory allocated during one extra run (tracemalloc),
+- the run_stats counters of the last run.
+
+Results are written as JSON to ``benchmarks/results/<commit>.json`` so two
+commits can be compared with ``--compare``. No API keys are needed.
+
+Usage (from ``backend/``)::
+
+    python benchmarks/suite.py --queries 1,3,5 --loops 1,2,3 --runs 5
+    python benchmarks/suite.py --compare benchmarks/results/abc1234.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import defaultdict
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from fake_servers import fake_llm_server, fake_search_server  # noqa: E402
+from harness import load_builder, run_research  # noqa: E402
+from langchain_core.callbacks import BaseCallbackHandler  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+class NodeTimer(BaseCallbackHandler):
+    """Collect the duration of every graph node run.
+
+    LangGraph tags each node's chain run with ``langgraph_node`` metadata;
+    child runs inside the node (models, lambdas) carry the same tag but a
+    different name, so only the run whose name matches is timed. Runs that
+    end in an error (including interrupts) are not recorded.
+    """
+
+    run_inline = True
+
+    def __init__(self):
+        self.durations: dict[str, list[float]] = defaultdict(list)
+        self._started: dict[UUID, tuple[str, float]] = {}
+
+    def on_chain_start(self, serialized, inputs, *, run_id: UUID, metadata=None, **kwargs: Any):
+        node = (metadata or {}).get("langgraph_node")
+        if node is not None and kwargs.get("name") == node:
+            self._started[run_id] = (node, time.perf_counter())
+
+    def on_chain_end(self, outputs, *, run_id: UUID, **kwargs: Any):
+        started = self._started.pop(run_id, None)
+        if started is not None:
+            node, start = started
+            self.durations[node].append(time.perf_counter() - start)
+
+    def on_chain_error(self, error, *, run_id: UUID, **kwargs: Any):
+        self._started.pop(run_id, None)
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Linear-interpolated percentile, ``q`` in [0, 100]."""
+    ordered = sorted(values)
+    if not ordered:
+        return math.nan
+    rank = (len(ordered) - 1) * q / 100
+    low, high = math.floor(rank), math.ceil(rank)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values: list[float]) -> dict:
+    return {
+        "count": len(values),
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "mean_ms": round(sum(values) / len(values) * 1000, 2) if values else math.nan,
+    }
+
+
+def git_revision() -> dict:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(
+                ["git", *args], capture_output=True, text=True, check=True,
+                cwd=Path(__file__).resolve().parent,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return ""
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD") or "unknown",
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+async def run_cold(builder, configurable: dict, callbacks: list) -> dict:
+    from agents.common.search_cache import get_search_cache
+
+    # Every run starts cold; cached searches would hide the search latency.
+    get_search_cache().clear()
+    return await run_research(
+        builder,
+        "大模型推理优化的主要方法",
+        configurable,
+        str(uuid.uuid4()),
+        callbacks=callbacks,
+    )
+
+
+def bench_point(builder, queries: int, loops: int, args) -> dict:
+    from agents.common.source_index import load_sources
+
+    configurable = {
+        "number_of_initial_queries": queries,
+        "max_research_loops": loops,
+        "require_search_approval": False,
+        **json.loads(args.configurable),
+    }
+    timer = NodeTimer()
+    wall: list[float] = []
+    values: dict = {}
+
+    async def timed_runs():
+        nonlocal values
+        for _ in range(args.warmup):
+            await run_cold(builder, configurable, [])
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            values = await run_cold(builder, configurable, [timer])
+            wall.append(time.perf_counter() - start)
+
+    asyncio.run(timed_runs())
+
+    # Separate run for memory: tracemalloc slows allocation-heavy code down.
+    tracemalloc.start()
+    asyncio.run(run_cold(builder, configurable, []))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "number_of_initial_queries": queries,
+        "max_research_loops": loops,
+        "wall": summarize(wall),
+        "nodes": {node: summarize(d) for node, d in sorted(timer.durations.items())},
+        "peak_memory_kb": round(peak / 1024, 1),
+        "sources_gathered": len(load_sources(values.get("sources_gathered"))),
+        "run_stats": values.get("run_stats", {}),
+    }
+
+
+def print_point(point: dict) -> None:
+    print(
+        f"queries={point['number_of_initial_queries']} loops={point['max_research_loops']}  "
+        f"wall p50={point['wall']['p50_ms']:8.1f} ms p99={point['wall']['p99_ms']:8.1f} ms  "
+        f"peak mem={point['peak_memory_kb']:9.1f} KB  sources={point['sources_gathered']}"
+    )
+    for node, stats in point["nodes"].items():
+        print(
+            f"    {node:16s} n={stats['count']:4d}  "
+            f"p50={stats['p50_ms']:8.2f} ms  p99={stats['p99_ms']:8.2f} ms"
+        )
+
+
+def compare(baseline: dict, current: dict) -> None:
+    """Print p50 changes of ``current`` relative to ``baseline`` per grid point."""
+
+    def key(point: dict) -> tuple:
+        return point["number_of_initial_queries"], point["max_research_loops"]
+
+    def delta(old: float, new: float) -> str:
+        if not old:
+            return "     n/a"
+        return f"{(new - old) / old * 100:+7.1f}%"
+
+    base = {key(p): p for p in baseline["results"]}
+    print(f"\ncompared with {baseline['commit']} ({baseline['timestamp']}):")
+    for point in current["results"]:
+        old = base.get(key(point))
+        if old is None:
+            continue
+        print(
+            f"queries={key(point)[0]} loops={key(point)[1]}  wall p50 "
+            f"{delta(old['wall']['p50_ms'], point['wall']['p50_ms'])}  peak mem "
+            f"{delta(old['peak_memory_kb'], point['peak_memory_kb'])}"
+        )
+        for node, stats in point["nodes"].items():
+            if node in old["nodes"]:
+                print(f"    {node:16s} p50 {delta(old['nodes'][node]['p50_ms'], stats['p50_ms'])}")
+
+
+def parse_ints(text: str) -> list[int]:
+    return [int(part) for part in text.split(",") if part]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--agent", default="research_agent")
+    parser.add_argument("--queries", type=parse_ints, default=[1, 3, 5])
+    parser.add_argument("--loops", type=parse_ints, default=[1, 2, 3])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    parser.add_argument("--llm-latency-per-1k", type=float, default=0.01)
+    parser.add_argument("--answer-chars", type=int, default=2000)
+    parser.add_argument("--search-latency", type=float, default=0.1)
+    parser.add_argument("--search-results", type=int, default=5)
+    parser.add_argument("--snippet-chars", type=int, default=200)
+    parser.add_argument(
+        "--configurable", default="{}",
+        help="extra Configuration values as JSON, e.g. '{\"compress_search_results\": true}'",
+    )
+    parser.add_argument("--output", type=Path, help="default: benchmarks/results/<commit>.json")
+    parser.add_argument("--compare", type=Path, help="earlier results file to compare against")
+    args = parser.parse_args()
+
+    with fake_llm_server(
+        args.llm_latency, args.llm_latency_per_1k, answer_chars=args.answer_chars
+    ) as llm, fake_search_server(
+        args.search_latency, args.search_results, args.snippet_chars
+    ) as search:
+        os.environ["DEEPSEEK_API_BASE"] = llm.url + "/v1"
+        os.environ["SEARCHAPI_BASE_URL"] = search.url + "/search"
+        builder = load_builder(args.agent)
+        points = []
+        for queries in args.queries:
+            for loops in args.loops:
+                point = bench_point(builder, queries, loops, args)
+                print_point(point)
+                points.append(point)
+
+    revision = git_revision()
+    report = {
+        **revision,
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "agent": args.agent,
+        "parameters": {
+            k: v for k, v in vars(args).items() if k not in ("output", "compare")
+        },
+        "results": points,
+    }
+    output = args.output or RESULTS_DIR / (
+        f"{revision['commit']}{'-dirty' if revision['dirty'] else ''}.json"
+    )
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+    print(f"\nresults written to {output}")
+
+    if args.compare:
+        compare(json.loads(args.compare.read_text()), report)
+
+
+if __name__ == "__main__":
+    main()
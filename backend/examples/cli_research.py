@@ -1,6 +1,6 @@
 import argparse
+import asyncio
 from langchain_core.messages import HumanMessage
-from agent.graph import graph
 
 
 def main() -> None:
@@ -26,6 +26,9 @@ def main() -> None:
     )
     args = parser.parse_args()
 
+    # Imported after argument parsing so --help and usage errors return immediately.
+    from agents.research_agent.graph import graph
+
     state = {
         "messages": [HumanMessage(content=args.question)],
         "initial_search_query_count": args.initial_queries,
@@ -33,7 +36,9 @@ def main() -> None:
         "reasoning_model": args.reasoning_model,
     }
 
-    result = graph.invoke(state)
+    # No one is there to answer the approval prompt, so searches run unapproved.
+    config = {"configurable": {"require_search_approval": False}}
+    result = asyncio.run(graph.ainvoke(state, config))
     messages = result.get("messages", [])
     if messages:
         print(messages[-1].content)
@@ -0,0 +1,3 @@
+"""
+Shared infrastructure used by all agent graphs in this process.
+"""
@@ -0,0 +1,338 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+BLOB_REF_PREFIX = "blob:sha256:"
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, str) and value.startswith(BLOB_REF_PREFIX)
+
+
+def encode_json(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(data: bytes) -> Any:
+    return json.loads(data)
+
+
+def _digest(ref: str) -> str:
+    if not is_blob_ref(ref):
+        raise ValueError(f"not a blob reference: {ref!r}")
+    return ref[len(BLOB_REF_PREFIX):]
+
+
+class MemoryBlobStore:
+    """进程内 blob 存储，只用于测试和基准。"""
+
+    def __init__(self):
+        self._blobs: dict[str, bytes] = {}
+        self._touched: dict[str, float] = {}
+
+    def put(self, digest: str, data: bytes) -> None:
+        self._blobs.setdefault(digest, data)
+        self._touched[digest] = time.time()
+
+    def touch(self, digest: str) -> bool:
+        if digest not in self._blobs:
+            return False
+        self._touched[digest] = time.time()
+        return True
+
+    def get(self, digest: str) -> Optional[bytes]:
+        return self._blobs.get(digest)
+
+    def prune(self, max_age: float) -> int:
+        cutoff = time.time() - max_age
+        stale = [digest for digest, touched in self._touched.items() if touched < cutoff]
+        for digest in stale:
+            del self._blobs[digest], self._touched[digest]
+        return len(stale)
+
+
+class FileBlobStore:
+    """本地文件系统 blob 存储，按摘要前两位分目录。
+
+    内容寻址，同一摘要只写一次（再次写入只更新修改时间，供 prune 判断）；
+    先写临时文件再 rename，并发写入同一个 blob 也不会读到半个文件。
+    多个 worker 部署在不同机器上时请使用 Postgres。
+    """
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+    def put(self, digest: str, data: bytes) -> None:
+        path = self._path(digest)
+        if path.exists():
+            os.utime(path)
+            return
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def touch(self, digest: str) -> bool:
+        try:
+            os.utime(self._path(digest))
+        except FileNotFoundError:
+            return False
+        return True
+
+    def get(self, digest: str) -> Optional[bytes]:
+        try:
+            return self._path(digest).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def prune(self, max_age: float) -> int:
+        cutoff = time.time() - max_age
+        removed = 0
+        for path in self.root.glob("*/*"):
+            try:
+                if path.stat().st_mtime < cutoff:
+                    path.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+
+class PostgresBlobStore:
+    """基于 Postgres 的 blob 存储（多个 worker 共享），可以和检查点用同一个库。
+
+    blob 都是几 KB 到几百 KB 的 JSON，用 bytea 列即可，不需要大对象接口。
+    需要安装 psycopg（psycopg 3）：pip install "agent[postgres]"。
+    """
+
+    def __init__(self, dsn: str):
+        try:
+            import psycopg
+        except ImportError as e:
+            raise ImportError(
+                'BLOB_STORE_URI points at Postgres but psycopg is not installed; '
+                'install it with: pip install "agent[postgres]"'
+            ) from e
+
+        self._lock = threading.Lock()
+        self._conn = psycopg.connect(dsn, autocommit=True)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS agent_blobs ("
+            " digest TEXT PRIMARY KEY, data BYTEA NOT NULL)"
+        )
+        self._conn.execute(
+            "ALTER TABLE agent_blobs"
+            " ADD COLUMN IF NOT EXISTS touched_at TIMESTAMPTZ NOT NULL DEFAULT now()"
+        )
+
+    def put(self, digest: str, data: bytes) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO agent_blobs (digest, data) VALUES (%s, %s)"
+                " ON CONFLICT (digest) DO UPDATE SET touched_at = now()",
+                (digest, data),
+            )
+
+    def touch(self, digest: str) -> bool:
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE agent_blobs SET touched_at = now() WHERE digest = %s", (digest,)
+            )
+        return cursor.rowcount > 0
+
+    def get(self, digest: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM agent_blobs WHERE digest = %s", (digest,)
+            ).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def prune(self, max_age: float) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM agent_blobs WHERE touched_at < now() - make_interval(secs => %s)",
+                (max_age,),
+            )
+        return cursor.rowcount
+
+
+class ContentStore:
+    """内容寻址的 JSON 存储：put_json 返回引用，get_json 按引用取回对象。
+
+    解码后的对象保存在进程内 LRU 中，同一运行里反复解析引用不会重复读后端。
+    返回的对象是共享的，调用方不要修改。
+    """
+
+    def __init__(self, backend, cache_size: int = 1024):
+        self.backend = backend
+        self.cache_size = cache_size
+        self._cache: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"writes": 0, "bytes_written": 0, "reads": 0}
+
+    def _remember(self, ref: str, obj: Any) -> None:
+        with self._lock:
+            self._cache[ref] = obj
+            self._cache.move_to_end(ref)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def put_json(self, obj: Any) -> str:
+        data = encode_json(obj)
+        digest = hashlib.sha256(data).hexdigest()
+        ref = BLOB_REF_PREFIX + digest
+        with self._lock:
+            known = ref in self._cache
+        # 缓存命中也要刷新后端的写入时间，否则 prune 会删掉仍被引用的 blob；
+        # blob 已被其他进程清理时重新写入
+        if not (known and self.backend.touch(digest)):
+            self.backend.put(digest, data)
+            self.stats["writes"] += 1
+            self.stats["bytes_written"] += len(data)
+        self._remember(ref, obj)
+        return ref
+
+    def prune(self, max_age: float) -> int:
+        """删除 max_age 秒内没有写入或 touch 过的 blob，返回删除的数量。"""
+        with self._lock:
+            self._cache.clear()
+        return self.backend.prune(max_age)
+
+    def get_json(self, ref: str) -> Any:
+        with self._lock:
+            if ref in self._cache:
+                self._cache.move_to_end(ref)
+                return self._cache[ref]
+        data = self.backend.get(_digest(ref))
+        if data is None:
+            raise KeyError(f"blob not found: {ref}")
+        self.stats["reads"] += 1
+        obj = decode_json(data)
+        self._remember(ref, obj)
+        return obj
+
+
+_store: Optional[ContentStore] = None
+_store_uri: Optional[str] = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store() -> Optional[ContentStore]:
+    """返回进程共享的 blob 存储；BLOB_STORE_URI 未设置时返回 None（状态照旧内联保存）。
+
+    BLOB_STORE_URI 为 postgres:// 或 postgresql:// 时使用 Postgres，
+    memory:// 使用进程内存储，其他值视为本地目录（可带 file:// 前缀）。
+
+    blob 按内容寻址，同一分段可能被多个线程（对话）引用，删除线程时不能
+    直接删除它引用的 blob。存储按最后写入时间清理：定期运行
+    python -m agents.common.blob_store prune --max-age-days N，N 要大于线程
+    保留、可能被恢复的时长，否则恢复旧线程时会读不到来源。
+    """
+    global _store, _store_uri
+    uri = os.getenv("BLOB_STORE_URI", "")
+    if not uri:
+        return None
+    if _store is None or _store_uri != uri:
+        with _store_lock:
+            if _store is None or _store_uri != uri:
+                if uri.startswith(("postgres://", "postgresql://")):
+                    backend = PostgresBlobStore(uri)
+                elif uri == "memory://":
+                    backend = MemoryBlobStore()
+                else:
+                    backend = FileBlobStore(uri.removeprefix("file://"))
+                _store, _store_uri = ContentStore(backend), uri
+    return _store
+
+
+def _require_store() -> ContentStore:
+    store = get_blob_store()
+    if store is None:
+        raise RuntimeError("state holds blob references but BLOB_STORE_URI is not set")
+    return store
+
+
+# 大列表字段在状态中是普通列表，元素可以是条目本身，也可以是一个分段的引用：
+#   {"count": 条数, "items": [...]}
+# 节点用 store_list / astore_list 把新条目写成一个分段、只返回它的引用，
+# reducer（append_list）只做列表拼接，不在图的事件循环里做文件或数据库 I/O。
+
+
+def has_blob_refs(value: Any) -> bool:
+    return isinstance(value, list) and any(is_blob_ref(item) for item in value)
+
+
+def _load_segment(ref: str) -> list:
+    return _require_store().get_json(ref)["items"]
+
+
+def list_length(value: Any) -> int:
+    if not value:
+        return 0
+    store = _require_store() if has_blob_refs(value) else None
+    return sum(store.get_json(item)["count"] if is_blob_ref(item) else 1 for item in value)
+
+
+def load_list(value: Any) -> list:
+    """把状态中的列表字段解析为普通列表：内联条目原样保留，引用展开为分段中的条目。"""
+    if not value:
+        return []
+    if not has_blob_refs(value):
+        return value
+    items = []
+    for item in value:
+        if is_blob_ref(item):
+            items.extend(_load_segment(item))
+        else:
+            items.append(item)
+    return items
+
+
+def append_list(existing: Any, new: Optional[Iterable[Any]]) -> list:
+    """列表字段的 reducer：只做拼接，不读写 blob 存储。"""
+    return list(existing or []) + list(new or [])
+
+
+def store_list(items: Iterable[Any]) -> list:
+    """节点对列表字段的更新：启用 blob 存储时把条目写成一个分段，只返回它的引用。
+
+    会阻塞在文件或数据库 I/O 上，异步节点请使用 astore_list。
+    """
+    items = list(items or [])
+    store = get_blob_store()
+    if store is None or not items:
+        return items
+    return [store.put_json({"count": len(items), "items": items})]
+
+
+async def astore_list(items: Iterable[Any]) -> list:
+    """store_list 的异步版本，写入在线程池中进行，不阻塞事件循环。"""
+    if not os.getenv("BLOB_STORE_URI"):
+        return list(items or [])
+    return await asyncio.to_thread(store_list, items)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="清理 BLOB_STORE_URI 指向的 blob 存储")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    prune = subparsers.add_parser("prune", help="删除长时间没有写入过的 blob")
+    prune.add_argument("--max-age-days", type=float, required=True)
+    args = parser.parse_args()
+    store = _require_store()
+    removed = store.prune(args.max_age_days * 86400)
+    print(f"removed {removed} blobs older than {args.max_age_days} days")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import functools
+import time
+from typing import Any, Callable, Generator, Optional, Type, TypeVar
+
+from langchain_core.exceptions import OutputParserException
+from pydantic import BaseModel, ValidationError
+
+from agents.common.deadline import is_deadline_error
+from agents.common.instrumentation import scope_labels
+from agents.common.llm_cache import ainvoke_structured, invoke_structured
+from agents.common.llm_registry import get_structured_model
+from agents.common.metrics import (
+    CASCADE_CALLS,
+    CASCADE_ESCALATIONS,
+    CASCADE_TIER_SECONDS,
+    labelled,
+)
+
+T = TypeVar("T", bound=BaseModel)
+
+# check(result) 返回升级原因，结果可以接受时返回 None
+Check = Callable[[BaseModel], Optional[str]]
+
+
+def low_confidence(result: BaseModel, min_confidence: float) -> Optional[str]:
+    """模型自评的 confidence 低于 min_confidence 时返回 "low_confidence"；没有自评时不作判断。"""
+    confidence = getattr(result, "confidence", None)
+    if confidence is not None and confidence < min_confidence:
+        return "low_confidence"
+    return None
+
+
+def _failure_reason(exc: Exception) -> str:
+    if isinstance(exc, (OutputParserException, ValidationError)):
+        return "parse"
+    return "error"
+
+
+def _observe(tier: str, started: float, reason: Optional[str] = None) -> None:
+    graph, node = scope_labels()
+    labelled(CASCADE_CALLS, graph, node, tier).inc()
+    labelled(CASCADE_TIER_SECONDS, graph, node, tier).observe(time.perf_counter() - started)
+    if reason is not None:
+        labelled(CASCADE_ESCALATIONS, graph, node, reason).inc()
+
+
+def _cascade_steps(
+    fast_model: str, strong_model: str, check: Check
+) -> Generator[str, tuple[Any, dict], tuple[Any, dict]]:
+    """级联的决策逻辑，同步和异步版本共用。
+
+    依次产出要调用的模型名；调用方把 (结果, stats) send 回来，调用失败时把
+    异常 throw 进来。生成器结束时的返回值就是 (结果, run_stats)。
+    """
+    escalated = {}
+    if fast_model and fast_model != strong_model:
+        started = time.perf_counter()
+        try:
+            result, stats = yield fast_model
+            reason = "parse" if result is None else check(result)
+        except Exception as e:
+            if is_deadline_error(e):
+                raise
+            reason, stats = _failure_reason(e), {}
+        _observe("fast", started, reason)
+        if reason is None:
+            return result, {**stats, "cascade_fast_accepted": 1}
+        escalated = {"cascade_escalations": 1}
+    started = time.perf_counter()
+    result, stats = yield strong_model
+    if escalated:
+        _observe("strong", started)
+    return result, {**stats, **escalated}
+
+
+def invoke_cascade(
+    prompt: str,
+    *,
+    fast_model: str,
+    strong_model: str,
+    temperature: float,
+    schema: Type[T],
+    check: Check,
+    use_cache: bool,
+) -> tuple[T, dict]:
+    """级联调用结构化输出模型：先调用快速模型，不可信时再调用强模型。
+
+    以下情况升级到 strong_model：输出无法解析为 schema（parse）、调用失败（error）、
+    check 判定结果不可信（例如自相矛盾或自评置信度过低）。截止时间已到的失败
+    不升级，直接抛出。fast_model 为空或与 strong_model 相同时只调用强模型。
+
+    返回 (结果, run_stats)，run_stats 含 cascade_fast_accepted 或 cascade_escalations。
+    """
+    steps = _cascade_steps(fast_model, strong_model, check)
+    model = next(steps)
+    while True:
+        try:
+            outcome = invoke_structured(
+                get_structured_model(model, temperature, schema),
+                prompt,
+                model=model,
+                schema=schema,
+                use_cache=use_cache,
+            )
+        except Exception as e:
+            step = functools.partial(steps.throw, e)
+        else:
+            step = functools.partial(steps.send, outcome)
+        try:
+            model = step()
+        except StopIteration as done:
+            return done.value
+
+
+async def ainvoke_cascade(
+    prompt: str,
+    *,
+    fast_model: str,
+    strong_model: str,
+    temperature: float,
+    schema: Type[T],
+    check: Check,
+    use_cache: bool,
+) -> tuple[T, dict]:
+    """invoke_cascade 的异步版本。"""
+    steps = _cascade_steps(fast_model, strong_model, check)
+    model = next(steps)
+    while True:
+        try:
+            outcome = await ainvoke_structured(
+                get_structured_model(model, temperature, schema),
+                prompt,
+                model=model,
+                schema=schema,
+                use_cache=use_cache,
+            )
+        except Exception as e:
+            step = functools.partial(steps.throw, e)
+        else:
+            step = functools.partial(steps.send, outcome)
+        try:
+            model = step()
+        except StopIteration as done:
+            return done.value
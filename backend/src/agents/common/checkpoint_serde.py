@@ -0,0 +1,186 @@
+"""检查点的 zstd 压缩序列化器。
+
+langgraph-api 内置的检查点（langgraph dev 的内存存储、部署时的 Postgres）
+只接受 langgraph.json 中 checkpointer.serde 的 allowed_json_modules 和
+pickle_fallback 两个选项，不能换成自定义序列化器，所以默认部署下这里的
+压缩不生效。要启用压缩，需要用 create_checkpointer 替换内置检查点：
+
+    "checkpointer": {"path": "./src/agents/common/checkpoint_serde.py:create_checkpointer"}
+
+并设置 CHECKPOINT_POSTGRES_URI（需要安装 langgraph-checkpoint-postgres），
+检查点写入该库中 AsyncPostgresSaver 的表。请使用单独的库或 schema，不要
+指向 langgraph-api 自己的 POSTGRES_URI。替换后，之前由内置检查点保存的线程
+不会迁移过来；已经在用 AsyncPostgresSaver 的库可以直接切换，未压缩的检查点
+原样交给内层的 JsonPlusSerializer 读取（包括 pickle 回退写入的数据）。
+"""
+
+import argparse
+import os
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Iterable, Iterator, Optional
+
+import zstandard
+from langgraph.checkpoint.base import BaseCheckpointSaver
+from langgraph.checkpoint.memory import InMemorySaver
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from agents.common.blob_store import decode_json
+
+# 压缩后的类型标记为 "zstd:<内层类型>"，没有这个前缀的数据原样交给内层序列化器，
+# 所以启用压缩之前写入的检查点照常可读
+ZSTD_TYPE_PREFIX = "zstd:"
+
+
+class CompressedSerializer(SerializerProtocol):
+    """在默认序列化器外层套一层 zstd 压缩的检查点序列化器。
+
+    小于 min_size 字节的数据不压缩（压缩收益抵不过 CPU 开销），压缩后
+    没有变小的数据也保留原文。提供字典时使用字典压缩，字典 ID 写在 zstd
+    帧头里，解压时按帧头选择字典；更换字典后请把旧字典放进 extra_dictionaries，
+    否则用旧字典压缩的检查点无法读取。
+    """
+
+    def __init__(
+        self,
+        inner: Optional[SerializerProtocol] = None,
+        level: int = 3,
+        min_size: int = 1024,
+        dictionary: Optional[zstandard.ZstdCompressionDict] = None,
+        extra_dictionaries: Iterable[zstandard.ZstdCompressionDict] = (),
+    ):
+        # 与 langgraph-api 默认的序列化器一致，允许 pickle 回退，读得出它写入的检查点
+        self.inner = inner or JsonPlusSerializer(pickle_fallback=True)
+        self.level = level
+        self.min_size = min_size
+        self.dictionary = dictionary
+        self._dictionaries = {
+            d.dict_id(): d for d in (*extra_dictionaries, dictionary) if d is not None
+        }
+        # ZstdCompressor / ZstdDecompressor 不能在线程间共享
+        self._local = threading.local()
+
+    def _compressor(self) -> zstandard.ZstdCompressor:
+        compressor = getattr(self._local, "compressor", None)
+        if compressor is None:
+            compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self.dictionary)
+            self._local.compressor = compressor
+        return compressor
+
+    def _decompressor(self, dict_id: int) -> zstandard.ZstdDecompressor:
+        decompressors = getattr(self._local, "decompressors", None)
+        if decompressors is None:
+            decompressors = self._local.decompressors = {}
+        decompressor = decompressors.get(dict_id)
+        if decompressor is None:
+            if dict_id and dict_id not in self._dictionaries:
+                raise ValueError(f"checkpoint was compressed with unknown zstd dictionary {dict_id}")
+            decompressor = zstandard.ZstdDecompressor(dict_data=self._dictionaries.get(dict_id))
+            decompressors[dict_id] = decompressor
+        return decompressor
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, data = self.inner.dumps_typed(obj)
+        if len(data) < self.min_size:
+            return type_, data
+        compressed = self._compressor().compress(data)
+        if len(compressed) >= len(data):
+            return type_, data
+        return ZSTD_TYPE_PREFIX + type_, compressed
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if not type_.startswith(ZSTD_TYPE_PREFIX):
+            return self.inner.loads_typed(data)
+        dict_id = zstandard.get_frame_parameters(payload).dict_id
+        return self.inner.loads_typed(
+            (type_[len(ZSTD_TYPE_PREFIX):], self._decompressor(dict_id).decompress(payload))
+        )
+
+
+def load_dictionary(path: str) -> zstandard.ZstdCompressionDict:
+    return zstandard.ZstdCompressionDict(Path(path).read_bytes())
+
+
+def train_dictionary(samples: Iterable[str], dict_size: int = 64 * 1024) -> bytes:
+    """用样本文本（搜索摘要、标题、压缩摘要等）训练 zstd 字典，返回字典内容。"""
+    encoded = [s.encode("utf-8") for s in samples if s]
+    return zstandard.train_dictionary(dict_size, encoded).as_bytes()
+
+
+def blob_store_corpus(root: str) -> Iterator[str]:
+    """从本地 blob 存储目录（见 blob_store.FileBlobStore）中取出来源的标题和摘要。"""
+    for path in Path(root).glob("*/*"):
+        if path.suffix == ".tmp":
+            continue
+        try:
+            segment = decode_json(path.read_bytes())
+        except (OSError, ValueError):
+            continue
+        for item in segment.get("items", []) if isinstance(segment, dict) else []:
+            for key in ("title", "snippet", "digest"):
+                value = item.get(key) if isinstance(item, dict) else None
+                if value:
+                    yield value
+
+
+_serializer: Optional[CompressedSerializer] = None
+_serializer_lock = threading.Lock()
+
+
+def get_checkpoint_serializer() -> CompressedSerializer:
+    """返回进程共享的压缩序列化器，传给检查点的 serde 参数。
+
+    CHECKPOINT_ZSTD_LEVEL（默认 3）、CHECKPOINT_ZSTD_MIN_BYTES（默认 1024）
+    控制压缩级别和阈值；CHECKPOINT_ZSTD_DICT 指向训练好的字典文件，
+    CHECKPOINT_ZSTD_EXTRA_DICTS 为以逗号分隔的旧字典文件，只用于解压。
+    """
+    global _serializer
+    if _serializer is None:
+        with _serializer_lock:
+            if _serializer is None:
+                dict_path = os.getenv("CHECKPOINT_ZSTD_DICT")
+                extra = os.getenv("CHECKPOINT_ZSTD_EXTRA_DICTS", "")
+                _serializer = CompressedSerializer(
+                    level=int(os.getenv("CHECKPOINT_ZSTD_LEVEL", "3")),
+                    min_size=int(os.getenv("CHECKPOINT_ZSTD_MIN_BYTES", "1024")),
+                    dictionary=load_dictionary(dict_path) if dict_path else None,
+                    extra_dictionaries=[load_dictionary(p) for p in extra.split(",") if p],
+                )
+    return _serializer
+
+
+@asynccontextmanager
+async def create_checkpointer() -> AsyncIterator[BaseCheckpointSaver]:
+    """使用压缩序列化器的检查点，供 langgraph.json 的 checkpointer.path 引用。
+
+    设置了 CHECKPOINT_POSTGRES_URI 时使用 AsyncPostgresSaver（首次使用时建表），
+    否则使用进程内的 InMemorySaver，只适合本地试用。
+    """
+    serde = get_checkpoint_serializer()
+    uri = os.getenv("CHECKPOINT_POSTGRES_URI")
+    if not uri:
+        yield InMemorySaver(serde=serde)
+        return
+    from langgraph.checkpoint.postgres.aio import AsyncPostgresSaver
+
+    async with AsyncPostgresSaver.from_conn_string(uri, serde=serde) as saver:
+        await saver.setup()
+        yield saver
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="从 blob 存储中的搜索摘要训练检查点压缩字典")
+    parser.add_argument("blob_store", help="FileBlobStore 根目录")
+    parser.add_argument("output", help="字典输出路径，供 CHECKPOINT_ZSTD_DICT 使用")
+    parser.add_argument("--dict-size", type=int, default=64 * 1024)
+    args = parser.parse_args()
+    samples = list(blob_store_corpus(args.blob_store))
+    Path(args.output).write_bytes(train_dictionary(samples, args.dict_size))
+    print(f"trained on {len(samples)} samples -> {args.output}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+import httpx
+
+# 为最终答案预留的时间占整个预算的比例：剩余时间不足"一轮研究 + 预留"时不再开始新一轮
+ANSWER_RESERVE_FRACTION = 0.2
+
+# 截止时间以 time.time() 表示（而不是 monotonic），这样存进检查点后换一个进程恢复仍然有效
+_deadline: ContextVar[Optional[float]] = ContextVar("agent_deadline", default=None)
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """本次运行的时间预算已用完，请求没有发出（或因此被截断）。"""
+
+
+def start_deadline(seconds: float) -> Optional[float]:
+    """从现在开始计时的截止时间；seconds <= 0 表示不限时，返回 None。"""
+    return time.time() + seconds if seconds and seconds > 0 else None
+
+
+def remaining(deadline: Optional[float] = None) -> Optional[float]:
+    """距离截止时间还剩多少秒（可能为负）；不限时返回 None。
+
+    不传 deadline 时使用当前 deadline_scope 设置的截止时间。
+    """
+    if deadline is None:
+        deadline = _deadline.get()
+    return None if deadline is None else deadline - time.time()
+
+
+def expired(deadline: Optional[float] = None) -> bool:
+    left = remaining(deadline)
+    return left is not None and left <= 0
+
+
+@contextmanager
+def deadline_scope(deadline: Optional[float], floor: float = 0.0) -> Iterator[None]:
+    """在节点内设置截止时间，期间经由 httpx 发出的上游请求超时不超过剩余时间。
+
+    floor 为至少保证的时间，用于无论如何都要执行完的步骤（例如生成最终答案）。
+    节点内创建的后台任务会继承调用时的截止时间。
+    """
+    if deadline is not None and floor > 0:
+        deadline = max(deadline, time.time() + floor)
+    token = _deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def cap_request_timeout(request: httpx.Request) -> bool:
+    """把请求的各项超时收紧到剩余时间以内，返回超时是否因此被缩短。
+
+    剩余时间已用完时直接抛出 DeadlineExceeded，不再发出请求。
+    """
+    left = remaining()
+    if left is None:
+        return False
+    if left <= 0:
+        raise DeadlineExceeded("run deadline exceeded", request=request)
+    timeout = dict(request.extensions.get("timeout") or {})
+    capped = False
+    for key in ("connect", "read", "write", "pool"):
+        if timeout.get(key) is None or timeout[key] > left:
+            timeout[key] = left
+            capped = True
+    request.extensions["timeout"] = timeout
+    return capped
+
+
+def is_deadline_error(exc: BaseException) -> bool:
+    """异常（或其 __cause__/__context__ 链上的异常）是否由截止时间引起。
+
+    OpenAI SDK 和 SearchClient 会把 httpx 异常包装一层，所以要沿着链查找。
+    """
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        if isinstance(exc, DeadlineExceeded):
+            return True
+        seen.add(id(exc))
+        exc = exc.__cause__ or exc.__context__
+    return False
+
+
+def extend_deadline(deadline: Optional[float], paused_at: Optional[float]) -> Optional[float]:
+    """把从 paused_at 到现在的时间（例如等待用户批准）加回截止时间。"""
+    if deadline is None or paused_at is None:
+        return deadline
+    return deadline + max(0.0, time.time() - paused_at)
+
+
+def can_start_loop(deadline: Optional[float], budget: float, loops_done: int) -> bool:
+    """估计再做一轮研究能否在截止时间前完成，并留出生成答案的时间。
+
+    一轮的耗时按已完成各轮的平均值估计（第一轮包含查询生成，估计偏保守）。
+    """
+    left = remaining(deadline)
+    if left is None:
+        return True
+    per_loop = (budget - left) / max(loops_done, 1)
+    return left >= per_loop + budget * ANSWER_RESERVE_FRACTION
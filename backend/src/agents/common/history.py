@@ -0,0 +1,131 @@
+import logging
+from typing import Awaitable, Callable, List, Optional, TypedDict
+
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+
+from agents.common.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# 滚动摘要最多占用的历史 token 比例，其余留给原样保留的最近几轮
+HISTORY_SUMMARY_FRACTION = 0.25
+# 需要摘要时，把原样保留部分压到上限的这个比例以下，后面几轮对话可以继续
+# 原样追加，不必每轮都重新摘要
+HISTORY_REFILL_FRACTION = 0.5
+
+# summarize(上一版摘要, 需要并入摘要的对话行, token 上限) -> 新摘要
+Summarize = Callable[[str, List[str], int], Awaitable[str]]
+
+
+class HistorySummary(TypedDict):
+    """线程状态中保存的滚动摘要，覆盖 messages[:upto]。"""
+
+    upto: int
+    # messages[upto - 1] 的 id，用于发现历史被改写后摘要失效
+    last_id: Optional[str]
+    text: str
+    tokens: int
+
+
+def render_message(message: AnyMessage) -> str:
+    if isinstance(message, HumanMessage):
+        return f"User: {message.content}\n"
+    if isinstance(message, AIMessage):
+        return f"Assistant: {message.content}\n"
+    return ""
+
+
+def _summary_valid(messages: List[AnyMessage], summary: Optional[HistorySummary]) -> bool:
+    if not summary or not summary["upto"]:
+        return False
+    upto = summary["upto"]
+    return upto <= len(messages) and messages[upto - 1].id == summary["last_id"]
+
+
+def _tail_start(messages: List[AnyMessage], start: int, budget: int) -> int:
+    """从末尾往前累加，返回 token 数不超过 budget 的最长后缀的起点（不早于 start）。
+
+    最后一条消息总是保留。只遍历保留下来的部分，和历史总长无关。
+    """
+    used = 0
+    index = len(messages)
+    while index > start:
+        tokens = estimate_tokens(render_message(messages[index - 1]))
+        if used + tokens > budget and index < len(messages):
+            break
+        used += tokens
+        index -= 1
+    return index
+
+
+def render_history(messages: List[AnyMessage], summary: Optional[HistorySummary]) -> str:
+    """把滚动摘要和 messages[upto:] 拼成研究主题。
+
+    只有一条消息且没有摘要时直接返回其内容。同一轮中各节点得到完全相同的字符串，
+    提示词前缀可以命中 DeepSeek 的上下文缓存。
+    """
+    if not _summary_valid(messages, summary):
+        if len(messages) == 1:
+            return messages[-1].content
+        return "".join(render_message(message) for message in messages)
+    tail = "".join(render_message(message) for message in messages[summary["upto"]:])
+    if not summary["text"]:
+        return tail
+    return f"Earlier conversation (summary): {summary['text']}\n" + tail
+
+
+async def update_history_summary(
+    messages: List[AnyMessage],
+    summary: Optional[HistorySummary],
+    max_tokens: int,
+    summarize: Summarize,
+) -> tuple[Optional[HistorySummary], dict]:
+    """在每轮对话开始时维护滚动摘要，使研究主题不超过 max_tokens。
+
+    摘要覆盖的部分加上剩余消息仍在上限内时原样返回 summary，不调用模型；
+    超出时把较早的消息（连同上一版摘要）交给 summarize 合并为新摘要，
+    最近几轮保持原样。摘要失败时丢弃较早的消息并保留上一版摘要。
+
+    返回 (新摘要, run_stats)。
+    """
+    if max_tokens <= 0 or not messages:
+        return summary, {}
+    if not _summary_valid(messages, summary):
+        summary = None
+    upto = summary["upto"] if summary else 0
+    summary_tokens = summary["tokens"] if summary else 0
+
+    # 后缀一旦超过上限就停止累加，代价和上限成正比而不是和历史长度成正比
+    tail = _tail_start(messages, upto, max_tokens - summary_tokens)
+    if tail == upto:
+        return summary, {"history_tokens": summary_tokens + _tokens(messages, upto)}
+
+    summary_budget = int(max_tokens * HISTORY_SUMMARY_FRACTION)
+    tail = max(
+        _tail_start(messages, upto, int(max_tokens * HISTORY_REFILL_FRACTION)),
+        upto + 1,
+    )
+    folded = [render_message(message) for message in messages[upto:tail]]
+    previous = summary["text"] if summary else ""
+    try:
+        text = await summarize(previous, folded, summary_budget)
+    except Exception:
+        # 包括截止时间已到：保留上一版摘要，这次该并入摘要的消息直接丢弃
+        logger.exception("History summarization failed; dropping %d older messages", len(folded))
+        text = previous
+    new_summary: HistorySummary = {
+        "upto": tail,
+        "last_id": messages[tail - 1].id,
+        "text": text,
+        "tokens": estimate_tokens(text),
+    }
+    stats = {
+        "history_summaries": 1,
+        "history_messages_folded": len(folded),
+        "history_tokens": new_summary["tokens"] + _tokens(messages, tail),
+    }
+    return new_summary, stats
+
+
+def _tokens(messages: List[AnyMessage], start: int) -> int:
+    return sum(estimate_tokens(render_message(message)) for message in messages[start:])
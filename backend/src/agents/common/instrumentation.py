@@ -0,0 +1,178 @@
+import functools
+import inspect
+import time
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+from langgraph.errors import GraphBubbleUp
+
+from agents.common.metrics import (
+    LLM_TOKENS,
+    NODE_DURATION,
+    NODE_ERRORS,
+    NODE_RESULTS,
+    PROMPT_CACHE_HIT_RATIO,
+    labelled,
+)
+
+
+class NodeScope:
+    """当前正在执行的节点，供限流器、搜索客户端和回调打标签。"""
+
+    __slots__ = ("graph", "node", "model", "prompt_cache_hit", "prompt_cache_miss")
+
+    def __init__(self, graph: str, node: str):
+        self.graph = graph
+        self.node = node
+        self.model = ""
+        self.prompt_cache_hit = 0
+        self.prompt_cache_miss = 0
+
+
+_scope: ContextVar[Optional[NodeScope]] = ContextVar("agent_node_scope", default=None)
+
+
+def current_scope() -> Optional[NodeScope]:
+    """返回当前节点；在节点之外（例如脚本直接调用客户端）返回 None。
+
+    节点内创建的后台任务会继承调用时的 scope（例如 generate_query 的搜索预取）。
+    """
+    return _scope.get()
+
+
+def scope_labels() -> tuple[str, str]:
+    scope = _scope.get()
+    return (scope.graph, scope.node) if scope is not None else ("", "")
+
+
+def instrument_node(graph: str) -> Callable:
+    """节点装饰器：记录耗时和异常，并在执行期间设置 NodeScope。
+
+    开销只有两次计时、一次 contextvar 设置和一次直方图写入，可以常开。
+    中断（GraphBubbleUp）不计为异常。
+    """
+
+    def decorator(func: Callable) -> Callable:
+        node = func.__name__
+
+        def finish(scope: NodeScope, start: float) -> None:
+            labelled(NODE_DURATION, graph, node, scope.model).observe(
+                time.perf_counter() - start
+            )
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                scope = NodeScope(graph, node)
+                token = _scope.set(scope)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                except GraphBubbleUp:
+                    raise
+                except Exception:
+                    labelled(NODE_ERRORS, graph, node).inc()
+                    raise
+                finally:
+                    finish(scope, start)
+                    _scope.reset(token)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            scope = NodeScope(graph, node)
+            token = _scope.set(scope)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            except GraphBubbleUp:
+                raise
+            except Exception:
+                labelled(NODE_ERRORS, graph, node).inc()
+                raise
+            finally:
+                finish(scope, start)
+                _scope.reset(token)
+
+        return wrapper
+
+    return decorator
+
+
+def record_node(model: Optional[str] = None, results: Optional[int] = None) -> None:
+    """在节点内补充标签和结果数：model 用于耗时指标，results 为本次产出的条数。"""
+    scope = _scope.get()
+    if scope is None:
+        return
+    if model is not None:
+        scope.model = model
+    if results is not None:
+        labelled(NODE_RESULTS, scope.graph, scope.node).observe(results)
+
+
+def prompt_cache_stats() -> dict[str, int]:
+    """当前节点累计的 DeepSeek 上下文缓存命中/未命中 token，用于写入 run_stats。"""
+    scope = _scope.get()
+    if scope is None or not (scope.prompt_cache_hit or scope.prompt_cache_miss):
+        return {}
+    return {
+        f"{scope.node}_cache_hit_tokens": scope.prompt_cache_hit,
+        f"{scope.node}_cache_miss_tokens": scope.prompt_cache_miss,
+    }
+
+
+def _prompt_cache_tokens(token_usage: dict, usage: dict) -> Optional[tuple[int, int]]:
+    # DeepSeek 在 usage 中返回 prompt_cache_hit_tokens / prompt_cache_miss_tokens，
+    # 只在非流式响应的 llm_output 中保留；流式响应退回到 usage_metadata 的 cache_read
+    hit = token_usage.get("prompt_cache_hit_tokens")
+    if hit is None:
+        hit = (usage.get("input_token_details") or {}).get("cache_read")
+    if hit is None:
+        return None
+    miss = token_usage.get("prompt_cache_miss_tokens")
+    if miss is None:
+        miss = max(0, usage["input_tokens"] - hit)
+    return hit, miss
+
+
+class TokenUsageHandler(BaseCallbackHandler):
+    """把模型返回的 usage_metadata 计入 agent_llm_tokens_total。
+
+    注册在 llm_registry 创建的模型上，只处理 on_llm_end，并在调用线程中
+    直接执行（run_inline），以便读取当前节点的 scope。DeepSeek 返回上下文缓存
+    用量时同时记录命中率，并累计到当前节点（见 prompt_cache_stats）。
+    """
+
+    run_inline = True
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any) -> None:
+        scope = _scope.get()
+        graph, node = (scope.graph, scope.node) if scope is not None else ("", "")
+        token_usage = (response.llm_output or {}).get("token_usage") or {}
+        for generations in response.generations:
+            for generation in generations:
+                message = getattr(generation, "message", None)
+                usage = getattr(message, "usage_metadata", None)
+                if not usage:
+                    continue
+                model = message.response_metadata.get("model_name") or "unknown"
+                labelled(LLM_TOKENS, graph, node, model, "prompt").inc(usage["input_tokens"])
+                labelled(LLM_TOKENS, graph, node, model, "completion").inc(usage["output_tokens"])
+                cache = _prompt_cache_tokens(token_usage, usage)
+                if cache is None:
+                    continue
+                hit, miss = cache
+                labelled(LLM_TOKENS, graph, node, model, "prompt_cache_hit").inc(hit)
+                labelled(LLM_TOKENS, graph, node, model, "prompt_cache_miss").inc(miss)
+                if hit + miss:
+                    labelled(PROMPT_CACHE_HIT_RATIO, graph, node).observe(hit / (hit + miss))
+                if scope is not None:
+                    scope.prompt_cache_hit += hit
+                    scope.prompt_cache_miss += miss
+
+
+TOKEN_USAGE_HANDLER = TokenUsageHandler()
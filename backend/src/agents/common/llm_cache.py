@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T", bound=BaseModel)
+
+
+def make_cache_key(model: str, prompt: str, schema: Type[BaseModel]) -> str:
+    """由模型名、提示词哈希和 schema 定义生成缓存键。"""
+    schema_json = json.dumps(schema.model_json_schema(), sort_keys=True)
+    h = hashlib.sha256()
+    for part in (model, prompt, schema.__name__, schema_json):
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+class SQLiteLLMCache:
+    """基于本地 SQLite 文件的 LLM 结构化输出缓存。"""
+
+    def __init__(self, path: str, ttl: float = 86400):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + self.ttl),
+            )
+            self._conn.commit()
+
+    def evict_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE expires_at < ?", (time.time(),)
+            )
+            self._conn.commit()
+        return cursor.rowcount
+
+
+class PostgresLLMCache:
+    """基于 Postgres 的 LLM 结构化输出缓存（多个 worker 共享）。
+
+    需要安装 psycopg（psycopg 3）：pip install "agent[postgres]"。
+    """
+
+    def __init__(self, dsn: str, ttl: float = 86400):
+        try:
+            import psycopg
+        except ImportError as e:
+            raise ImportError(
+                'LLM_CACHE_URI points at Postgres but psycopg is not installed; '
+                'install it with: pip install "agent[postgres]"'
+            ) from e
+
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._conn = psycopg.connect(dsn, autocommit=True)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at DOUBLE PRECISION NOT NULL)"
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = %s", (key,)
+            ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO llm_cache (key, value, expires_at) VALUES (%s, %s, %s)"
+                " ON CONFLICT (key) DO UPDATE SET value = EXCLUDED.value,"
+                " expires_at = EXCLUDED.expires_at",
+                (key, value, time.time() + self.ttl),
+            )
+
+    def evict_expired(self) -> int:
+        with self._lock:
+            cursor = self._conn.execute(
+                "DELETE FROM llm_cache WHERE expires_at < %s", (time.time(),)
+            )
+        return cursor.rowcount
+
+
+class LLMResponseCache:
+    """按 (model, prompt, schema) 缓存解析后的结构化输出对象。"""
+
+    # 每写入多少次清理一次过期条目
+    EVICT_EVERY = 256
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._writes = 0
+
+    def get(self, model: str, prompt: str, schema: Type[T]) -> Optional[T]:
+        value = self.backend.get(make_cache_key(model, prompt, schema))
+        if value is None:
+            return None
+        return schema.model_validate_json(value)
+
+    def set(self, model: str, prompt: str, schema: Type[T], result: T) -> None:
+        self.backend.set(make_cache_key(model, prompt, schema), result.model_dump_json())
+        self._writes += 1
+        if self._writes % self.EVICT_EVERY == 0:
+            self.backend.evict_expired()
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """返回进程共享的 LLM 缓存。
+
+    LLM_CACHE_URI 为 postgres:// 或 postgresql:// 时使用 Postgres，
+    否则使用本地 SQLite 文件（默认 .llm_cache.sqlite3）。
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                uri = os.getenv("LLM_CACHE_URI", "sqlite:///.llm_cache.sqlite3")
+                ttl = float(os.getenv("LLM_CACHE_TTL", "86400"))
+                if uri.startswith(("postgres://", "postgresql://")):
+                    backend = PostgresLLMCache(uri, ttl=ttl)
+                else:
+                    backend = SQLiteLLMCache(uri.removeprefix("sqlite:///"), ttl=ttl)
+                _cache = LLMResponseCache(backend)
+    return _cache
+
+
+def invoke_structured(runnable, prompt: str, *, model: str, schema: Type[T], use_cache: bool):
+    """调用结构化输出 runnable，按需读写缓存。
+
+    返回 (result, stats)，stats 为本次调用的缓存计数，供节点合并到运行状态中。
+    """
+    if not use_cache:
+        return runnable.invoke(prompt), {}
+    cache = get_llm_cache()
+    result = cache.get(model, prompt, schema)
+    if result is not None:
+        return result, {"llm_cache_hits": 1}
+    result = runnable.invoke(prompt)
+    cache.set(model, prompt, schema, result)
+    return result, {"llm_cache_misses": 1}
+
+
+async def ainvoke_structured(runnable, prompt: str, *, model: str, schema: Type[T], use_cache: bool):
+    """invoke_structured 的异步版本；缓存读写放到线程中执行，不阻塞事件循环。"""
+    if not use_cache:
+        return await runnable.ainvoke(prompt), {}
+    cache = get_llm_cache()
+    result = await asyncio.to_thread(cache.get, model, prompt, schema)
+    if result is not None:
+        return result, {"llm_cache_hits": 1}
+    result = await runnable.ainvoke(prompt)
+    await asyncio.to_thread(cache.set, model, prompt, schema, result)
+    return result, {"llm_cache_misses": 1}
@@ -0,0 +1,249 @@
+import asyncio
+import logging
+import os
+import threading
+import weakref
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+from langchain_core.runnables import Runnable
+
+from agents.common.instrumentation import TOKEN_USAGE_HANDLER
+from agents.common.rate_limit import (
+    LimitedAsyncTransport,
+    LimitedTransport,
+    get_limiter,
+)
+from agents.common.resilience import (
+    ResilientAsyncTransport,
+    ResilientTransport,
+    get_retry_policy,
+    upstream_timeout,
+)
+
+if TYPE_CHECKING:
+    from langchain_deepseek import ChatDeepSeek
+
+logger = logging.getLogger(__name__)
+
+DEEPSEEK_API_BASE = "https://api.deepseek.com/v1"
+
+_lock = threading.Lock()
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_chat_model_class: Optional[type] = None
+_chat_models: dict[tuple[str, float], "ChatDeepSeek"] = {}
+_structured_models: dict[tuple[str, float, type], Runnable] = {}
+_tool_models: dict[tuple[str, float, type], Runnable] = {}
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=int(os.getenv("DEEPSEEK_MAX_CONNECTIONS", "100")),
+        max_keepalive_connections=20,
+        keepalive_expiry=60.0,
+    )
+
+
+def _timeout() -> httpx.Timeout:
+    return upstream_timeout("deepseek", connect=5.0, read=60.0)
+
+
+def _limiter():
+    return get_limiter("deepseek", max_concurrency=20)
+
+
+def _shared_http_client() -> httpx.Client:
+    """所有 ChatDeepSeek 实例共享的同步连接池。
+
+    请求经过 "deepseek" 限流器，并由 "deepseek" 重试策略负责退避重试和熔断；
+    SDK 自带的重试关闭（max_retries=0），否则两层重试会相乘。
+    """
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.Client(
+            timeout=_timeout(),
+            transport=ResilientTransport(
+                LimitedTransport(httpx.HTTPTransport(limits=_limits()), _limiter()),
+                get_retry_policy("deepseek"),
+            ),
+        )
+    return _http_client
+
+
+class _PerLoopTransport(httpx.AsyncBaseTransport):
+    """按事件循环各建一个连接池。
+
+    ChatDeepSeek 实例是进程级的，而异步连接绑定在创建它的事件循环上，
+    脚本中多次 asyncio.run 时不能复用上一个循环的连接。
+    """
+
+    def __init__(self):
+        self._transports: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        loop = asyncio.get_running_loop()
+        transport = self._transports.get(loop)
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(limits=_limits())
+            self._transports[loop] = transport
+        return await transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        transport = self._transports.pop(asyncio.get_running_loop(), None)
+        if transport is not None:
+            await transport.aclose()
+
+
+def _shared_async_http_client() -> httpx.AsyncClient:
+    """ainvoke 使用的异步客户端，与同步客户端共用同一个限流器和重试策略。"""
+    global _async_http_client
+    if _async_http_client is None:
+        _async_http_client = httpx.AsyncClient(
+            timeout=_timeout(),
+            transport=ResilientAsyncTransport(
+                LimitedAsyncTransport(_PerLoopTransport(), _limiter()),
+                get_retry_policy("deepseek"),
+            ),
+        )
+    return _async_http_client
+
+
+def _chat_class() -> type:
+    """按需导入 ChatDeepSeek。
+
+    langchain_deepseek 连带导入 openai SDK，约占图模块冷启动时间的一半，
+    因此推迟到第一次创建模型时才导入。
+    """
+    global _chat_model_class
+    if _chat_model_class is None:
+        from langchain_deepseek import ChatDeepSeek
+
+        _chat_model_class = ChatDeepSeek
+    return _chat_model_class
+
+
+async def ensure_chat_class() -> None:
+    """在异步节点中调用：首次导入放到线程中完成，避免阻塞事件循环。"""
+    if _chat_model_class is None:
+        await asyncio.to_thread(_chat_class)
+
+
+def _require_api_key() -> str:
+    api_key = os.getenv("DEEPSEEK_API_KEY")
+    if not api_key:
+        raise ValueError("DEEPSEEK_API_KEY is not set")
+    return api_key
+
+
+def get_chat_model(model: str, temperature: float) -> "ChatDeepSeek":
+    """返回 (model, temperature) 对应的进程级 ChatDeepSeek 实例。
+
+    第一次创建时才检查 DEEPSEEK_API_KEY，未设置时抛出 ValueError。
+    """
+    key = (model, temperature)
+    llm = _chat_models.get(key)
+    if llm is None:
+        with _lock:
+            llm = _chat_models.get(key)
+            if llm is None:
+                llm = _chat_class()(
+                    model=model,
+                    temperature=temperature,
+                    max_retries=0,
+                    api_key=_require_api_key(),
+                    http_client=_shared_http_client(),
+                    http_async_client=_shared_async_http_client(),
+                    # 流式调用也返回 usage，供 token 指标使用
+                    stream_usage=True,
+                    callbacks=[TOKEN_USAGE_HANDLER],
+                )
+                _chat_models[key] = llm
+    return llm
+
+
+def get_structured_model(model: str, temperature: float, schema: type) -> Runnable:
+    """返回 (model, temperature, schema) 对应的结构化输出 runnable。
+
+    with_structured_output 需要把 pydantic schema 转换成工具定义，缓存后
+    每次运行只需直接 invoke。
+    """
+    key = (model, temperature, schema)
+    runnable = _structured_models.get(key)
+    if runnable is None:
+        llm = get_chat_model(model, temperature)
+        with _lock:
+            runnable = _structured_models.get(key)
+            if runnable is None:
+                runnable = llm.with_structured_output(schema)
+                _structured_models[key] = runnable
+    return runnable
+
+
+def get_tool_model(model: str, temperature: float, schema: type) -> Runnable:
+    """返回强制调用 schema 工具的 ChatDeepSeek runnable。
+
+    与 get_structured_model 不同，输出不经过解析器，调用方可以流式读取
+    tool_call_chunks 中的参数片段并自行增量解析。
+    """
+    key = (model, temperature, schema)
+    runnable = _tool_models.get(key)
+    if runnable is None:
+        llm = get_chat_model(model, temperature)
+        with _lock:
+            runnable = _tool_models.get(key)
+            if runnable is None:
+                runnable = llm.bind_tools([schema], tool_choice=schema.__name__)
+                _tool_models[key] = runnable
+    return runnable
+
+
+def _prewarm_request(api_base: Optional[str]) -> tuple[str, dict[str, str]]:
+    api_base = api_base or os.getenv("DEEPSEEK_API_BASE", DEEPSEEK_API_BASE)
+    api_key = os.getenv("DEEPSEEK_API_KEY")
+    # 空的 "Bearer " 不是合法的头部值，没有密钥时只建立连接
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+    return f"{api_base.rstrip('/')}/models", headers
+
+
+def prewarm_connections(api_base: Optional[str] = None) -> None:
+    """预先导入 ChatDeepSeek 并建立到 DeepSeek 的 TLS 连接，放入同步连接池。
+
+    只覆盖同步调用（reflection、finalize_answer 等走 invoke 的节点）；
+    异步节点使用按事件循环划分的连接池，需要在服务循环上调用
+    aprewarm_connections。失败时只记录日志，真正的请求会照常重试建立连接。
+    """
+    _chat_class()
+    url, headers = _prewarm_request(api_base)
+    try:
+        _shared_http_client().get(url, headers=headers)
+    except httpx.HTTPError as e:
+        logger.warning("DeepSeek connection pre-warm failed: %r", e)
+
+
+async def aprewarm_connections(api_base: Optional[str] = None) -> None:
+    """在当前事件循环上建立到 DeepSeek 的 TLS 连接，放入该循环的异步连接池。
+
+    generate_query 等异步节点走 _PerLoopTransport，连接只能在服务请求的
+    循环上建立，因此需要在该循环上 await（例如 HTTP 应用的 lifespan 中）。
+    """
+    await ensure_chat_class()
+    url, headers = _prewarm_request(api_base)
+    try:
+        await _shared_async_http_client().get(url, headers=headers)
+    except httpx.HTTPError as e:
+        logger.warning("DeepSeek async connection pre-warm failed: %r", e)
+
+
+def reset_registry() -> None:
+    """清空已缓存的模型和连接池（环境变量或 API 地址变化后调用）。"""
+    global _http_client, _async_http_client
+    with _lock:
+        _chat_models.clear()
+        _structured_models.clear()
+        _tool_models.clear()
+        if _http_client is not None:
+            _http_client.close()
+        _http_client = None
+        # 异步连接池绑定在各自的事件循环上，随循环一起回收
+        _async_http_client = None
@@ -0,0 +1,152 @@
+import functools
+
+from prometheus_client import Counter, Gauge, Histogram
+
+# 排队等待时间与上游耗时分开统计，便于区分"限流排队"和"上游变慢"
+UPSTREAM_QUEUE_WAIT = Histogram(
+    "agent_upstream_queue_wait_seconds",
+    "请求在限流器中等待并发槽位和令牌的时间",
+    ["upstream"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+UPSTREAM_LATENCY = Histogram(
+    "agent_upstream_request_seconds",
+    "拿到槽位之后上游返回响应头的耗时",
+    ["upstream"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+UPSTREAM_IN_FLIGHT = Gauge(
+    "agent_upstream_in_flight",
+    "正在进行中的上游请求数",
+    ["upstream"],
+)
+UPSTREAM_QUEUED = Gauge(
+    "agent_upstream_queued",
+    "在限流器中排队的请求数",
+    ["upstream"],
+)
+UPSTREAM_REQUESTS = Counter(
+    "agent_upstream_requests_total",
+    "发往上游的请求数（含重试）",
+    ["upstream"],
+)
+UPSTREAM_RETRIES = Counter(
+    "agent_upstream_retries_total",
+    "上游请求重试次数，reason 为 error（传输层错误/超时）或 status（429/5xx）",
+    ["upstream", "reason"],
+)
+UPSTREAM_RETRIES_DENIED = Counter(
+    "agent_upstream_retries_denied_total",
+    "因重试预算耗尽而放弃的重试次数",
+    ["upstream"],
+)
+UPSTREAM_CIRCUIT_STATE = Gauge(
+    "agent_upstream_circuit_state",
+    "上游熔断器状态：0 关闭，1 打开，2 半开",
+    ["upstream"],
+)
+UPSTREAM_REJECTED = Counter(
+    "agent_upstream_rejected_total",
+    "熔断打开期间直接失败、没有发出的请求数",
+    ["upstream"],
+)
+
+# 节点级指标，graph 为 research_agent / diagnostic_agent
+NODE_DURATION = Histogram(
+    "agent_node_duration_seconds",
+    "节点执行耗时",
+    ["graph", "node", "model"],
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120),
+)
+NODE_ERRORS = Counter(
+    "agent_node_errors_total",
+    "节点抛出异常的次数（不含 interrupt）",
+    ["graph", "node"],
+)
+NODE_RESULTS = Histogram(
+    "agent_node_results",
+    "节点产出的结果数（查询数、来源数、后续查询数、引用数）",
+    ["graph", "node"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+NODE_QUEUE_WAIT = Counter(
+    "agent_node_queue_wait_seconds_total",
+    "节点内请求在上游限流器中等待的总时间",
+    ["graph", "node", "upstream"],
+)
+LLM_TOKENS = Counter(
+    "agent_llm_tokens_total",
+    "DeepSeek 返回的 token 用量，type 为 prompt/completion/prompt_cache_hit/prompt_cache_miss",
+    ["graph", "node", "model", "type"],
+)
+DEADLINE_STOPS = Counter(
+    "agent_deadline_stops_total",
+    "剩余时间不足以再做一轮研究、提前生成答案的次数",
+    ["graph"],
+)
+DEADLINE_CUTOFFS = Counter(
+    "agent_deadline_cutoffs_total",
+    "因运行截止时间被截断的节点调用（搜索、反思、答案生成）",
+    ["graph", "node"],
+)
+CASCADE_CALLS = Counter(
+    "agent_cascade_calls_total",
+    "级联模式下各层模型的调用次数，tier 为 fast 或 strong",
+    ["graph", "node", "tier"],
+)
+CASCADE_ESCALATIONS = Counter(
+    "agent_cascade_escalations_total",
+    "快速模型的结果被拒绝、升级到强模型的次数，reason 为 parse/error/inconsistent/low_confidence",
+    ["graph", "node", "reason"],
+)
+CASCADE_TIER_SECONDS = Histogram(
+    "agent_cascade_tier_seconds",
+    "级联模式下各层模型调用的耗时",
+    ["graph", "node", "tier"],
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+REFLECTION_NOVELTY = Histogram(
+    "agent_reflection_novelty",
+    "每轮研究新增内容的比例（字符三元组），低于 novelty_threshold 时跳过反思调用",
+    ["graph"],
+    buckets=(0, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1),
+)
+REFLECTION_SKIPS = Counter(
+    "agent_reflection_skips_total",
+    "因新内容太少而跳过反思 LLM 调用、直接生成答案的次数",
+    ["graph"],
+)
+PROMPT_CACHE_HIT_RATIO = Histogram(
+    "agent_llm_prompt_cache_hit_ratio",
+    "每次调用的提示词中命中 DeepSeek 上下文缓存的 token 比例",
+    ["graph", "node"],
+    buckets=(0, 0.1, 0.25, 0.5, 0.75, 0.9, 0.95, 1),
+)
+SEARCH_RESPONSE_BYTES = Histogram(
+    "agent_search_response_bytes",
+    "searchapi.io 响应体大小",
+    ["graph"],
+    buckets=(1_000, 5_000, 10_000, 25_000, 50_000, 100_000, 250_000, 1_000_000),
+)
+SEARCH_CACHE_EVENTS = Counter(
+    "agent_search_cache_events_total",
+    "搜索缓存事件：hits/redis_hits/misses/coalesced/evictions/expirations/redis_errors/redis_corrupt",
+    ["event"],
+)
+
+SEARCH_HEDGES = Counter(
+    "agent_search_hedges_total",
+    "主引擎超过对冲延迟未返回、额外发出的备用引擎请求数",
+    ["engine"],
+)
+SEARCH_PROVIDER_WINS = Counter(
+    "agent_search_provider_wins_total",
+    "对冲搜索中最先成功返回的引擎",
+    ["engine"],
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def labelled(metric, *labels: str):
+    """缓存 metric.labels(...) 的子指标；labels() 每次都要加锁查表，热路径上用这个。"""
+    return metric.labels(*labels)
@@ -0,0 +1,107 @@
+import re
+from collections import Counter, deque
+from typing import Iterator, Sequence
+
+
+class AhoCorasick:
+    """Aho-Corasick 多模式匹配自动机。
+
+    一次构建，之后对任意文本单次扫描即可找出所有模式，复杂度与
+    文本长度加匹配数成正比，而不是 文本长度 x 模式数。
+    匹配采用 leftmost-longest、互不重叠的语义，与逐个 str.replace 的
+    结果一致，同时避免一个模式是另一个模式前缀时的误判。
+    """
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        # 每个状态上以该状态结尾的最长模式下标（-1 表示没有）
+        self._out: list[int] = [-1]
+        # 沿失败链能到达的下一个有输出的状态
+        self._dict_link: list[int] = [0]
+
+        for idx, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for ch in pattern:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append(-1)
+                    self._dict_link.append(0)
+                state = nxt
+            if self._out[state] == -1:
+                self._out[state] = idx
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                fail = self._goto[f].get(ch, 0)
+                self._fail[nxt] = fail if fail != nxt else 0
+                self._dict_link[nxt] = (
+                    fail if self._out[fail] != -1 else self._dict_link[fail]
+                )
+
+        # 处于根状态时，用正则直接跳到下一个可能开始匹配的字符
+        first_chars = "".join(re.escape(ch) for ch in self._goto[0])
+        self._skip = re.compile(f"[{first_chars}]") if first_chars else None
+
+    def _iter_all(self, text: str) -> Iterator[tuple[int, int, int]]:
+        """按结束位置顺序产出所有（可能重叠的）匹配 (start, end, index)。"""
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        patterns = self.patterns
+        state = 0
+        i, n = 0, len(text)
+        while i < n:
+            if state == 0 and self._skip is not None:
+                m = self._skip.search(text, i)
+                if m is None:
+                    return
+                i = m.start()
+            ch = text[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            i += 1
+            s = state if out[state] != -1 else dict_link[state]
+            while s:
+                idx = out[s]
+                yield i - len(patterns[idx]), i, idx
+                s = dict_link[s]
+
+    def finditer(self, text: str) -> list[tuple[int, int, int]]:
+        """返回 leftmost-longest、互不重叠的匹配列表 (start, end, index)。"""
+        matches = sorted(self._iter_all(text), key=lambda m: (m[0], -m[1]))
+        selected = []
+        last_end = 0
+        for start, end, idx in matches:
+            if start >= last_end:
+                selected.append((start, end, idx))
+                last_end = end
+        return selected
+
+    def replace(self, text: str, replacements: Sequence[str]) -> tuple[str, Counter]:
+        """单次扫描把第 i 个模式替换为 replacements[i]。
+
+        返回替换后的文本和每个模式下标的命中次数。
+        """
+        parts = []
+        counts: Counter = Counter()
+        last = 0
+        for start, end, idx in self.finditer(text):
+            parts.append(text[last:start])
+            parts.append(replacements[idx])
+            counts[idx] += 1
+            last = end
+        parts.append(text[last:])
+        return "".join(parts), counts
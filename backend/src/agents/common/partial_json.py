@@ -0,0 +1,79 @@
+import json
+from typing import Any
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+def _skip(buffer: str, pos: int, chars: str = _WHITESPACE) -> int:
+    while pos < len(buffer) and buffer[pos] in chars:
+        pos += 1
+    return pos
+
+
+def complete_array_items(buffer: str, key: str) -> list[Any]:
+    """从不完整的 JSON 对象文本中取出顶层 key 数组里已经完整的元素。
+
+    只解析顶层对象：其他键的值必须完整才能跳过，遇到不完整的部分就停止，
+    等待更多数据。元素本身用 json 标准库解析，转义和 Unicode 都按规范处理。
+    """
+    pos = _skip(buffer, 0)
+    if pos >= len(buffer) or buffer[pos] != "{":
+        return []
+    pos += 1
+    while True:
+        pos = _skip(buffer, pos, _WHITESPACE + ",")
+        if pos >= len(buffer) or buffer[pos] != '"':
+            return []
+        try:
+            name, pos = json.decoder.scanstring(buffer, pos + 1)
+        except json.JSONDecodeError:
+            return []
+        pos = _skip(buffer, pos)
+        if pos >= len(buffer) or buffer[pos] != ":":
+            return []
+        pos = _skip(buffer, pos + 1)
+        if name == key:
+            return _array_prefix(buffer, pos)
+        try:
+            _, pos = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            return []
+
+
+def _array_prefix(buffer: str, pos: int) -> list[Any]:
+    items: list[Any] = []
+    if pos >= len(buffer) or buffer[pos] != "[":
+        return items
+    pos += 1
+    while True:
+        pos = _skip(buffer, pos, _WHITESPACE + ",")
+        if pos >= len(buffer) or buffer[pos] == "]":
+            return items
+        try:
+            item, end = _decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            return items
+        if end >= len(buffer) and not isinstance(item, (str, list, dict)):
+            # 数字、true 等标量在缓冲区末尾时可能还没写完
+            return items
+        items.append(item)
+        pos = end
+
+
+class ArrayItemStream:
+    """增量解析流式工具调用参数，逐个返回 key 数组中新完成的元素。"""
+
+    def __init__(self, key: str):
+        self.key = key
+        self.buffer = ""
+        self._emitted = 0
+
+    def feed(self, chunk: str) -> list[Any]:
+        if not chunk:
+            return []
+        self.buffer += chunk
+        items = complete_array_items(self.buffer, self.key)
+        new = items[self._emitted :]
+        self._emitted = len(items)
+        return new
@@ -0,0 +1,381 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Optional
+
+import httpx
+from langchain_core.runnables.config import var_child_runnable_config
+
+from agents.common.deadline import DeadlineExceeded, remaining
+from agents.common.instrumentation import scope_labels
+from agents.common.metrics import (
+    NODE_QUEUE_WAIT,
+    UPSTREAM_IN_FLIGHT,
+    UPSTREAM_LATENCY,
+    UPSTREAM_QUEUE_WAIT,
+    UPSTREAM_QUEUED,
+    UPSTREAM_REQUESTS,
+    labelled,
+)
+
+DEFAULT_FAIRNESS_KEY = "default"
+
+
+class TokenBucket:
+    """线程安全的令牌桶，rate <= 0 表示不限速。
+
+    采用预约方式：reserve() 立即扣除一个令牌（余额可以为负）并返回调用方
+    需要等待的秒数。调用方自行休眠，不需要后台定时器，因此多个线程和
+    事件循环可以共享同一个桶。等待超过 max_wait 时不扣令牌、返回 None；
+    休眠被取消的调用方用 refund() 归还令牌，不让后面的请求背上这笔欠账。
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst else max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait: Optional[float] = None) -> Optional[float]:
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(
+                self.burst, self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            delay = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if max_wait is not None and delay > max_wait:
+                return None
+            self._tokens -= 1
+            return delay
+
+    def refund(self) -> None:
+        if self.rate <= 0:
+            return
+        with self._lock:
+            self._tokens = min(self.burst, self._tokens + 1)
+
+
+class _Waiter:
+    __slots__ = ("key", "granted", "event", "future", "loop")
+
+    def __init__(self, key: str, loop: Optional[asyncio.AbstractEventLoop] = None):
+        self.key = key
+        self.granted = False
+        self.loop = loop
+        if loop is None:
+            self.event = threading.Event()
+            self.future = None
+        else:
+            self.event = None
+            self.future = loop.create_future()
+
+
+def _resolve_future(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class UpstreamLimiter:
+    """单个上游服务的并发上限 + 令牌桶限速。
+
+    等待并发槽位的请求按 key（线程/运行 ID）分队列，槽位释放时在各队列
+    之间轮转分配，一个扇出几十个分支的运行不会饿死其他运行。同一个限流器
+    同时服务同步调用（在线程池中执行的节点）和异步调用（任意事件循环）。
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 0,
+        rate: float = 0.0,
+        burst: Optional[float] = None,
+    ):
+        self.name = name
+        # max_concurrency <= 0 表示不限制并发
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate, burst)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._queued = 0
+        self._queues: OrderedDict[str, deque[_Waiter]] = OrderedDict()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        return self._queued
+
+    def _admit_or_enqueue(self, waiter: _Waiter) -> bool:
+        with self._lock:
+            if not self._queued and (
+                self.max_concurrency <= 0 or self._in_flight < self.max_concurrency
+            ):
+                self._in_flight += 1
+                waiter.granted = True
+            else:
+                self._queues.setdefault(waiter.key, deque()).append(waiter)
+                self._queued += 1
+        if waiter.granted:
+            labelled(UPSTREAM_IN_FLIGHT, self.name).inc()
+        else:
+            labelled(UPSTREAM_QUEUED, self.name).inc()
+        return waiter.granted
+
+    def _next_waiter(self) -> Optional[_Waiter]:
+        # 调用方持有 self._lock；取队首 key 的一个请求，再把该 key 移到末尾
+        if not self._queues:
+            return None
+        key, queue = next(iter(self._queues.items()))
+        waiter = queue.popleft()
+        if queue:
+            self._queues.move_to_end(key)
+        else:
+            del self._queues[key]
+        self._queued -= 1
+        waiter.granted = True
+        return waiter
+
+    def release(self) -> None:
+        """归还槽位；有排队请求时直接把槽位转交给下一个请求。"""
+        with self._lock:
+            waiter = self._next_waiter()
+            if waiter is None:
+                self._in_flight -= 1
+        if waiter is None:
+            labelled(UPSTREAM_IN_FLIGHT, self.name).dec()
+            return
+        labelled(UPSTREAM_QUEUED, self.name).dec()
+        if waiter.event is not None:
+            waiter.event.set()
+            return
+        try:
+            waiter.loop.call_soon_threadsafe(_resolve_future, waiter.future)
+        except RuntimeError:
+            # 等待者所在的事件循环已经关闭，槽位继续往下传
+            self.release()
+
+    def _abandon(self, waiter: _Waiter) -> None:
+        """等待被取消或超时：已分到槽位则归还，否则移出队列。"""
+        with self._lock:
+            granted = waiter.granted
+            if not granted:
+                queue = self._queues.get(waiter.key)
+                if queue is not None and waiter in queue:
+                    queue.remove(waiter)
+                    self._queued -= 1
+                    if not queue:
+                        del self._queues[waiter.key]
+        if granted:
+            self.release()
+        else:
+            labelled(UPSTREAM_QUEUED, self.name).dec()
+
+    def acquire(self, key: str = DEFAULT_FAIRNESS_KEY, timeout: Optional[float] = None) -> float:
+        """阻塞直到拿到槽位和令牌，返回排队等待的秒数。
+
+        timeout 秒内拿不到时退出队列并抛出 TimeoutError（None 表示一直等）。
+        """
+        start = time.perf_counter()
+        waiter = _Waiter(key)
+        if not self._admit_or_enqueue(waiter):
+            if not waiter.event.wait(timeout):
+                self._abandon(waiter)
+                raise TimeoutError(f"timed out waiting for a {self.name} slot")
+        try:
+            delay = self._token_delay(start, timeout)
+            if delay:
+                try:
+                    time.sleep(delay)
+                except BaseException:
+                    self.bucket.refund()
+                    raise
+        except BaseException:
+            self.release()
+            raise
+        return self._observe_wait(start)
+
+    async def aacquire(self, key: str = DEFAULT_FAIRNESS_KEY, timeout: Optional[float] = None) -> float:
+        """acquire 的异步版本，等待期间不阻塞事件循环。"""
+        start = time.perf_counter()
+        waiter = _Waiter(key, asyncio.get_running_loop())
+        if not self._admit_or_enqueue(waiter):
+            try:
+                await asyncio.wait_for(waiter.future, timeout)
+            except (asyncio.CancelledError, TimeoutError):
+                self._abandon(waiter)
+                raise
+        try:
+            delay = self._token_delay(start, timeout)
+            if delay:
+                try:
+                    await asyncio.sleep(delay)
+                except BaseException:
+                    self.bucket.refund()
+                    raise
+        except BaseException:
+            self.release()
+            raise
+        return self._observe_wait(start)
+
+    def _token_delay(self, start: float, timeout: Optional[float]) -> float:
+        # 先判断等待是否超时再扣令牌，超时的请求不占用令牌
+        max_wait = None if timeout is None else timeout - (time.perf_counter() - start)
+        delay = self.bucket.reserve(max_wait)
+        if delay is None:
+            raise TimeoutError(f"timed out waiting for a {self.name} rate-limit token")
+        return delay
+
+    def _observe_wait(self, start: float) -> float:
+        waited = time.perf_counter() - start
+        labelled(UPSTREAM_QUEUE_WAIT, self.name).observe(waited)
+        if waited:
+            labelled(NODE_QUEUE_WAIT, *scope_labels(), self.name).inc(waited)
+        labelled(UPSTREAM_REQUESTS, self.name).inc()
+        return waited
+
+
+_limiters: dict[str, UpstreamLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str, max_concurrency: int = 0, rate: float = 0.0) -> UpstreamLimiter:
+    """返回上游 name 的进程级限流器。
+
+    环境变量 {NAME}_MAX_CONCURRENCY、{NAME}_RATE_PER_SEC 和 {NAME}_BURST
+    覆盖参数中的默认值，例如 SEARCHAPI_MAX_CONCURRENCY=10。
+    """
+    limiter = _limiters.get(name)
+    if limiter is None:
+        with _limiters_lock:
+            limiter = _limiters.get(name)
+            if limiter is None:
+                prefix = name.upper()
+                burst = os.getenv(f"{prefix}_BURST")
+                limiter = UpstreamLimiter(
+                    name,
+                    max_concurrency=int(
+                        os.getenv(f"{prefix}_MAX_CONCURRENCY", str(max_concurrency))
+                    ),
+                    rate=float(os.getenv(f"{prefix}_RATE_PER_SEC", str(rate))),
+                    burst=float(burst) if burst else None,
+                )
+                _limiters[name] = limiter
+    return limiter
+
+
+def reset_limiters() -> None:
+    """丢弃所有限流器（环境变量变化后调用）；已借出的槽位照常归还给旧实例。"""
+    with _limiters_lock:
+        _limiters.clear()
+
+
+def fairness_key() -> str:
+    """当前请求所属的公平调度 key：LangGraph 线程 ID，没有时为默认 key。
+
+    LangChain 把当前 runnable 配置放在 contextvar 中，同步节点的线程池和
+    异步任务都会继承它，因此传输层可以直接读取，无需逐层传参。
+    """
+    config = var_child_runnable_config.get() or {}
+    configurable = config.get("configurable") or {}
+    return str(configurable.get("thread_id") or DEFAULT_FAIRNESS_KEY)
+
+
+class _ReleasingStream(httpx.SyncByteStream):
+    def __init__(self, stream: httpx.SyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    def __iter__(self):
+        yield from self._stream
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class _AsyncReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+        self._released = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._released:
+                self._released = True
+                self._release()
+
+
+class LimitedTransport(httpx.BaseTransport):
+    """在 httpx 传输层接入限流器：每次请求（包括 SDK 的重试）都要先拿到槽位。
+
+    槽位一直占用到响应体被读完或关闭，流式响应也按整个请求计算并发。
+    在 deadline_scope 内排队等待不超过运行剩余时间，超时抛出 DeadlineExceeded。
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, limiter: UpstreamLimiter):
+        self._transport = transport
+        self.limiter = limiter
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            self.limiter.acquire(fairness_key(), remaining())
+        except TimeoutError as e:
+            raise DeadlineExceeded("run deadline exceeded", request=request) from e
+        start = time.perf_counter()
+        try:
+            response = self._transport.handle_request(request)
+        except BaseException:
+            self.limiter.release()
+            raise
+        labelled(UPSTREAM_LATENCY, self.limiter.name).observe(time.perf_counter() - start)
+        response.stream = _ReleasingStream(response.stream, self.limiter.release)
+        return response
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class LimitedAsyncTransport(httpx.AsyncBaseTransport):
+    """LimitedTransport 的异步版本。"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, limiter: UpstreamLimiter):
+        self._transport = transport
+        self.limiter = limiter
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        try:
+            await self.limiter.aacquire(fairness_key(), remaining())
+        except TimeoutError as e:
+            raise DeadlineExceeded("run deadline exceeded", request=request) from e
+        start = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+        except BaseException:
+            self.limiter.release()
+            raise
+        labelled(UPSTREAM_LATENCY, self.limiter.name).observe(time.perf_counter() - start)
+        response.stream = _AsyncReleasingStream(response.stream, self.limiter.release)
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
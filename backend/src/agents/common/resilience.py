@@ -0,0 +1,360 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+from agents.common.deadline import DeadlineExceeded, cap_request_timeout, remaining
+from agents.common.metrics import (
+    UPSTREAM_CIRCUIT_STATE,
+    UPSTREAM_REJECTED,
+    UPSTREAM_RETRIES,
+    UPSTREAM_RETRIES_DENIED,
+    labelled,
+)
+
+# 429 和网关类错误通常是暂时的，值得重试；其他 4xx 重试也不会成功
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+
+CLOSED, OPEN, HALF_OPEN = 0, 1, 2
+
+
+class CircuitOpenError(httpx.TransportError):
+    """上游熔断中，请求没有发出。"""
+
+
+class CircuitBreaker:
+    """按连续失败次数熔断。
+
+    连续 failure_threshold 次失败后进入 OPEN，cooldown 秒内的请求直接失败；
+    之后进入 HALF_OPEN，只放行一个探测请求，成功则恢复 CLOSED，失败则重新 OPEN。
+    状态导出为 agent_upstream_circuit_state（0 关闭，1 打开，2 半开），
+    被拒绝的请求数导出为 agent_upstream_rejected_total。
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, cooldown: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+        self.state = CLOSED
+        labelled(UPSTREAM_CIRCUIT_STATE, name).set(CLOSED)
+
+    def _set_state(self, state: int) -> None:
+        # 调用方持有 self._lock
+        if state != self.state:
+            self.state = state
+            labelled(UPSTREAM_CIRCUIT_STATE, self.name).set(state)
+
+    def allow(self) -> bool:
+        if self.failure_threshold <= 0:
+            return True
+        with self._lock:
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._set_state(HALF_OPEN)
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                return True
+        labelled(UPSTREAM_REJECTED, self.name).inc()
+        return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._probing = False
+            self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probing = False
+            if self.state == HALF_OPEN or (
+                self.failure_threshold > 0 and self._failures >= self.failure_threshold
+            ):
+                self._opened_at = time.monotonic()
+                self._set_state(OPEN)
+
+    def release(self) -> None:
+        """请求没有得出结果（被取消、被截止时间截断）：归还半开探测名额，状态不变。
+
+        否则探测名额一直被占着，熔断器停在 HALF_OPEN 拒绝之后的所有请求。
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+
+
+class RetryBudget:
+    """进程级重试预算，所有上游共享。
+
+    每个首发请求存入 ratio 个令牌，每次重试取出一个，另外每秒补充
+    min_per_sec 个保底令牌。上游整体变慢或出错时，重试量被限制在正常流量的
+    ratio 倍以内，不会因为每个请求各自重试而把故障放大。
+    """
+
+    def __init__(self, ratio: float = 0.2, min_per_sec: float = 1.0, capacity: float = 20.0):
+        self.ratio = ratio
+        self.min_per_sec = min_per_sec
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.min_per_sec)
+        self._updated = now
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            return True
+
+
+class RetryPolicy:
+    """单个上游的重试和熔断策略：带全抖动的指数退避 + 共享重试预算 + 熔断器。"""
+
+    def __init__(
+        self,
+        name: str,
+        max_retries: int = 2,
+        backoff_base: float = 0.2,
+        backoff_max: float = 5.0,
+        breaker: Optional[CircuitBreaker] = None,
+        budget: Optional[RetryBudget] = None,
+    ):
+        self.name = name
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker(name)
+        self.budget = budget or get_retry_budget()
+
+    def backoff(self, attempt: int, response: Optional[httpx.Response] = None) -> float:
+        """第 attempt 次重试前的等待时间；上游给出 Retry-After 时取两者中较大的。"""
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+        if response is not None:
+            try:
+                delay = max(delay, min(self.backoff_max, float(response.headers["retry-after"])))
+            except (KeyError, ValueError):
+                pass
+        return delay
+
+    def check(self, request: httpx.Request) -> None:
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit breaker is open", request=request)
+
+    def start_attempt(self, request: httpx.Request) -> bool:
+        """一次尝试之前调用，返回超时是否被运行截止时间收紧。
+
+        先收紧超时再检查熔断，避免占用半开探测名额后又不发请求。
+        """
+        capped = cap_request_timeout(request)
+        self.check(request)
+        return capped
+
+    def retry_delay_after_error(
+        self, request: httpx.Request, exc: Exception, attempt: int, capped: bool
+    ) -> float:
+        """尝试抛出异常后调用：返回重试前的等待秒数，不能重试时抛出异常。"""
+        if capped and isinstance(exc, httpx.TimeoutException):
+            # 超时是被截止时间截断的，不算上游故障，也不再重试
+            self.breaker.release()
+            raise DeadlineExceeded("run deadline exceeded", request=request) from exc
+        if not _is_retryable_error(exc):
+            self.breaker.release()
+            raise exc
+        delay = self.backoff(attempt)
+        if not self.should_retry(attempt, "error", delay):
+            raise exc
+        return delay
+
+    def retry_delay_after_response(
+        self, response: httpx.Response, attempt: int
+    ) -> Optional[float]:
+        """收到响应后调用：返回重试前的等待秒数，响应应当直接返回时为 None。"""
+        if response.status_code not in RETRY_STATUS:
+            self.breaker.record_success()
+            return None
+        delay = self.backoff(attempt, response)
+        if not self.should_retry(attempt, "status", delay):
+            return None
+        return delay
+
+    def should_retry(self, attempt: int, reason: str, delay: float = 0.0) -> bool:
+        """记录一次失败并判断是否还能重试（次数、预算、熔断状态和运行截止时间都允许）。"""
+        self.breaker.record_failure()
+        if attempt >= self.max_retries:
+            return False
+        left = remaining()
+        if left is not None and left <= delay:
+            return False
+        if not self.budget.withdraw():
+            labelled(UPSTREAM_RETRIES_DENIED, self.name).inc()
+            return False
+        labelled(UPSTREAM_RETRIES, self.name, reason).inc()
+        return True
+
+
+def _is_retryable_error(exc: Exception) -> bool:
+    # 熔断拒绝和截止时间已到不重试；其余传输层错误（连接失败、超时、连接被重置）都重试
+    return isinstance(exc, httpx.TransportError) and not isinstance(
+        exc, (CircuitOpenError, DeadlineExceeded)
+    )
+
+
+class ResilientTransport(httpx.BaseTransport):
+    """在 httpx 传输层加上熔断和重试，包在 LimitedTransport 外面。
+
+    每次尝试都重新向限流器申请槽位，退避等待期间不占用槽位；
+    熔断打开时请求在排队之前就直接失败。在 deadline_scope 内，每次尝试的超时
+    不超过运行剩余时间，退避等待超出剩余时间时不再重试。是否重试、等多久
+    由 RetryPolicy 决定，同步和异步版本只负责发请求和等待。
+    """
+
+    def __init__(self, transport: httpx.BaseTransport, policy: RetryPolicy):
+        self._transport = transport
+        self.policy = policy
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        policy = self.policy
+        policy.budget.deposit()
+        attempt = 0
+        while True:
+            capped = policy.start_attempt(request)
+            try:
+                response = self._transport.handle_request(request)
+            except Exception as e:
+                delay = policy.retry_delay_after_error(request, e, attempt, capped)
+            except BaseException:
+                # 被取消（对冲请求落败、wait_for 超时）时没有结果可记录，也要归还探测名额
+                policy.breaker.release()
+                raise
+            else:
+                delay = policy.retry_delay_after_response(response, attempt)
+                if delay is None:
+                    return response
+                response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class ResilientAsyncTransport(httpx.AsyncBaseTransport):
+    """ResilientTransport 的异步版本。"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, policy: RetryPolicy):
+        self._transport = transport
+        self.policy = policy
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        policy = self.policy
+        policy.budget.deposit()
+        attempt = 0
+        while True:
+            capped = policy.start_attempt(request)
+            try:
+                response = await self._transport.handle_async_request(request)
+            except Exception as e:
+                delay = policy.retry_delay_after_error(request, e, attempt, capped)
+            except BaseException:
+                # 被取消（对冲请求落败、wait_for 超时）时没有结果可记录，也要归还探测名额
+                policy.breaker.release()
+                raise
+            else:
+                delay = policy.retry_delay_after_response(response, attempt)
+                if delay is None:
+                    return response
+                await response.aclose()
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+_budget: Optional[RetryBudget] = None
+_policies: dict[str, RetryPolicy] = {}
+_policies_lock = threading.Lock()
+
+
+def get_retry_budget() -> RetryBudget:
+    """进程级重试预算，RETRY_BUDGET_RATIO（默认 0.2）和 RETRY_BUDGET_MIN_PER_SEC（默认 1）可调。"""
+    global _budget
+    if _budget is None:
+        with _policies_lock:
+            if _budget is None:
+                _budget = RetryBudget(
+                    ratio=float(os.getenv("RETRY_BUDGET_RATIO", "0.2")),
+                    min_per_sec=float(os.getenv("RETRY_BUDGET_MIN_PER_SEC", "1")),
+                )
+    return _budget
+
+
+def get_retry_policy(name: str, max_retries: int = 2) -> RetryPolicy:
+    """返回上游 name 的进程级重试策略。
+
+    环境变量 {NAME}_MAX_RETRIES、{NAME}_BACKOFF_BASE、{NAME}_BACKOFF_MAX、
+    {NAME}_BREAKER_FAILURES（0 表示不熔断）和 {NAME}_BREAKER_COOLDOWN 覆盖默认值，
+    例如 SEARCHAPI_MAX_RETRIES=1。
+    """
+    policy = _policies.get(name)
+    if policy is None:
+        budget = get_retry_budget()
+        with _policies_lock:
+            policy = _policies.get(name)
+            if policy is None:
+                prefix = name.upper()
+                policy = RetryPolicy(
+                    name,
+                    max_retries=int(os.getenv(f"{prefix}_MAX_RETRIES", str(max_retries))),
+                    backoff_base=float(os.getenv(f"{prefix}_BACKOFF_BASE", "0.2")),
+                    backoff_max=float(os.getenv(f"{prefix}_BACKOFF_MAX", "5")),
+                    breaker=CircuitBreaker(
+                        name,
+                        failure_threshold=int(os.getenv(f"{prefix}_BREAKER_FAILURES", "5")),
+                        cooldown=float(os.getenv(f"{prefix}_BREAKER_COOLDOWN", "30")),
+                    ),
+                    budget=budget,
+                )
+                _policies[name] = policy
+    return policy
+
+
+def reset_retry_policies() -> None:
+    """丢弃所有重试策略、熔断状态和重试预算（环境变量变化后调用）。"""
+    global _budget
+    with _policies_lock:
+        _policies.clear()
+        _budget = None
+
+
+def upstream_timeout(name: str, connect: float, read: float) -> httpx.Timeout:
+    """分开的连接超时和读超时：{NAME}_CONNECT_TIMEOUT 和 {NAME}_TIMEOUT。
+
+    连接阶段卡住（SYN 丢失、TLS 握手无响应）时很快失败并重试，
+    读超时按上游正常的响应时间设置，连接不会被永久占住。
+    """
+    prefix = name.upper()
+    return httpx.Timeout(
+        float(os.getenv(f"{prefix}_TIMEOUT", str(read))),
+        connect=float(os.getenv(f"{prefix}_CONNECT_TIMEOUT", str(connect))),
+    )
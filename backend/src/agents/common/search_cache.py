@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from agents.common.metrics import SEARCH_CACHE_EVENTS, labelled
+from agents.common.search_providers import get_search_provider
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """归一化查询字符串：NFKC（全角转半角）、小写、合并空白。"""
+    query = unicodedata.normalize("NFKC", query)
+    return _WHITESPACE_RE.sub(" ", query).strip().lower()
+
+
+def make_cache_key(query: str, engine: str) -> str:
+    digest = hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+    return f"{engine}:{digest}"
+
+
+class SearchCache:
+    """两级搜索结果缓存：进程内 LRU（带 TTL）+ 共享 Redis。
+
+    Redis 层是可选的；连接失败只会计入 redis_errors，不会影响搜索本身；
+    无法解析的 Redis 条目计入 redis_corrupt，按未命中处理并删除。
+    stats 中的计数同时导出为 agent_search_cache_events_total。
+    redis_client 可以直接注入（例如 fakeredis.aioredis.FakeRedis），
+    否则在配置了 redis_url 时按事件循环懒加载创建。
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 3600,
+        redis_url: Optional[str] = None,
+        redis_ttl: int = 86400,
+        redis_client: Any = None,
+        key_prefix: str = "search-cache:",
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.redis_url = redis_url
+        self.redis_ttl = redis_ttl
+        self.key_prefix = key_prefix
+        self._local: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._redis = redis_client
+        self._redis_loop: Optional[asyncio.AbstractEventLoop] = None
+        # 正在进行的上游请求，按 (事件循环, key) 合并相同查询
+        self._inflight: dict[tuple, asyncio.Future] = {}
+        self.stats = {
+            "hits": 0,
+            "redis_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "evictions": 0,
+            "expirations": 0,
+            "redis_errors": 0,
+            "redis_corrupt": 0,
+        }
+
+    def _count(self, event: str) -> None:
+        self.stats[event] += 1
+        labelled(SEARCH_CACHE_EVENTS, event).inc()
+
+    def _redis_client(self):
+        if self._redis is not None and self._redis_loop is None:
+            # 外部注入的客户端，由调用方管理生命周期
+            return self._redis
+        if not self.redis_url:
+            return None
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._redis_loop is not loop:
+            import redis.asyncio as redis
+
+            self._redis = redis.from_url(self.redis_url)
+            self._redis_loop = loop
+        return self._redis
+
+    def _get_local(self, key: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._local.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._local[key]
+                self._count("expirations")
+                return None
+            self._local.move_to_end(key)
+            return value
+
+    def _set_local(self, key: str, value: dict) -> None:
+        with self._lock:
+            self._local[key] = (time.monotonic() + self.ttl, value)
+            self._local.move_to_end(key)
+            while len(self._local) > self.maxsize:
+                self._local.popitem(last=False)
+                self._count("evictions")
+
+    async def get(self, query: str, engine: str) -> Optional[dict]:
+        key = make_cache_key(query, engine)
+        value = self._get_local(key)
+        if value is not None:
+            self._count("hits")
+            return value
+
+        redis = self._redis_client()
+        if redis is not None:
+            try:
+                raw = await redis.get(self.key_prefix + key)
+            except Exception:
+                self._count("redis_errors")
+                raw = None
+            if raw is not None:
+                value = await self._decode_redis(redis, key, raw)
+            if value is not None:
+                self._set_local(key, value)
+                self._count("redis_hits")
+                return value
+
+        self._count("misses")
+        return None
+
+    async def _decode_redis(self, redis: Any, key: str, raw: Any) -> Optional[dict]:
+        """解析 Redis 中的条目；损坏或旧格式的条目删除后返回 None。"""
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            value = None
+        if isinstance(value, dict):
+            return value
+        self._count("redis_corrupt")
+        logger.warning("Dropping unreadable search cache entry %s", key)
+        try:
+            await redis.delete(self.key_prefix + key)
+        except Exception:
+            self._count("redis_errors")
+        return None
+
+    async def set(self, query: str, engine: str, value: dict) -> None:
+        key = make_cache_key(query, engine)
+        self._set_local(key, value)
+        redis = self._redis_client()
+        if redis is not None:
+            try:
+                await redis.set(
+                    self.key_prefix + key,
+                    json.dumps(value, ensure_ascii=False),
+                    ex=self.redis_ttl,
+                )
+            except Exception:
+                self._count("redis_errors")
+
+    async def get_or_fetch(
+        self, query: str, engine: str, fetch: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        """读缓存，未命中时调用 fetch 并写回。
+
+        同一事件循环中相同查询的并发未命中只会触发一次 fetch，其余调用方
+        等待同一个结果（single-flight）；fetch 失败不缓存，异常传给所有等待者。
+        """
+        value = await self.get(query, engine)
+        if value is not None:
+            return value
+        key = (asyncio.get_running_loop(), make_cache_key(query, engine))
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(self._fetch_and_set(query, engine, fetch))
+            self._inflight[key] = future
+            future.add_done_callback(lambda f: self._forget(key, f))
+        else:
+            self._count("coalesced")
+        # 某个等待者被取消时不影响其他等待者
+        return await asyncio.shield(future)
+
+    def _forget(self, key: tuple, future: asyncio.Future) -> None:
+        self._inflight.pop(key, None)
+        if not future.cancelled():
+            # 标记异常已被读取；所有等待者都已取消时避免 asyncio 的告警
+            future.exception()
+
+    async def _fetch_and_set(
+        self, query: str, engine: str, fetch: Callable[[], Awaitable[dict]]
+    ) -> dict:
+        value = await fetch()
+        await self.set(query, engine, value)
+        return value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+
+
+_cache: Optional[SearchCache] = None
+
+
+def get_search_cache() -> SearchCache:
+    """返回进程内共享的 SearchCache，参数来自环境变量。"""
+    global _cache
+    if _cache is None:
+        _cache = SearchCache(
+            maxsize=int(os.getenv("SEARCH_CACHE_MAXSIZE", "1024")),
+            ttl=float(os.getenv("SEARCH_CACHE_TTL", "3600")),
+            redis_url=os.getenv("REDIS_URI"),
+            redis_ttl=int(os.getenv("SEARCH_CACHE_REDIS_TTL", "86400")),
+        )
+    return _cache
+
+
+async def cached_search(query: str, engine: str = "baidu", use_cache: bool = True) -> dict:
+    """带缓存的搜索；use_cache=False 时绕过缓存（既不读也不写）。
+
+    engine 可以是逗号分隔的多个引擎，此时按对冲模式搜索（见
+    search_providers.get_search_provider），缓存键使用整个引擎列表。
+    """
+    provider = get_search_provider(engine)
+    if not use_cache:
+        return await provider.search(query)
+    return await get_search_cache().get_or_fetch(query, provider.name, lambda: provider.search(query))
+
+
+_background_tasks: set[asyncio.Task] = set()
+
+
+async def _prefetch(query: str, engine: str) -> None:
+    try:
+        await cached_search(query, engine)
+    except Exception as e:
+        # 预取失败不缓存，web_research 会自己重新请求并报告错误
+        logger.debug("Search prefetch failed for %r: %r", query, e)
+
+
+def prefetch_search(query: str, engine: str = "baidu") -> asyncio.Task:
+    """在后台预取搜索结果并写入缓存。
+
+    之后对同一查询的 cached_search 会命中缓存，或合并到仍在进行的预取请求上。
+    """
+    task = asyncio.ensure_future(_prefetch(query, engine))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
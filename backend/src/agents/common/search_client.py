@@ -0,0 +1,119 @@
+import asyncio
+import os
+from typing import Any, Optional
+
+import httpx
+
+from agents.common.instrumentation import scope_labels
+from agents.common.metrics import SEARCH_RESPONSE_BYTES, labelled
+from agents.common.rate_limit import LimitedAsyncTransport, get_limiter
+from agents.common.resilience import ResilientAsyncTransport, get_retry_policy
+
+SEARCHAPI_URL = "https://www.searchapi.io/api/v1/search"
+
+
+class SearchAPIError(Exception):
+    """searchapi.io 请求失败（非 200 响应或网络错误）。"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+
+    def __str__(self) -> str:
+        if self.status_code is None:
+            return f"错误信息: {self.message}"
+        return f"状态码: {self.status_code}, 错误信息: {self.message}"
+
+
+class SearchClient:
+    """基于 httpx 的异步 searchapi.io 客户端。
+
+    整个进程共享一个连接池（keep-alive，支持 HTTP/2），
+    避免每个 web_research 分支都重新建立 TLS 连接。发往上游的请求
+    经过进程级 "searchapi" 限流器（见 rate_limit.get_limiter），
+    并按 "searchapi" 重试策略退避重试和熔断（见 resilience.get_retry_policy）。
+    """
+
+    def __init__(
+        self,
+        base_url: str = SEARCHAPI_URL,
+        api_key: Optional[str] = None,
+        timeout: float = 10.0,
+        connect_timeout: float = 3.0,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        http2: bool = True,
+    ):
+        self.base_url = base_url
+        self.api_key = api_key
+        transport = httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=30.0,
+            ),
+        )
+        self._client = httpx.AsyncClient(
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            transport=ResilientAsyncTransport(
+                LimitedAsyncTransport(transport, get_limiter("searchapi", max_concurrency=20)),
+                get_retry_policy("searchapi"),
+            ),
+        )
+
+    async def search(self, query: str, engine: str = "baidu") -> dict[str, Any]:
+        """执行一次搜索并返回解析后的 JSON。
+
+        失败时抛出 SearchAPIError；响应体不是合法 JSON 时抛出 ValueError。
+        """
+        params = {
+            "engine": engine,
+            "q": query,
+            "api_key": self.api_key or os.getenv("SEARCHAPI_API_KEY"),
+        }
+        try:
+            response = await self._client.get(self.base_url, params=params)
+        except httpx.HTTPError as e:
+            raise SearchAPIError(repr(e)) from e
+        if response.status_code != 200:
+            raise SearchAPIError(response.text, status_code=response.status_code)
+        labelled(SEARCH_RESPONSE_BYTES, scope_labels()[0]).observe(len(response.content))
+        return response.json()
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_client: Optional[SearchClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+
+
+def get_search_client() -> SearchClient:
+    """返回进程内共享的 SearchClient。
+
+    httpx 的连接池绑定在事件循环上，因此事件循环变化时（例如脚本中多次
+    调用 asyncio.run）会重新创建客户端。SEARCHAPI_BASE_URL 等环境变量在创建
+    客户端时读取，图模块的 load_dotenv() 在导入本模块之后执行也能生效。
+    """
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is None or _client_loop is not loop:
+        _client = SearchClient(
+            base_url=os.getenv("SEARCHAPI_BASE_URL", SEARCHAPI_URL),
+            timeout=float(os.getenv("SEARCHAPI_TIMEOUT", "10")),
+            connect_timeout=float(os.getenv("SEARCHAPI_CONNECT_TIMEOUT", "3")),
+            max_connections=int(os.getenv("SEARCHAPI_MAX_CONNECTIONS", "100")),
+        )
+        _client_loop = loop
+    return _client
+
+
+async def close_search_client() -> None:
+    """关闭共享客户端的连接池。"""
+    global _client, _client_loop
+    if _client is not None:
+        await _client.aclose()
+    _client = None
+    _client_loop = None
@@ -0,0 +1,226 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import deque
+from typing import Any, Protocol
+from urllib.parse import urlsplit
+
+from agents.common.metrics import SEARCH_HEDGES, SEARCH_PROVIDER_WINS, labelled
+from agents.common.search_client import SearchAPIError, get_search_client
+from agents.common.textsim import char_ngrams, jaccard, normalize_text
+
+# searchapi.io 支持、并且返回 organic_results 的引擎
+SEARCHAPI_ENGINES = ("baidu", "bing", "google")
+
+
+def normalize_result(item: dict[str, Any]) -> dict[str, str]:
+    """把各引擎的一条结果统一为 title/link/snippet/display_link/date 五个字段。"""
+    link = item.get("link") or item.get("url") or ""
+    display_link = item.get("display_link") or item.get("displayed_link") or ""
+    if not display_link and link:
+        display_link = urlsplit(link).hostname or ""
+    return {
+        "title": item.get("title") or "",
+        "link": link,
+        "snippet": item.get("snippet") or item.get("description") or "",
+        "display_link": display_link,
+        "date": item.get("date") or "",
+    }
+
+
+def normalize_payload(engine: str, data: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "engine": engine,
+        "organic_results": [normalize_result(item) for item in data.get("organic_results") or []],
+    }
+
+
+class SearchProvider(Protocol):
+    name: str
+
+    async def search(self, query: str) -> dict[str, Any]:
+        """返回 {"engine": 名称, "organic_results": [统一格式的结果]}。"""
+        ...
+
+
+class SearchAPIProvider:
+    """searchapi.io 上的一个引擎，共享同一个 SearchClient 连接池和限流器。"""
+
+    def __init__(self, engine: str):
+        self.name = engine
+
+    async def search(self, query: str) -> dict[str, Any]:
+        data = await get_search_client().search(query, engine=self.name)
+        return normalize_payload(self.name, data)
+
+
+class LocalIndexProvider:
+    """本地 JSONL 文档索引（每行一个含 title/link/snippet/date 的对象）。
+
+    按字符 n-gram Jaccard 相似度打分，不依赖网络，适合作为最后的兜底引擎。
+    """
+
+    name = "local"
+
+    def __init__(self, path: str, num_results: int = 10):
+        self.num_results = num_results
+        self._docs: list[tuple[set[str], dict[str, str]]] = []
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    doc = normalize_result(json.loads(line))
+                    grams = char_ngrams(normalize_text(f"{doc['title']} {doc['snippet']}"))
+                    self._docs.append((grams, doc))
+
+    async def search(self, query: str) -> dict[str, Any]:
+        grams = char_ngrams(normalize_text(query))
+        scored = sorted(
+            ((jaccard(grams, doc_grams), doc) for doc_grams, doc in self._docs),
+            key=lambda pair: pair[0],
+            reverse=True,
+        )
+        return {
+            "engine": self.name,
+            "organic_results": [doc for score, doc in scored[: self.num_results] if score > 0],
+        }
+
+
+class LatencyTracker:
+    """记录最近若干次成功请求的耗时，给出分位数。"""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def observe(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        with self._lock:
+            ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class HedgedSearch:
+    """对冲请求：先发主引擎，超过主引擎近期 p95 延迟仍未返回时再发下一个引擎，取先返回的结果。
+
+    某个引擎报错时立即发下一个（故障转移）；拿到结果后取消其余请求。
+    样本不足 min_samples 时使用 initial_delay。被取消的请求不计入延迟样本，
+    所以估计的 p95 偏乐观，对冲会略早触发，最多多发一个请求。
+    """
+
+    def __init__(
+        self,
+        providers: list[SearchProvider],
+        quantile: float = 0.95,
+        initial_delay: float = 1.0,
+        min_delay: float = 0.05,
+        min_samples: int = 20,
+    ):
+        self.providers = providers
+        self.name = ",".join(p.name for p in providers)
+        self.quantile = quantile
+        self.initial_delay = initial_delay
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.latency = {p.name: LatencyTracker() for p in providers}
+
+    def hedge_delay(self, provider: SearchProvider) -> float:
+        tracker = self.latency[provider.name]
+        if len(tracker) < self.min_samples:
+            return self.initial_delay
+        return max(self.min_delay, tracker.quantile(self.quantile))
+
+    async def _timed(self, provider: SearchProvider, query: str) -> dict[str, Any]:
+        start = time.perf_counter()
+        result = await provider.search(query)
+        self.latency[provider.name].observe(time.perf_counter() - start)
+        return result
+
+    async def search(self, query: str) -> dict[str, Any]:
+        waiting = list(self.providers)
+        tasks: dict[asyncio.Task, SearchProvider] = {}
+        errors: list[str] = []
+
+        def launch() -> SearchProvider:
+            provider = waiting.pop(0)
+            tasks[asyncio.ensure_future(self._timed(provider, query))] = provider
+            return provider
+
+        newest = launch()
+        try:
+            while tasks:
+                timeout = self.hedge_delay(newest) if waiting else None
+                done, _ = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    newest = launch()
+                    labelled(SEARCH_HEDGES, newest.name).inc()
+                    continue
+                for task in done:
+                    provider = tasks.pop(task)
+                    if task.exception() is None:
+                        labelled(SEARCH_PROVIDER_WINS, provider.name).inc()
+                        return task.result()
+                    errors.append(f"{provider.name}: {task.exception()}")
+                if waiting and not tasks:
+                    newest = launch()
+            raise SearchAPIError("; ".join(errors))
+        finally:
+            for task in tasks:
+                task.cancel()
+
+
+_providers: dict[str, SearchProvider] = {}
+_providers_lock = threading.Lock()
+
+
+def _make_provider(name: str) -> SearchProvider:
+    if name == "local":
+        path = os.getenv("SEARCH_LOCAL_INDEX")
+        if not path:
+            raise ValueError("search engine 'local' requires SEARCH_LOCAL_INDEX")
+        return LocalIndexProvider(path)
+    if name not in SEARCHAPI_ENGINES:
+        raise ValueError(f"unknown search engine: {name}")
+    return SearchAPIProvider(name)
+
+
+def get_search_provider(engines: str = "baidu") -> SearchProvider:
+    """按逗号分隔的引擎列表返回进程共享的搜索提供方，例如 "baidu,bing,local"。
+
+    只有一个引擎时直接返回该引擎；多个时返回 HedgedSearch，第一个为主引擎。
+    对冲参数来自环境变量 SEARCH_HEDGE_QUANTILE（默认 0.95）、
+    SEARCH_HEDGE_INITIAL_DELAY（默认 1 秒）和 SEARCH_HEDGE_MIN_DELAY（默认 0.05 秒）。
+    """
+    key = ",".join(name.strip() for name in engines.split(",") if name.strip())
+    provider = _providers.get(key)
+    if provider is None:
+        with _providers_lock:
+            provider = _providers.get(key)
+            if provider is None:
+                names = key.split(",")
+                if len(names) == 1:
+                    provider = _make_provider(names[0])
+                else:
+                    provider = HedgedSearch(
+                        [_make_provider(name) for name in names],
+                        quantile=float(os.getenv("SEARCH_HEDGE_QUANTILE", "0.95")),
+                        initial_delay=float(os.getenv("SEARCH_HEDGE_INITIAL_DELAY", "1")),
+                        min_delay=float(os.getenv("SEARCH_HEDGE_MIN_DELAY", "0.05")),
+                    )
+                _providers[key] = provider
+    return provider
+
+
+def reset_search_providers() -> None:
+    """丢弃所有提供方和延迟样本（环境变量变化后调用）。"""
+    with _providers_lock:
+        _providers.clear()
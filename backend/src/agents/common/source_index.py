@@ -0,0 +1,192 @@
+from collections import OrderedDict
+from typing import Any, Iterable, Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+
+from agents.common.blob_store import append_list, has_blob_refs, is_blob_ref, load_list
+from agents.common.source_record import SourceRecord
+from agents.common.textsim import text_simhash
+
+# 摘要 SimHash 汉明距离不超过该值时视为镜像/转载内容
+SIMHASH_MAX_DISTANCE = 3
+
+_TRACKING_PARAMS = {"spm", "from", "ref", "source"}
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def canonicalize_url(url: str) -> str:
+    """规范化 URL：小写协议和主机、去默认端口、片段和跟踪参数，并排序查询参数。"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url.strip()
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and parts.port != _DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(
+        sorted(
+            (k, v)
+            for k, v in parse_qsl(parts.query, keep_blank_values=True)
+            if not (k.lower().startswith("utm_") or k.lower() in _TRACKING_PARAMS)
+        )
+    )
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+if hasattr(np, "bitwise_count"):
+
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        return np.bitwise_count(values)
+
+else:  # numpy < 2.0
+
+    def _popcount(values: np.ndarray) -> np.ndarray:
+        bits = np.unpackbits(values.view(np.uint8).reshape(-1, 8), axis=1)
+        return bits.sum(axis=1)
+
+
+class SourceIndex:
+    """来源增量索引：规范化 URL 集合 + 摘要 SimHash 指纹数组。
+
+    指纹保存在按需倍增的 numpy 数组中，近重复检查是一次向量化的
+    异或 + popcount，几千个来源时也只需微秒级。
+    """
+
+    def __init__(self, max_distance: int = SIMHASH_MAX_DISTANCE):
+        self.max_distance = max_distance
+        self.urls: set[str] = set()
+        self._fingerprints = np.empty(64, dtype=np.uint64)
+        self._count = 0
+        # 已索引的来源条数（含没有摘要、不参与指纹比较的来源）
+        self.size = 0
+
+    def is_duplicate(self, url: str, fingerprint: Optional[int]) -> bool:
+        if url in self.urls:
+            return True
+        if fingerprint is None or self._count == 0:
+            return False
+        distances = _popcount(self._fingerprints[: self._count] ^ np.uint64(fingerprint))
+        return bool((distances <= self.max_distance).any())
+
+    def add(self, url: str, fingerprint: Optional[int]) -> None:
+        self.urls.add(url)
+        if fingerprint is not None:
+            if self._count == len(self._fingerprints):
+                self._fingerprints = np.resize(self._fingerprints, self._count * 2)
+            self._fingerprints[self._count] = fingerprint
+            self._count += 1
+        self.size += 1
+
+
+def source_fingerprint(snippet: str) -> Optional[int]:
+    return text_simhash(snippet) if snippet else None
+
+
+def _source_key(source: Any) -> tuple[str, Optional[int]]:
+    source = SourceRecord.coerce(source)
+    return canonicalize_url(source.url), source.simhash
+
+
+class SourceList(list):
+    """携带 SourceIndex 的来源 dict 列表，sources_gathered 未启用 blob 存储时的值。
+
+    合并时复用上一次的索引，只对新到达的来源做检查。它是 list 的子类，
+    检查点和 API 返回的状态中就是普通列表；从检查点恢复后索引为空，
+    会在第一次合并时重建一次。
+    """
+
+    __slots__ = ("source_index",)
+
+    def __init__(self, items: Iterable[Any] = ()):
+        super().__init__(items)
+        self.source_index: Optional[SourceIndex] = None
+
+
+def _index_for(existing: list) -> SourceIndex:
+    index = getattr(existing, "source_index", None)
+    if index is not None and index.size == len(existing):
+        return index
+    index = SourceIndex()
+    for source in existing:
+        index.add(*_source_key(source))
+    return index
+
+
+def _as_state(source: Any) -> Any:
+    return source.to_dict() if isinstance(source, SourceRecord) else source
+
+
+def merge_sources(existing: Any, new: Optional[Iterable[Any]]) -> list:
+    """sources_gathered 的 reducer：按规范化 URL 和摘要 SimHash 合并近重复来源。
+
+    通道中只保存 SourceRecord.to_dict() 形式的普通 dict，传入的记录在这里转换。
+    设置了 BLOB_STORE_URI 时节点已把来源写入 blob 存储、只返回分段引用
+    （见 blob_store.astore_list），这里只拼接引用，不做 I/O；近重复来源
+    在 load_sources 读取时去掉。
+    """
+    existing = existing or []
+    new = list(new or [])
+    if has_blob_refs(existing) or has_blob_refs(new):
+        return append_list(existing, [_as_state(source) for source in new])
+    index = _index_for(existing)
+    kept = []
+    for source in new:
+        url, fingerprint = _source_key(source)
+        if index.is_duplicate(url, fingerprint):
+            continue
+        index.add(url, fingerprint)
+        kept.append(_as_state(source))
+    merged = SourceList(existing + kept)
+    merged.source_index = index
+    return merged
+
+
+# 引用形式的 sources_gathered 读取时去重，结果按引用元组缓存；
+# 下一轮只多出几个引用，从最长的已缓存前缀接着去重
+_deduped: OrderedDict[tuple, tuple[SourceIndex, list[SourceRecord]]] = OrderedDict()
+_DEDUPED_CACHE_SIZE = 256
+
+
+def _dedupe(items: Iterable[Any], index: SourceIndex, out: list[SourceRecord]) -> None:
+    for item in items:
+        source = SourceRecord.coerce(item)
+        url, fingerprint = canonicalize_url(source.url), source.simhash
+        if index.is_duplicate(url, fingerprint):
+            continue
+        index.add(url, fingerprint)
+        out.append(source)
+
+
+def _load_deduped(value: list) -> list[SourceRecord]:
+    if not all(is_blob_ref(item) for item in value):
+        # 启用 blob 存储之前写入的内联来源和之后的引用混在一起，不缓存
+        sources: list[SourceRecord] = []
+        _dedupe(load_list(value), SourceIndex(), sources)
+        return sources
+    refs = tuple(value)
+    index, sources, done = SourceIndex(), [], 0
+    for n in range(len(refs), 0, -1):
+        # 索引只会增长，取出后交给更长的引用元组；较短的元组再被读取（回放/分叉）时重建
+        entry = _deduped.pop(refs[:n], None)
+        if entry is not None:
+            index, sources, done = entry[0], list(entry[1]), n
+            break
+    for ref in refs[done:]:
+        _dedupe(load_list([ref]), index, sources)
+    _deduped[refs] = (index, sources)
+    if len(_deduped) > _DEDUPED_CACHE_SIZE:
+        _deduped.popitem(last=False)
+    return sources
+
+
+def load_sources(value: Any) -> list[SourceRecord]:
+    """解析状态中的 sources_gathered（内联列表或 blob 引用），统一返回 SourceRecord。"""
+    if has_blob_refs(value):
+        return _load_deduped(value)
+    sources = value or []
+    if all(type(source) is SourceRecord for source in sources):
+        return sources
+    return [SourceRecord.coerce(source) for source in sources]
@@ -0,0 +1,89 @@
+import sys
+from dataclasses import dataclass
+from typing import Any, Optional
+
+
+@dataclass(frozen=True, slots=True)
+class SourceRecord:
+    """一条搜索来源。
+
+    以前每个来源是 9 个键的 dict，其中 short_url 和 value 总是同一个链接，
+    label 重复 title；这里只保存一份，旧字段名以只读属性的形式保留。
+    slots 实例没有 __dict__，几千个来源时内存明显更小；查询词、站点和日期
+    在同一批结果中大量重复，构造时做字符串驻留。
+
+    状态通道里保存的是 to_dict() 的普通 dict（检查点和 API 返回的状态都是
+    普通 JSON，不依赖自定义类型），节点通过 source_index.load_sources 按需构造记录。
+    batch 是产生该来源的那批搜索的编号（派发时本线程已运行的查询数，跨轮次和
+    对话单调递增），estimate_novelty 据此区分本轮和之前的来源；旧检查点中为 None。
+    """
+
+    url: str
+    title: str = ""
+    snippet: str = ""
+    display_link: str = ""
+    date: str = ""
+    query: str = ""
+    simhash: Optional[int] = None
+    batch: Optional[int] = None
+
+    def __post_init__(self):
+        setattr_ = object.__setattr__
+        setattr_(self, "display_link", sys.intern(self.display_link))
+        setattr_(self, "date", sys.intern(self.date))
+        setattr_(self, "query", sys.intern(self.query))
+
+    @property
+    def label(self) -> str:
+        return self.title or self.display_link or self.url
+
+    @property
+    def short_url(self) -> str:
+        return self.url
+
+    @property
+    def value(self) -> str:
+        return self.url
+
+    def as_dict(self) -> dict[str, Any]:
+        """旧的 dict 形式，用于 cited_sources 等对外输出。"""
+        return {
+            "label": self.label,
+            "short_url": self.url,
+            "value": self.url,
+            "title": self.title,
+            "snippet": self.snippet,
+            "display_link": self.display_link,
+            "date": self.date,
+            "query": self.query,
+        }
+
+    def to_dict(self) -> dict[str, Any]:
+        """状态通道中保存的形式：每个字段一个键，不重复保存链接。"""
+        return {
+            "url": self.url,
+            "title": self.title,
+            "snippet": self.snippet,
+            "display_link": self.display_link,
+            "date": self.date,
+            "query": self.query,
+            "simhash": self.simhash,
+            "batch": self.batch,
+        }
+
+    @classmethod
+    def coerce(cls, source: Any) -> "SourceRecord":
+        """把状态中的 dict 来源（包括旧检查点的 9 键形式）转换为 SourceRecord，已经是记录的原样返回。"""
+        if isinstance(source, cls):
+            return source
+        return cls(
+            url=source.get("url") or source.get("value") or source.get("short_url") or "",
+            title=source.get("title", ""),
+            snippet=source.get("snippet", ""),
+            display_link=source.get("display_link", ""),
+            date=source.get("date", ""),
+            query=source.get("query", ""),
+            simhash=source.get("simhash"),
+            batch=source.get("batch"),
+        )
+
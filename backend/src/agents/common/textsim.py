@@ -0,0 +1,75 @@
+import hashlib
+import re
+import unicodedata
+from typing import Iterable
+
+# 去掉空白和标点，只保留文字、数字（含中文）
+_NON_WORD_RE = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_text(text: str) -> str:
+    """NFKC 归一化、小写，并去掉空白和标点，用于精确去重。"""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return _NON_WORD_RE.sub("", text)
+
+
+def char_ngrams(text: str, sizes: Iterable[int] = (2, 3)) -> set[str]:
+    """字符 n-gram 集合。
+
+    中文没有空格分词，按字符切分可以不依赖分词器同时处理中英文。
+    """
+    text = normalize_text(text)
+    grams: set[str] = set()
+    for n in sizes:
+        if len(text) < n:
+            if text:
+                grams.add(text)
+            continue
+        grams.update(text[i : i + n] for i in range(len(text) - n + 1))
+    return grams
+
+
+def jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def novelty(new: set, old: set) -> float:
+    """计算 new 中不在 old 里的特征所占比例；new 为空时为 0（没有新内容）。"""
+    if not new:
+        return 0.0
+    return len(new - old) / len(new)
+
+
+def _hash64(feature: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big"
+    )
+
+
+def simhash(features: Iterable[str]) -> int:
+    """64 位 SimHash 指纹；相似文本的指纹汉明距离小。"""
+    weights = [0] * 64
+    for feature in features:
+        h = _hash64(feature)
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    fingerprint = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            fingerprint |= 1 << bit
+    return fingerprint
+
+
+def text_simhash(text: str) -> int:
+    return simhash(char_ngrams(text))
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def simhash_similarity(a: int, b: int) -> float:
+    """把两个指纹的汉明距离换算为 [0, 1] 的相似度。"""
+    return 1.0 - hamming_distance(a, b) / 64.0
@@ -0,0 +1,15 @@
+import re
+
+# DeepSeek 官方换算：1 个中文字符约 0.6 token，1 个英文字符约 0.3 token
+_CJK_RE = re.compile(r"[　-〿㐀-䶿一-鿿＀-￯]")
+CJK_TOKENS_PER_CHAR = 0.6
+OTHER_TOKENS_PER_CHAR = 0.3
+
+
+def estimate_tokens(text: str) -> int:
+    """不依赖分词器的 token 数估算，用于预算和统计。"""
+    if not text:
+        return 0
+    cjk = len(_CJK_RE.findall(text))
+    other = len(text) - cjk
+    return int(cjk * CJK_TOKENS_PER_CHAR + other * OTHER_TOKENS_PER_CHAR) + 1
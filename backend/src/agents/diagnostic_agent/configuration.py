@@ -1,5 +1,6 @@
+import functools
 import os
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Any, Optional
 
 from langchain_core.runnables import RunnableConfig
@@ -8,6 +9,9 @@ from langchain_core.runnables import RunnableConfig
 class Configuration(BaseModel):
     """The configuration for the agent."""
 
+    # Instances are shared between runs by from_runnable_config
+    model_config = ConfigDict(frozen=True)
+
     query_generator_model: str = Field(
         default="deepseek-chat",
         metadata={
@@ -29,6 +33,20 @@ class Configuration(BaseModel):
         },
     )
 
+    cascade_model: str = Field(
+        default="",
+        metadata={
+            "description": "Fast, cheap model tried first for query generation and reflection. The node escalates to query_generator_model / reflection_model when the fast output fails to parse, is inconsistent (no queries, or not sufficient without follow-up queries), or reports a confidence below cascade_min_confidence. Empty disables the cascade."
+        },
+    )
+
+    cascade_min_confidence: float = Field(
+        default=0.6,
+        metadata={
+            "description": "Self-reported confidence below which the fast model's output is escalated to the stronger model."
+        },
+    )
+
     number_of_initial_queries: int = Field(
         default=3,
         metadata={"description": "The number of initial search queries to generate."},
@@ -39,22 +57,154 @@ class Configuration(BaseModel):
         metadata={"description": "The maximum number of research loops to perform."},
     )
 
+    deadline_seconds: float = Field(
+        default=0,
+        metadata={
+            "description": "Wall-clock budget for a run in seconds, not counting time spent waiting for search approval. Searches and LLM calls are capped at the remaining time, and no further research loop starts unless it is expected to finish in time. 0 disables the budget."
+        },
+    )
+
+    search_engines: str = Field(
+        default="baidu",
+        metadata={
+            "description": "Comma-separated search engines (baidu, bing, google via searchapi.io, or local). The first is the primary; the others are hedged backups sent when the primary is slower than its recent p95 latency or fails."
+        },
+    )
+
+    bypass_search_cache: bool = Field(
+        default=False,
+        metadata={
+            "description": "Skip the search result cache and always query searchapi.io."
+        },
+    )
+
+    query_similarity_threshold: float = Field(
+        default=0.7,
+        metadata={
+            "description": "Character-bigram Jaccard similarity at which a new search query is treated as a duplicate of an earlier one."
+        },
+    )
+
+    novelty_threshold: float = Field(
+        default=0.0,
+        metadata={
+            "description": "Skip the reflection call and write the answer when less than this fraction of the latest loop's source text (character trigrams) is new compared with earlier loops, e.g. 0.1. 0 (the default) disables skipping; the estimate is recorded in novelty_decisions either way."
+        },
+    )
+
+    compress_search_results: bool = Field(
+        default=False,
+        metadata={
+            "description": "Compress each query's search results into a short digest before reflection."
+        },
+    )
+
+    compression_model: str = Field(
+        default="deepseek-chat",
+        metadata={
+            "description": "The name of the (cheaper) language model used to compress search results and summarize older conversation turns."
+        },
+    )
+
+    compression_token_budget: int = Field(
+        default=300,
+        metadata={"description": "Maximum tokens for each per-query digest."},
+    )
+
+    max_history_tokens: int = Field(
+        default=4000,
+        metadata={
+            "description": "Maximum tokens of conversation history sent to the model. Older turns are folded into a rolling summary; 0 sends the full history."
+        },
+    )
+
+    use_llm_cache: bool = Field(
+        default=False,
+        metadata={
+            "description": "Reuse cached query generation and reflection outputs for identical prompts."
+        },
+    )
+
+    require_search_approval: bool = Field(
+        default=True,
+        metadata={
+            "description": "Ask the user to approve each round of search queries before they are sent to the search provider."
+        },
+    )
+
+    streaming_query_dispatch: bool = Field(
+        default=False,
+        metadata={
+            "description": "Stream query generation and start each search as soon as its query is complete. Only applies when require_search_approval is off, since it sends queries before the approval step."
+        },
+    )
+
     @classmethod
     def from_runnable_config(
         cls, config: Optional[RunnableConfig] = None
     ) -> "Configuration":
-        """Create a Configuration instance from a RunnableConfig."""
+        """Create a Configuration instance from a RunnableConfig.
+
+        Resolved configurations are memoized on the configurable values that
+        name a field, combined with the environment snapshot taken on first use.
+        Call `invalidate_cache` after changing the environment.
+        """
         configurable = (
             config["configurable"] if config and "configurable" in config else {}
         )
+        key = tuple(
+            sorted(
+                (name, value)
+                for name, value in configurable.items()
+                if name in cls.model_fields and value is not None
+            )
+        )
+        try:
+            return _resolve(cls, key)
+        except TypeError:
+            # Unhashable configurable values: resolve without caching
+            return _resolve.__wrapped__(cls, key)
+
+    @classmethod
+    def invalidate_cache(cls) -> None:
+        """Drop memoized configurations and re-read the environment."""
+        global _ENV_SNAPSHOT
+        _resolve.cache_clear()
+        _ENV_SNAPSHOT = None
+
+
+def _snapshot_environment(cls: type[Configuration]) -> dict[str, str]:
+    return {
+        name: os.environ[name.upper()]
+        for name in cls.model_fields.keys()
+        if name.upper() in os.environ
+    }
+
+
+# Taken on first resolve rather than at import: graph.py imports this module
+# before load_dotenv() runs, and overrides from .env must still apply.
+_ENV_SNAPSHOT: Optional[dict[str, str]] = None
+
+
+def _environment(cls: type[Configuration]) -> dict[str, str]:
+    global _ENV_SNAPSHOT
+    if _ENV_SNAPSHOT is None:
+        _ENV_SNAPSHOT = _snapshot_environment(cls)
+    return _ENV_SNAPSHOT
+
+
+@functools.lru_cache(maxsize=256)
+def _resolve(cls: type[Configuration], key: tuple) -> Configuration:
+    configurable = dict(key)
+    environment = _environment(cls)
 
-        # Get raw values from environment or config
-        raw_values: dict[str, Any] = {
-            name: os.environ.get(name.upper(), configurable.get(name))
-            for name in cls.model_fields.keys()
-        }
+    # Get raw values from environment or config
+    raw_values: dict[str, Any] = {
+        name: environment.get(name, configurable.get(name))
+        for name in cls.model_fields.keys()
+    }
 
-        # Filter out None values
-        values = {k: v for k, v in raw_values.items() if v is not None}
+    # Filter out None values
+    values = {k: v for k, v in raw_values.items() if v is not None}
 
-        return cls(**values)
+    return cls(**values)
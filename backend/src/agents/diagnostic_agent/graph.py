@@ -1,6 +1,9 @@
+import asyncio
+import functools
+import logging
 import os
-import requests
-import json
+import threading
+import time
 
 from agents.diagnostic_agent.tools_and_schemas import SearchQueryList, Reflection
 from dotenv import load_dotenv
@@ -8,7 +11,7 @@ from langchain_core.messages import AIMessage
 from langgraph.types import Send, interrupt, Command
 from langgraph.graph import StateGraph
 from langgraph.graph import START, END
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
 
 from agents.diagnostic_agent.state import (
     OverallState,
@@ -18,40 +21,96 @@ from agents.diagnostic_agent.state import (
 )
 from agents.diagnostic_agent.configuration import Configuration
 from agents.diagnostic_agent.prompts import (
+    SUMMARY_SEPARATOR,
+    compression_instructions,
     get_current_date,
+    history_summary_instructions,
     query_writer_instructions,
     web_searcher_instructions,
     reflection_instructions,
     answer_instructions,
 )
-from langchain_deepseek import ChatDeepSeek
+from agents.common.blob_store import astore_list
+from agents.common.cascade import ainvoke_cascade, invoke_cascade
+from agents.common.deadline import (
+    ANSWER_RESERVE_FRACTION,
+    can_start_loop,
+    deadline_scope,
+    extend_deadline,
+    is_deadline_error,
+    remaining,
+    start_deadline,
+)
+from agents.common.history import update_history_summary
+from agents.common.instrumentation import instrument_node, prompt_cache_stats, record_node
+from agents.common.llm_cache import ainvoke_structured
+from agents.common.llm_registry import (
+    ensure_chat_class,
+    get_chat_model,
+    get_tool_model,
+    prewarm_connections,
+)
+from agents.common.metrics import (
+    DEADLINE_CUTOFFS,
+    DEADLINE_STOPS,
+    REFLECTION_NOVELTY,
+    REFLECTION_SKIPS,
+    labelled,
+)
+from agents.common.partial_json import ArrayItemStream
+from agents.common.search_cache import cached_search, prefetch_search
+from agents.common.search_client import SearchAPIError
+from agents.common.source_index import load_sources, source_fingerprint
+from agents.common.source_record import SourceRecord
+from agents.common.tokens import estimate_tokens
 from agents.diagnostic_agent.utils import (
+    build_summaries,
+    check_queries,
+    check_reflection,
+    dedupe_queries,
+    estimate_novelty,
+    format_sources,
     get_citations,
     get_research_topic,
     insert_citation_markers,
     resolve_urls,
+    rewrite_citations,
 )
 
+logger = logging.getLogger(__name__)
+
+# 指标中的 graph 标签
+GRAPH_NAME = "diagnostic_agent"
+
 load_dotenv()
 
-if os.getenv("DEEPSEEK_API_KEY") is None:
-    raise ValueError("DEEPSEEK_API_KEY is not set")
+# DEEPSEEK_API_KEY 在第一次创建模型时检查（见 llm_registry.get_chat_model），
+# 导入图模块本身不依赖密钥，也不导入 langchain_deepseek。
 
-# DeepSeek 客户端初始化（如果将来需要用于网络搜索集成）
+# 可选：后台导入 ChatDeepSeek 并预热同步连接池（reflection、finalize_answer 使用），
+# 避免首个请求承担 TLS 握手；异步节点的连接池在 api/app.py 的 lifespan 中于服务循环上预热
+if os.getenv("DEEPSEEK_PREWARM", "").lower() in ("1", "true", "yes"):
+    threading.Thread(target=prewarm_connections, daemon=True).start()
 
 
 # 节点
-def generate_query(state: OverallState, config: RunnableConfig) -> QueryGenerationState:
+@instrument_node(GRAPH_NAME)
+async def generate_query(state: OverallState, config: RunnableConfig) -> QueryGenerationState:
     """LangGraph 节点，基于用户问题生成搜索查询。
 
     使用 DeepSeek 模型根据用户问题创建优化的搜索查询，用于网络研究。
+    开启 streaming_query_dispatch（且不需要用户批准搜索）时，流式读取模型输出，
+    每解析出一个完整查询就立即在后台预取搜索结果。
+    配置了 deadline_seconds 时从这里开始计时，截止时间写入状态供后续节点使用；
+    查询生成被截止时间截断时直接用用户问题作为唯一的搜索查询。
+    对话历史超过 max_history_tokens 时在这里更新滚动摘要，写入状态供后续节点和下一轮对话复用。
 
     参数：
         state: 包含用户问题的当前图状态
         config: 可运行配置，包括 LLM 提供商设置
 
     返回：
-        包含状态更新的字典，包括 search_query 键，其中包含生成的查询
+        包含状态更新的字典，包括 pending_queries 键，其中包含待用户批准的查询
     """
     configurable = Configuration.from_runnable_config(config)
 
@@ -59,99 +118,311 @@ def generate_query(state: OverallState, config: RunnableConfig) -> QueryGenerati
     if state.get("initial_search_query_count") is None:
         state["initial_search_query_count"] = configurable.number_of_initial_queries
 
-    # 初始化 DeepSeek Chat
-    llm = ChatDeepSeek(
-        model=configurable.query_generator_model,
-        temperature=1.0,
-        max_retries=2,
-        api_key=os.getenv("DEEPSEEK_API_KEY"),
+    stream_dispatch = (
+        configurable.streaming_query_dispatch
+        and not configurable.require_search_approval
+        and not configurable.bypass_search_cache
     )
-    structured_llm = llm.with_structured_output(SearchQueryList)
+    run_stats = {}
+    dispatched: list[str] = []
+    started = time.perf_counter()
+    # 每次运行都重新计时（同一线程的上一轮对话可能留下了过期的截止时间）
+    deadline = start_deadline(configurable.deadline_seconds)
+    await ensure_chat_class()
+    reserve = configurable.deadline_seconds * ANSWER_RESERVE_FRACTION
+
+    # 历史超过 max_history_tokens 时把较早的对话并入滚动摘要，本轮后续节点直接复用
+    with deadline_scope(deadline and deadline - reserve):
+        history_summary, history_stats = await update_history_summary(
+            state["messages"],
+            state.get("history_summary"),
+            configurable.max_history_tokens,
+            functools.partial(summarize_history, configurable),
+        )
+    run_stats.update(history_stats)
 
     # 格式化提示词
     current_date = get_current_date()
     formatted_prompt = query_writer_instructions.format(
         current_date=current_date,
-        research_topic=get_research_topic(state["messages"]),
+        research_topic=get_research_topic(state["messages"], history_summary),
         number_queries=state["initial_search_query_count"],
     )
-    # 生成搜索查询
-    result = structured_llm.invoke(formatted_prompt)
-    return {"search_query": result.query}
 
+    def dispatch(query: str) -> None:
+        # 与下面的批次去重使用同一规则，预取的正是最终会被搜索的查询
+        kept, _ = dedupe_queries([query], dispatched, configurable.query_similarity_threshold)
+        if not kept:
+            return
+        if not dispatched:
+            run_stats["first_search_dispatch_ms"] = round((time.perf_counter() - started) * 1000)
+        dispatched.append(query)
+        prefetch_search(query, configurable.search_engines)
+
+    async def stream_queries(prompt: str) -> SearchQueryList:
+        return await stream_search_queries(prompt, configurable, dispatch)
+
+    # 生成搜索查询；流式预取的搜索任务继承这里的截止时间。
+    # 查询生成最多用到答案预留时间之前，之后至少还能搜索一次并生成答案
+    try:
+        with deadline_scope(deadline and deadline - reserve):
+            if stream_dispatch:
+                # 流式分发时已经按查询预取了搜索，不再走级联
+                result, cache_stats = await ainvoke_structured(
+                    RunnableLambda(stream_queries),
+                    formatted_prompt,
+                    model=configurable.query_generator_model,
+                    schema=SearchQueryList,
+                    use_cache=configurable.use_llm_cache,
+                )
+            else:
+                # 配置了 cascade_model 时先用快速模型，不可信时再用 query_generator_model
+                result, cache_stats = await ainvoke_cascade(
+                    formatted_prompt,
+                    fast_model=configurable.cascade_model,
+                    strong_model=configurable.query_generator_model,
+                    temperature=1.0,
+                    schema=SearchQueryList,
+                    check=functools.partial(
+                        check_queries, min_confidence=configurable.cascade_min_confidence
+                    ),
+                    use_cache=configurable.use_llm_cache,
+                )
+    except Exception as e:
+        if not is_deadline_error(e):
+            raise
+        labelled(DEADLINE_CUTOFFS, GRAPH_NAME, "generate_query").inc()
+        result = SearchQueryList(query=[state["messages"][-1].content], rationale="")
+        cache_stats = {"deadline_cutoffs": 1}
+    # 去掉同一批次中近似重复的查询
+    queries, suppressed = dedupe_queries(
+        result.query, [], configurable.query_similarity_threshold
+    )
+    if stream_dispatch:
+        # LLM 缓存命中时没有经过流式解析，在这里一次性预取
+        for query in queries:
+            if query not in dispatched:
+                dispatch(query)
+        run_stats["prefetched_searches"] = len(dispatched)
+    record_node(model=configurable.query_generator_model, results=len(queries))
+    return {
+        "pending_queries": queries,
+        "suppressed_queries": suppressed,
+        "run_stats": {**cache_stats, **run_stats, **prompt_cache_stats()},
+        "deadline": deadline,
+        "deadline_paused_at": time.time(),
+        "history_summary": history_summary,
+    }
+
+
+async def summarize_history(
+    configurable: Configuration, previous: str, conversation: list[str], token_budget: int
+) -> str:
+    """用 compression_model 把较早的对话合并进上一版滚动摘要。"""
+    prompt = history_summary_instructions.format(
+        token_budget=token_budget,
+        previous_summary=previous or "（无）",
+        conversation="".join(conversation),
+    )
+    llm = get_chat_model(configurable.compression_model, 0).bind(max_tokens=token_budget)
+    response = await llm.ainvoke(prompt)
+    return response.content
 
-def continue_to_web_research(state: QueryGenerationState):
-    """LangGraph 节点，将搜索查询发送到网络研究节点。
 
-    用于生成 n 个网络研究节点，每个搜索查询对应一个。
+async def stream_search_queries(
+    prompt: str, configurable: Configuration, on_query
+) -> SearchQueryList:
+    """流式调用查询生成模型，增量解析工具调用参数。
+
+    每当 query 数组中出现一个完整的查询就调用 on_query，流结束后返回完整的
+    SearchQueryList。
     """
-    return [
-        Send("web_research", {"search_query": search_query, "id": int(idx)})
-        for idx, search_query in enumerate(state["search_query"])
-    ]
+    llm = get_tool_model(configurable.query_generator_model, 1.0, SearchQueryList)
+    items = ArrayItemStream("query")
+    async for chunk in llm.astream(prompt):
+        for tool_chunk in chunk.tool_call_chunks:
+            for query in items.feed(tool_chunk.get("args") or ""):
+                if isinstance(query, str) and query.strip():
+                    on_query(query)
+    return SearchQueryList.model_validate_json(items.buffer)
 
 
-def web_research(state: WebSearchState, config: RunnableConfig) -> OverallState:
-    """LangGraph 节点，直接调用 searchapi.io 百度引擎进行网络研究。"""
-    # 先询问用户是否允许搜索
+def _resolve_approval(human_response, queries: list[str]) -> list[str]:
+    """把用户对一批查询的答复解析为最终批准的查询列表。
+
+    支持的答复：True（全部批准）、False/None（全部取消）、
+    查询字符串列表（编辑或删减后的查询集合），以及 {"queries": [...]}。
+    """
+    if isinstance(human_response, dict):
+        human_response = human_response.get("queries", human_response.get("approved"))
+    if isinstance(human_response, str):
+        human_response = [human_response]
+    if isinstance(human_response, list):
+        return [q.strip() for q in human_response if isinstance(q, str) and q.strip()]
+    return list(queries) if human_response else []
+
+
+def approve_queries(state: OverallState, config: RunnableConfig) -> OverallState:
+    """LangGraph 节点，一次性请求用户批准本轮所有待搜索的查询。
+
+    在 generate_query 之后以及每次 evaluate_research 决定继续研究之后执行。
+    用户可以整体批准、编辑或删减查询；批准的查询随后并行搜索，不再逐个中断。
+    require_search_approval 关闭时直接放行。等待用户答复的时间不计入运行时间预算。
+    """
+    queries = state.get("pending_queries") or []
+    if not Configuration.from_runnable_config(config).require_search_approval:
+        return {"pending_queries": queries}
+    query_list = "\n".join(f"{idx + 1}. {query}" for idx, query in enumerate(queries))
     human_response = interrupt({
-        "message": f"是否允许使用百度搜索以下内容？\n\n搜索内容: {state['search_query']}\n\n选择'继续'允许搜索，选择'取消'结束搜索。",
-        "current_query": state["search_query"],
+        "message": f"是否允许使用百度搜索以下内容？\n\n{query_list}\n\n选择'继续'允许搜索，选择'取消'结束搜索。",
+        "queries": queries,
     })
+    approved = _resolve_approval(human_response, queries)
+
+    update = {"pending_queries": approved}
+    if state.get("deadline") is not None:
+        # 从上一个节点结束到用户答复的时间加回截止时间
+        update["deadline"] = extend_deadline(state["deadline"], state.get("deadline_paused_at"))
+    if not approved and not state.get("research_loop_count"):
+        # 第一轮就被取消：没有任何研究结果，直接结束
+        update["messages"] = [AIMessage(content="用户取消了搜索操作，研究过程已结束。")]
+    return update
+
+
+def continue_to_web_research(state: OverallState):
+    """LangGraph 路由函数，将批准的搜索查询发送到网络研究节点。
+
+    用于生成 n 个网络研究节点，每个搜索查询对应一个。没有批准的查询时，
+    若已有研究结果则直接生成答案，否则结束。
+    """
+    if not state["pending_queries"]:
+        return "finalize_answer" if state.get("research_loop_count") else END
+    ran = len(state.get("search_query") or [])
+    return [
+        Send(
+            "web_research",
+            {
+                "search_query": search_query,
+                "id": ran + int(idx),
+                "batch": ran,
+                "deadline": state.get("deadline"),
+            },
+        )
+        for idx, search_query in enumerate(state["pending_queries"])
+    ]
+
+
+@instrument_node(GRAPH_NAME)
+async def web_research(state: WebSearchState, config: RunnableConfig) -> OverallState:
+    """LangGraph 节点，按 search_engines 配置的引擎进行网络研究。
 
-    if not human_response:
-        return {
-            "sources_gathered": [],
-            "search_query": [state["search_query"]],
-            "web_research_result": ["用户取消了搜索操作"],
-            "messages": [AIMessage(content="用户取消了搜索操作，研究过程已结束。")]
-        }
-
-    url = "https://www.searchapi.io/api/v1/search"
-    params = {"engine": "baidu","q": state["search_query"],"api_key": os.getenv("SEARCHAPI_API_KEY")}
-    response = requests.get(url, params=params)
+    查询已经在 approve_queries 中批量批准，这里不再中断。
+    使用进程共享的异步连接池，单个 worker 可以同时服务大量并行分支；
+    配置了多个引擎时对主引擎的慢请求发出对冲请求，各引擎的结果已统一格式。
+    搜索（包括等待其他分支正在进行的同一查询）不超过运行剩余时间。
+    """
+    configurable = Configuration.from_runnable_config(config)
+    deadline = state.get("deadline")
     sources_gathered = []
-    if response.status_code == 200:
-        try:
-            data = response.json()
-            results = data.get("organic_results", [])
-            if not results:
-                result = "未找到相关结果。"
-            else:
-                for idx, item in enumerate(results[:5]):
-                    title = item.get("title", "")
-                    link = item.get("link", "")
-                    display_link = item.get("display_link", "")
-                    date = item.get("date", "")
-                    snippet = item.get("snippet", "")
-                    sources_gathered.append({
-                        "label": title or display_link or f"来源{idx+1}",
-                        "short_url": link,
-                        "value": link,
-                        "title": title,
-                        "snippet": snippet,
-                        "display_link": display_link,
-                        "date": date
-                    })
-                # 用 sources_gathered 拼接 result
-                format_str = "【{title}】\n{short_url}\n{display_link}\n{date}\n{snippet}\n"
-                result = "\n".join([format_str.format(**src) for src in sources_gathered])
-        except Exception as e:
-            result = f"解析搜索结果失败: {e}"
-    else:
-        result = f"API请求失败，状态码: {response.status_code}, 错误信息: {response.text}"
-    return {
-        "sources_gathered": sources_gathered,
+    try:
+        with deadline_scope(deadline):
+            data = await asyncio.wait_for(
+                cached_search(
+                    state["search_query"],
+                    engine=configurable.search_engines,
+                    use_cache=not configurable.bypass_search_cache,
+                ),
+                remaining(deadline),
+            )
+        results = data.get("organic_results", [])
+        if not results:
+            result = "未找到相关结果。"
+        else:
+            for item in results[:5]:
+                snippet = item.get("snippet", "")
+                sources_gathered.append(SourceRecord(
+                    url=item.get("link", ""),
+                    title=item.get("title", ""),
+                    snippet=snippet,
+                    display_link=item.get("display_link", ""),
+                    date=item.get("date", ""),
+                    query=state["search_query"],
+                    simhash=source_fingerprint(snippet),
+                    batch=state.get("batch"),
+                ))
+            # 来源在提示词组装时才格式化（见 format_sources），这里不再保存拼接后的文本
+            result = None
+    except TimeoutError:
+        labelled(DEADLINE_CUTOFFS, GRAPH_NAME, "web_research").inc()
+        result = "搜索超时：已超出本次运行的时间预算。"
+    except SearchAPIError as e:
+        if is_deadline_error(e):
+            labelled(DEADLINE_CUTOFFS, GRAPH_NAME, "web_research").inc()
+        result = f"API请求失败，{e}"
+    except Exception as e:
+        result = f"解析搜索结果失败: {e}"
+
+    record_node(results=len(sources_gathered))
+    update = {
+        # 通道里只放普通 dict；启用 blob 存储时在这里写入分段，reducer 只拼接引用
+        "sources_gathered": await astore_list(source.to_dict() for source in sources_gathered),
         "search_query": [state["search_query"]],
-        "web_research_result": [result]
+        "web_research_result": [result] if result is not None else [],
     }
+    if sources_gathered and configurable.compress_search_results:
+        record_node(model=configurable.compression_model)
+        with deadline_scope(deadline):
+            update.update(
+                await compress_search_results(
+                    state["search_query"], sources_gathered, configurable
+                )
+            )
+    return update
+
 
+async def compress_search_results(
+    search_query: str, sources: list, configurable: Configuration
+) -> dict:
+    """把单个查询的搜索结果压缩为摘要（map 阶段），在各并行分支中分别执行。
 
+    压缩失败时返回空更新，后续步骤会退回使用原始搜索结果。
+    """
+    raw = "\n".join(format_sources(sources))
+    prompt = compression_instructions.format(
+        search_query=search_query,
+        token_budget=configurable.compression_token_budget,
+        results=raw,
+    )
+    await ensure_chat_class()
+    llm = get_chat_model(configurable.compression_model, 0).bind(
+        max_tokens=configurable.compression_token_budget
+    )
+    try:
+        response = await llm.ainvoke(prompt)
+    except Exception:
+        logger.exception("Search result compression failed for %r", search_query)
+        return {}
+    digest = f"【{search_query}】\n{response.content}"
+    return {
+        "research_digests": await astore_list([{"query": search_query, "digest": digest}]),
+        "run_stats": {
+            "compression_raw_tokens": estimate_tokens(raw),
+            "compression_digest_tokens": estimate_tokens(digest),
+            **prompt_cache_stats(),
+        },
+    }
+
+
+@instrument_node(GRAPH_NAME)
 def reflection(state: OverallState, config: RunnableConfig) -> ReflectionState:
     """LangGraph 节点，识别知识差距并生成潜在的后续查询。
 
     分析当前摘要以识别需要进一步研究的领域并生成潜在的后续查询。
     使用结构化输出以 JSON 格式提取后续查询。
+    调用因运行截止时间被截断时视为信息已足够，直接进入答案生成。
+    调用之前先估计本轮搜索带来的新内容比例（见 estimate_novelty），低于
+    novelty_threshold 时不调用模型，直接视为信息已足够；每轮的估计和模型的判断
+    都记录在 novelty_decisions 中，便于离线比较。
 
     参数：
         state: 包含运行摘要和研究主题的当前图状态
@@ -166,28 +437,81 @@ def reflection(state: OverallState, config: RunnableConfig) -> ReflectionState:
     configurable = Configuration.from_runnable_config(config)
     reasoning_model = state.get("reasoning_model", configurable.reflection_model)
 
-    # 格式化提示词
-    current_date = get_current_date()
-    formatted_prompt = reflection_instructions.format(
-        current_date=current_date,
-        research_topic=get_research_topic(state["messages"]),
-        summaries="\n\n---\n\n".join(state["web_research_result"]),
+    # 本轮搜索几乎没有带来新内容时，再做一轮反思和搜索也很难补上知识差距
+    # 本轮各分支派发时的 batch：之前已运行的查询数（search_query 已包含本轮）
+    pending = state.get("pending_queries") or []
+    novelty, new_sources = estimate_novelty(
+        load_sources(state["sources_gathered"]),
+        len(state.get("search_query") or []) - len(pending),
+        pending,
     )
-    # 初始化推理模型
-    llm = ChatDeepSeek(
-        model=reasoning_model,
-        temperature=1.0,
-        max_retries=2,
-        api_key=os.getenv("DEEPSEEK_API_KEY"),
+    skipped = novelty < configurable.novelty_threshold
+    decision = {
+        "loop": research_loop_count,
+        "novelty": round(novelty, 3),
+        "new_sources": new_sources,
+        "skipped": skipped,
+    }
+    labelled(REFLECTION_NOVELTY, GRAPH_NAME).observe(novelty)
+    run_stats = {}
+    if skipped:
+        labelled(REFLECTION_SKIPS, GRAPH_NAME).inc()
+        result = Reflection(is_sufficient=True, knowledge_gap="", follow_up_queries=[])
+        run_stats["reflection_skips"] = 1
+    else:
+        # 格式化提示词
+        current_date = get_current_date()
+        formatted_prompt = reflection_instructions.format(
+            current_date=current_date,
+            research_topic=get_research_topic(state["messages"], state.get("history_summary")),
+            summaries=SUMMARY_SEPARATOR.join(build_summaries(state)),
+        )
+        run_stats["reflection_prompt_tokens"] = estimate_tokens(formatted_prompt)
+        # 获取推理模型
+        deadline = state.get("deadline")
+        try:
+            with deadline_scope(deadline):
+                # 配置了 cascade_model 时先用快速模型，不可信时再用推理模型
+                result, cache_stats = invoke_cascade(
+                    formatted_prompt,
+                    fast_model=configurable.cascade_model,
+                    strong_model=reasoning_model,
+                    temperature=1.0,
+                    schema=Reflection,
+                    check=functools.partial(
+                        check_reflection, min_confidence=configurable.cascade_min_confidence
+                    ),
+                    use_cache=configurable.use_llm_cache,
+                )
+            decision["is_sufficient"] = result.is_sufficient
+            run_stats.update(cache_stats)
+        except Exception as e:
+            if not is_deadline_error(e):
+                raise
+            labelled(DEADLINE_CUTOFFS, GRAPH_NAME, "reflection").inc()
+            result = Reflection(is_sufficient=True, knowledge_gap="", follow_up_queries=[])
+            run_stats["deadline_cutoffs"] = 1
+    logger.info("Reflection novelty decision: %s", decision)
+
+    # 在扇出之前过滤与已执行查询近似重复的后续查询
+    follow_up_queries, suppressed = dedupe_queries(
+        result.follow_up_queries,
+        state["search_query"],
+        configurable.query_similarity_threshold,
     )
-    result = llm.with_structured_output(Reflection).invoke(formatted_prompt)
+    record_node(model=None if skipped else reasoning_model, results=len(follow_up_queries))
 
     return {
         "is_sufficient": result.is_sufficient,
         "knowledge_gap": result.knowledge_gap,
-        "follow_up_queries": result.follow_up_queries,
+        "follow_up_queries": follow_up_queries,
+        "pending_queries": follow_up_queries,
+        "suppressed_queries": suppressed,
         "research_loop_count": state["research_loop_count"],
         "number_of_ran_queries": len(state["search_query"]),
+        "novelty_decisions": [decision],
+        "run_stats": {**run_stats, **prompt_cache_stats()},
+        "deadline_paused_at": time.time(),
     }
 
 
@@ -198,13 +522,14 @@ def evaluate_research(
     """LangGraph 路由函数，确定研究流程中的下一步。
 
     通过决定是否继续收集信息或根据配置的最大研究循环数完成摘要来控制研究循环。
+    配置了 deadline_seconds 时，剩余时间不足以再做一轮并生成答案也会结束循环。
 
     参数：
         state: 包含研究循环计数的当前图状态
         config: 可运行配置，包括 max_research_loops 设置
 
     返回：
-        指示要访问的下一个节点的字符串字面量（"web_research" 或 "finalize_summary"）
+        指示要访问的下一个节点的字符串字面量（"approve_queries" 或 "finalize_answer"）
     """
     configurable = Configuration.from_runnable_config(config)
     max_research_loops = (
@@ -212,25 +537,26 @@ def evaluate_research(
         if state.get("max_research_loops") is not None
         else configurable.max_research_loops
     )
-    if state["is_sufficient"] or state["research_loop_count"] >= max_research_loops:
+    if (
+        state["is_sufficient"]
+        or state["research_loop_count"] >= max_research_loops
+        or not state["follow_up_queries"]
+    ):
         return "finalize_answer"
-    else:
-        return [
-            Send(
-                "web_research",
-                {
-                    "search_query": follow_up_query,
-                    "id": state["number_of_ran_queries"] + int(idx),
-                },
-            )
-            for idx, follow_up_query in enumerate(state["follow_up_queries"])
-        ]
+    if not can_start_loop(
+        state.get("deadline"), configurable.deadline_seconds, state["research_loop_count"]
+    ):
+        labelled(DEADLINE_STOPS, GRAPH_NAME).inc()
+        return "finalize_answer"
+    return "approve_queries"
 
 
+@instrument_node(GRAPH_NAME)
 def finalize_answer(state: OverallState, config: RunnableConfig):
     """LangGraph 节点，完成研究摘要。
 
     通过去重和格式化来源，然后将它们与运行摘要结合起来创建具有适当引用的结构良好的研究报告，准备最终输出。
+    答案生成至少保留 deadline_seconds 的 ANSWER_RESERVE_FRACTION；仍然超时时返回已收集的来源列表。
 
     参数：
         state: 包含运行摘要和收集来源的当前图状态
@@ -246,31 +572,39 @@ def finalize_answer(state: OverallState, config: RunnableConfig):
     current_date = get_current_date()
     formatted_prompt = answer_instructions.format(
         current_date=current_date,
-        research_topic=get_research_topic(state["messages"]),
-        summaries="\n---\n\n".join(state["web_research_result"]),
+        research_topic=get_research_topic(state["messages"], state.get("history_summary")),
+        summaries=SUMMARY_SEPARATOR.join(build_summaries(state)),
     )
 
-    # 初始化推理模型，默认为 DeepSeek Chat
-    llm = ChatDeepSeek(
-        model=reasoning_model,
-        temperature=0,
-        max_retries=2,
-        api_key=os.getenv("DEEPSEEK_API_KEY"),
-    )
-    result = llm.invoke(formatted_prompt)
-
-    # 用原始 URL 替换短 URL，并将所有使用的 URL 添加到 sources_gathered
-    unique_sources = []
-    for source in state["sources_gathered"]:
-        if source["short_url"] in result.content:
-            result.content = result.content.replace(
-                source["short_url"], source["value"]
-            )
-            unique_sources.append(source)
+    # 获取推理模型，默认为 DeepSeek Chat
+    llm = get_chat_model(reasoning_model, 0)
+    sources = load_sources(state["sources_gathered"])
+    deadline = state.get("deadline")
+    run_stats = {"answer_prompt_tokens": estimate_tokens(formatted_prompt)}
+    try:
+        with deadline_scope(
+            deadline, floor=configurable.deadline_seconds * ANSWER_RESERVE_FRACTION
+        ):
+            content = llm.invoke(formatted_prompt).content
+    except Exception as e:
+        if not is_deadline_error(e):
+            raise
+        labelled(DEADLINE_CUTOFFS, GRAPH_NAME, "finalize_answer").inc()
+        run_stats["deadline_cutoffs"] = 1
+        content = "研究超出了时间预算，未能生成完整答案。已收集的来源：\n\n" + "\n".join(
+            f"- [{source.label}]({source.url})" for source in sources
+        )
+
+    # 单次扫描用原始 URL 替换短 URL，并统计每个来源被引用的次数
+    content, unique_sources = rewrite_citations(content, sources)
+    record_node(model=reasoning_model, results=len(unique_sources))
+    if deadline is not None:
+        run_stats["deadline_remaining_ms"] = round(remaining(deadline) * 1000)
 
     return {
-        "messages": [AIMessage(content=result.content)],
-        "sources_gathered": unique_sources,
+        "messages": [AIMessage(content=content)],
+        "cited_sources": unique_sources,
+        "run_stats": {**run_stats, **prompt_cache_stats()},
     }
 
 
@@ -279,6 +613,7 @@ builder = StateGraph(OverallState, config_schema=Configuration)
 
 # 定义我们将循环的节点
 builder.add_node("generate_query", generate_query)
+builder.add_node("approve_queries", approve_queries)
 builder.add_node("web_research", web_research)
 builder.add_node("reflection", reflection)
 builder.add_node("finalize_answer", finalize_answer)
@@ -286,15 +621,19 @@ builder.add_node("finalize_answer", finalize_answer)
 # 将入口点设置为 `generate_query`
 # 这意味着这个节点是第一个被调用的
 builder.add_edge(START, "generate_query")
-# 添加条件边以在并行分支中继续搜索查询
+# 生成查询后先批量请求用户批准
+builder.add_edge("generate_query", "approve_queries")
+# 添加条件边以在并行分支中继续搜索批准的查询
 builder.add_conditional_edges(
-    "generate_query", continue_to_web_research, ["web_research"]
+    "approve_queries",
+    continue_to_web_research,
+    ["web_research", "finalize_answer", END],
 )
 # 反思网络研究
 builder.add_edge("web_research", "reflection")
 # 评估研究
 builder.add_conditional_edges(
-    "reflection", evaluate_research, ["web_research", "finalize_answer"]
+    "reflection", evaluate_research, ["approve_queries", "finalize_answer"]
 )
 # 完成答案
 builder.add_edge("finalize_answer", END)
@@ -6,20 +6,26 @@ def get_current_date():
     return datetime.now().strftime("%Y年%m月%d日")
 
 
+# DeepSeek 按请求的前缀缓存（上下文硬盘缓存），命中部分计费更低、首字更快。
+# 查询生成和压缩的模板把固定的说明和示例放在最前面，日期、主题等每次不同的
+# 字段统一放在末尾，不同运行之间可以复用同一段前缀。
+
+
 query_writer_instructions = """您的目标是生成复杂且多样化的网络搜索查询。这些查询用于高级自动化网络研究工具，该工具能够分析复杂结果、跟踪链接并综合信息。
 
 说明：
 - 始终优先使用单个搜索查询，只有当原始问题要求多个方面或元素且一个查询不够时才添加另一个查询。
 - 每个查询应专注于原始问题的一个特定方面。
-- 不要生成超过 {number_queries} 个查询。
+- 查询数量不要超过下文给出的上限。
 - 查询应该多样化，如果主题广泛，生成超过1个查询。
 - 不要生成多个相似的查询，1个就足够了。
-- 查询应确保收集最新的信息。当前日期是 {current_date}。
+- 查询应确保收集最新的信息（当前日期见下文）。
 
 格式：
-- 将您的响应格式化为包含以下两个确切键的JSON对象：
+- 将您的响应格式化为包含以下确切键的JSON对象：
    - "rationale": 简要说明为什么这些查询相关
    - "query": 搜索查询列表
+   - "confidence": 0 到 1 之间的数字，表示您对这些查询能覆盖问题的把握
 
 示例：
 
@@ -28,9 +34,13 @@ query_writer_instructions = """您的目标是生成复杂且多样化的网络
 {{
     "rationale": "为了准确回答这个比较增长问题，我们需要苹果股票表现和iPhone销售指标的具体数据点。这些查询针对所需的精确财务信息：公司收入趋势、产品特定单位销售数据以及同期股价变动以进行直接比较。",
     "query": ["苹果2024财年总收入增长", "iPhone 2024财年单位销售增长", "苹果股票2024财年价格增长"],
+    "confidence": 0.9,
 }}
 ```
 
+当前日期：{current_date}
+查询数量上限：{number_queries}
+
 上下文：{research_topic}"""
 
 
@@ -47,7 +57,57 @@ web_searcher_instructions = """进行有针对性的网络搜索，收集关于"
 {research_topic}
 """
 
-reflection_instructions = """您是一位专家研究助手，正在分析关于"{research_topic}"的摘要。
+compression_instructions = """将下面给出的搜索结果压缩为简洁的要点摘要，供后续研究步骤使用。
+
+说明：
+- 只保留事实、数据、日期和结论，删除重复和无关的内容。
+- 每条要点后使用markdown格式保留其来源链接（例如 [标题](链接)），链接必须与搜索结果中的完全一致。
+- 不要编造任何信息。
+- 摘要长度不超过下文给出的 token 上限。
+
+摘要 token 上限：{token_budget}
+搜索查询：{search_query}
+
+搜索结果：
+{results}
+"""
+
+history_summary_instructions = """将下面较早的多轮对话合并进已有摘要，生成一份新的对话摘要，供后续研究步骤理解用户的背景和需求。
+
+说明：
+- 保留用户提出的问题、约束、偏好和已经得出的结论，删除寒暄和重复的内容。
+- 已有摘要中的信息仍然有效时要保留。
+- 不要编造任何信息。
+- 摘要长度不超过下文给出的 token 上限。
+
+摘要 token 上限：{token_budget}
+
+已有摘要：
+{previous_summary}
+
+较早的对话：
+{conversation}"""
+
+
+# 反思和生成答案共用同一段研究上下文（主题和摘要），并放在各自任务说明之前：
+# 同一次运行中，最后一轮反思的提示词就是生成答案时的前缀，前面各轮的摘要
+# 也是下一轮反思的前缀，摘要这部分最长，命中缓存的收益也最大。反思和答案必须用同一个分隔符拼接摘要，前缀才能一致。
+SUMMARY_SEPARATOR = "\n\n---\n\n"
+
+research_context = """您是一位专家研究助手，正在就用户的问题进行多步骤网络研究。下面依次给出当前日期、研究主题和目前收集到的摘要，最后是本步骤的任务。
+
+当前日期：{current_date}
+
+研究主题：{research_topic}
+
+摘要：
+{summaries}
+
+---
+
+"""
+
+reflection_instructions = research_context + """本步骤的任务：分析上面的摘要，识别知识差距并生成后续查询。
 
 说明：
 - 识别知识差距或需要深入探索的领域，并生成后续查询（1个或多个）。
@@ -63,34 +123,27 @@ reflection_instructions = """您是一位专家研究助手，正在分析关于
    - "is_sufficient": true 或 false
    - "knowledge_gap": 描述缺少什么信息或需要澄清什么
    - "follow_up_queries": 写一个具体问题来解决这个差距
+   - "confidence": 0 到 1 之间的数字，表示您对 is_sufficient 判断的把握
 
 示例：
 ```json
 {{
     "is_sufficient": true, // 或 false
     "knowledge_gap": "摘要缺乏关于性能指标和基准测试的信息", // 如果 is_sufficient 为 true 则为 ""
-    "follow_up_queries": ["用于评估[特定技术]的典型性能基准和指标是什么？"] // 如果 is_sufficient 为 true 则为 []
+    "follow_up_queries": ["用于评估[特定技术]的典型性能基准和指标是什么？"], // 如果 is_sufficient 为 true 则为 []
+    "confidence": 0.8
 }}
 ```
 
-仔细反思摘要以识别知识差距并产生后续查询。然后，按照此JSON格式产生您的输出：
-
-摘要：
-{summaries}
+仔细反思摘要以识别知识差距并产生后续查询。然后，按照此JSON格式产生您的输出。
 """
 
-answer_instructions = """基于提供的摘要为用户的问题生成高质量答案。
+answer_instructions = research_context + """本步骤的任务：基于上面的摘要为用户的问题生成高质量答案。
 
 说明：
-- 当前日期是 {current_date}。
 - 您是多步骤研究过程的最后一步，不要提及您是最后一步。
 - 您可以访问从前面的步骤收集的所有信息。
 - 您可以访问用户的问题。
 - 基于提供的摘要和用户的问题为用户的问题生成高质量答案。
 - 在答案中正确包含您从摘要中使用的来源，使用markdown格式（例如 [apnews](https://vertexaisearch.cloud.google.com/id/1-0)）。这是必须的。
-
-用户上下文：
-- {research_topic}
-
-摘要：
-{summaries}"""
+"""
@@ -1,22 +1,167 @@
-from typing import Any, Dict, List
-from langchain_core.messages import AnyMessage, AIMessage, HumanMessage
+from typing import Any, Dict, List, Optional, Tuple
+from langchain_core.messages import AnyMessage
 
+from agents.common.blob_store import load_list
+from agents.common.cascade import low_confidence
+from agents.common.history import HistorySummary, render_history
+from agents.common.multi_pattern import AhoCorasick
+from agents.common.source_index import load_sources
+from agents.common.source_record import SourceRecord
+from agents.common.textsim import char_ngrams, jaccard, normalize_text, novelty
 
-def get_research_topic(messages: List[AnyMessage]) -> str:
+
+SOURCE_FORMAT = "【{title}】\n{url}\n{display_link}\n{date}\n{snippet}\n"
+
+
+def format_sources(sources: List[SourceRecord]) -> List[str]:
+    """
+    Format gathered sources for a prompt, one block per search query.
+
+    Formatting happens at prompt-assembly time from the deduplicated
+    sources_gathered, so a source found by several queries is shown once.
+    """
+    groups: Dict[str, List[str]] = {}
+    for source in sources:
+        groups.setdefault(source.query, []).append(
+            SOURCE_FORMAT.format(
+                title=source.title,
+                url=source.url,
+                display_link=source.display_link,
+                date=source.date,
+                snippet=source.snippet,
+            )
+        )
+    return ["\n".join(blocks) for blocks in groups.values()]
+
+
+def build_summaries(state: Dict[str, Any]) -> List[str]:
+    """
+    Assemble the per-query research summaries used by reflection and the final answer.
+
+    Queries that were compressed contribute their digest; the remaining ones
+    contribute their formatted sources, followed by error or empty-result notes.
+    Fields kept in the blob store are resolved here, not when they are written.
+    """
+    digests = {d["query"]: d["digest"] for d in load_list(state.get("research_digests"))}
+    raw_sources = [
+        source
+        for source in load_sources(state["sources_gathered"])
+        if source.query not in digests
+    ]
+    return (
+        list(digests.values())
+        + format_sources(raw_sources)
+        + state["web_research_result"]
+    )
+
+
+def estimate_novelty(
+    sources: List[SourceRecord], batch: int, latest_queries: List[str]
+) -> Tuple[float, int]:
+    """
+    Estimate how much new content the latest research loop added.
+
+    Sources tagged with the latest search batch (see ``SourceRecord.batch``)
+    are compared with the sources from earlier loops and turns on the
+    character trigrams of their titles and snippets. A query repeated from an
+    earlier turn does not make that turn's sources count as new. Sources from
+    checkpoints written before the tag existed fall back to matching their
+    query against ``latest_queries``.
+
+    Sources already dropped as duplicates by merge_sources do not count as
+    new, so a loop that only re-found known pages scores 0. The first loop
+    (nothing to compare against) scores 1.
+
+    Returns:
+        The fraction of new trigrams in [0, 1] and the number of new sources.
+    """
+    latest = set(latest_queries)
+    new_grams: set = set()
+    old_grams: set = set()
+    new_sources = 0
+    for source in sources:
+        grams = char_ngrams(f"{source.title} {source.snippet}", (3,))
+        if source.batch is not None:
+            is_new = source.batch == batch
+        else:
+            is_new = source.query in latest
+        if is_new:
+            new_grams |= grams
+            new_sources += 1
+        else:
+            old_grams |= grams
+    if not old_grams:
+        return 1.0, new_sources
+    return novelty(new_grams, old_grams), new_sources
+
+
+def check_queries(result: Any, min_confidence: float) -> Optional[str]:
+    """
+    Cascade check for query generation: escalate when no query was produced
+    or the model reports low confidence.
+    """
+    if not result.query:
+        return "inconsistent"
+    return low_confidence(result, min_confidence)
+
+
+def check_reflection(result: Any, min_confidence: float) -> Optional[str]:
+    """
+    Cascade check for reflection: escalate when the model says the research is
+    insufficient but proposes no follow-up query, or reports low confidence.
+    """
+    if not result.is_sufficient and not result.follow_up_queries:
+        return "inconsistent"
+    return low_confidence(result, min_confidence)
+
+
+def get_research_topic(
+    messages: List[AnyMessage], summary: Optional[HistorySummary] = None
+) -> str:
     """
     Get the research topic from the messages.
+
+    With a rolling history summary (see ``update_history_summary``), turns it
+    covers are replaced by the summary and only later messages are kept verbatim.
+    """
+    return render_history(messages, summary)
+
+
+def dedupe_queries(
+    candidates: List[str], seen: List[str], threshold: float
+) -> Tuple[List[str], List[Dict[str, Any]]]:
+    """
+    Drop candidate queries that duplicate an already-run or earlier candidate query.
+
+    A query is suppressed when its normalized form (NFKC, lower case, no
+    whitespace or punctuation) matches exactly, or when the Jaccard similarity
+    of its character bigrams reaches the threshold. Character n-grams work for
+    Chinese without a tokenizer; SimHash is too noisy on ten-character strings.
+
+    Returns:
+        The kept queries and a list of {"query", "duplicate_of", "similarity"}
+        records for the suppressed ones.
     """
-    # check if request has a history and combine the messages into a single string
-    if len(messages) == 1:
-        research_topic = messages[-1].content
-    else:
-        research_topic = ""
-        for message in messages:
-            if isinstance(message, HumanMessage):
-                research_topic += f"User: {message.content}\n"
-            elif isinstance(message, AIMessage):
-                research_topic += f"Assistant: {message.content}\n"
-    return research_topic
+    kept: List[str] = []
+    suppressed: List[Dict[str, Any]] = []
+    reference = [(q, normalize_text(q), char_ngrams(q, (2,))) for q in seen]
+    for query in candidates:
+        norm = normalize_text(query)
+        grams = char_ngrams(query, (2,))
+        match = None
+        for other, other_norm, other_grams in reference:
+            similarity = 1.0 if norm == other_norm else jaccard(grams, other_grams)
+            if similarity >= threshold:
+                match = (other, similarity)
+                break
+        if match:
+            suppressed.append(
+                {"query": query, "duplicate_of": match[0], "similarity": round(match[1], 3)}
+            )
+        else:
+            kept.append(query)
+            reference.append((query, norm, grams))
+    return kept, suppressed
 
 
 def resolve_urls(urls_to_resolve: List[Any], id: int) -> Dict[str, str]:
@@ -36,6 +181,40 @@ def resolve_urls(urls_to_resolve: List[Any], id: int) -> Dict[str, str]:
     return resolved_map
 
 
+def rewrite_citations(
+    text: str, sources: List[SourceRecord]
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Replace every short URL in the text with its original URL in a single pass.
+
+    An Aho-Corasick automaton over all distinct short URLs is built once, so the
+    report is scanned once regardless of how many sources were gathered.
+
+    Returns:
+        The rewritten text and the cited sources in gathering order, one per
+        short URL, each with a "citations" key holding the number of times it
+        was cited.
+    """
+    first_by_url: Dict[str, SourceRecord] = {}
+    for source in sources:
+        if source.short_url and source.short_url not in first_by_url:
+            first_by_url[source.short_url] = source
+    if not first_by_url:
+        return text, []
+
+    short_urls = list(first_by_url)
+    automaton = AhoCorasick(short_urls)
+    rewritten, counts = automaton.replace(
+        text, [first_by_url[url].value for url in short_urls]
+    )
+    cited = [
+        {**first_by_url[url].as_dict(), "citations": counts[idx]}
+        for idx, url in enumerate(short_urls)
+        if counts[idx]
+    ]
+    return rewritten, cited
+
+
 def insert_citation_markers(text, citations_list):
     """
     Inserts citation markers into a text string based on start and end indices.
@@ -1,3 +1,17 @@
-from agents.research_agent.graph import graph
+"""Research agent graph.
+
+``graph`` is imported on first access so that importing the package (for
+its configuration, state or prompts) does not build the graph.
+"""
 
 __all__ = ["graph"]
+
+
+def __getattr__(name):
+    if name == "graph":
+        from agents.research_agent.graph import graph
+
+        # The submodule import rebinds the package attribute; point it at the graph.
+        globals()["graph"] = graph
+        return graph
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,27 +6,54 @@ from typing import TypedDict
 from langgraph.graph import add_messages
 from typing_extensions import Annotated
 
+from agents.common.blob_store import append_list
+from agents.common.source_index import merge_sources
+
 
 import operator
 
 
+def merge_stats(left: dict, right: dict) -> dict:
+    """Sum per-run counters reported by individual nodes."""
+    merged = dict(left or {})
+    for key, value in (right or {}).items():
+        merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def keep_latest(left, right):
+    """Keep the most recent value; parallel branches may each write one."""
+    return right
+
+
 class OverallState(TypedDict):
     messages: Annotated[list, add_messages]
     search_query: Annotated[list, operator.add]
     web_research_result: Annotated[list, operator.add]
-    sources_gathered: Annotated[list, operator.add]
+    sources_gathered: Annotated[list, merge_sources]
+    sources_summary: Annotated[dict, keep_latest]
+    cited_sources: list
+    research_digests: Annotated[list, append_list]
+    pending_queries: list
     initial_search_query_count: int
     max_research_loops: int
     research_loop_count: int
     reasoning_model: str
+    run_stats: Annotated[dict, merge_stats]
+    suppressed_queries: Annotated[list, operator.add]
+    deadline: float
+    deadline_paused_at: float
+    novelty_decisions: Annotated[list, operator.add]
+    history_summary: dict
 
 
 class ReflectionState(TypedDict):
     is_sufficient: bool
     knowledge_gap: str
-    follow_up_queries: Annotated[list, operator.add]
+    follow_up_queries: list
     research_loop_count: int
     number_of_ran_queries: int
+    deadline: float
 
 
 class Query(TypedDict):
@@ -35,12 +62,14 @@ class Query(TypedDict):
 
 
 class QueryGenerationState(TypedDict):
-    search_query: list[Query]
+    pending_queries: list[str]
 
 
 class WebSearchState(TypedDict):
     search_query: str
     id: str
+    batch: int
+    deadline: float
 
 
 @dataclass(kw_only=True)
@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 from pydantic import BaseModel, Field
 
 
@@ -9,6 +9,10 @@ class SearchQueryList(BaseModel):
     rationale: str = Field(
         description="A brief explanation of why these queries are relevant to the research topic."
     )
+    confidence: Optional[float] = Field(
+        default=None,
+        description="Self-assessed confidence from 0 to 1 that these queries cover the research topic.",
+    )
 
 
 class Reflection(BaseModel):
@@ -21,3 +25,7 @@ class Reflection(BaseModel):
     follow_up_queries: List[str] = Field(
         description="A list of follow-up queries to address the knowledge gap."
     )
+    confidence: Optional[float] = Field(
+        default=None,
+        description="Self-assessed confidence from 0 to 1 in the is_sufficient judgement.",
+    )
@@ -1,10 +1,43 @@
 # mypy: disable - error - code = "no-untyped-def,misc"
+import asyncio
+import contextlib
+import os
 import pathlib
 from fastapi import FastAPI, Response
 from fastapi.staticfiles import StaticFiles
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+
+from agents.common.llm_registry import aprewarm_connections
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Pre-warm the async DeepSeek pool on the serving loop when DEEPSEEK_PREWARM is set.
+
+    Graph runs share this event loop, so connections opened here are reused by
+    async nodes such as generate_query. The sync pool is warmed separately when
+    the graph modules are imported.
+    """
+    task = None
+    if os.getenv("DEEPSEEK_PREWARM", "").lower() in ("1", "true", "yes"):
+        task = asyncio.create_task(aprewarm_connections())
+    yield
+    if task is not None:
+        task.cancel()
+
 
 # Define the FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    """Expose Prometheus metrics for the agent graphs in this process.
+
+    Node timings, queue waits, token usage and search response sizes are
+    labelled by graph (research_agent, diagnostic_agent), node and model.
+    """
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
 
 
 def create_frontend_router(build_dir="../frontend/dist"):
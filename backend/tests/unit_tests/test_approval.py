@@ -0,0 +1,21 @@
+import importlib
+
+import pytest
+
+graph = importlib.import_module("agents.research_agent.graph")
+
+
+@pytest.mark.parametrize(
+    ("response", "expected"),
+    [
+        (True, ["a", "b"]),
+        (False, []),
+        (None, []),
+        # 前端编辑后以 {"queries": [...]} 继续
+        ({"queries": ["a", " edited ", ""]}, ["a", "edited"]),
+        ({"queries": []}, []),
+        (["only"], ["only"]),
+    ],
+)
+def test_resolve_approval(response, expected):
+    assert graph._resolve_approval(response, ["a", "b"]) == expected
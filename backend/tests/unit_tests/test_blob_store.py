@@ -0,0 +1,143 @@
+import asyncio
+import importlib
+import os
+import sys
+import time
+
+import pytest
+
+from agents.common import blob_store
+from agents.common.blob_store import (
+    ContentStore,
+    FileBlobStore,
+    append_list,
+    astore_list,
+    get_blob_store,
+    is_blob_ref,
+    list_length,
+    load_list,
+    store_list,
+)
+from agents.common.source_index import load_sources, merge_sources
+
+
+@pytest.fixture
+def store(monkeypatch):
+    monkeypatch.setenv("BLOB_STORE_URI", "memory://")
+    monkeypatch.setattr(blob_store, "_store", None)
+    return get_blob_store()
+
+
+def _sources(start: int, n: int) -> list[dict]:
+    return [{"url": f"https://example.com/{i}", "title": f"t{i}"} for i in range(start, start + n)]
+
+
+def test_nodes_write_segments_and_reducer_only_concatenates(store, monkeypatch):
+    first = store_list(_sources(0, 3))
+    second = asyncio.run(astore_list(_sources(3, 2)))
+    assert len(first) == 1 and is_blob_ref(first[0])
+
+    def no_io(*args, **kwargs):
+        raise AssertionError("reducer must not write to the blob store")
+
+    monkeypatch.setattr(store.backend, "put", no_io)
+    merged = append_list(append_list([], first), second)
+    assert merged == first + second
+    assert list_length(merged) == 5
+    assert [item["url"] for item in load_list(merged)][-1] == "https://example.com/4"
+
+
+def test_store_list_is_inline_without_blob_store(monkeypatch):
+    monkeypatch.delenv("BLOB_STORE_URI", raising=False)
+    items = _sources(0, 2)
+    assert store_list(items) == items
+    assert asyncio.run(astore_list(items)) == items
+
+
+def test_duplicate_sources_are_dropped_on_read(store):
+    state = merge_sources([], store_list(_sources(0, 4)))
+    state = merge_sources(state, store_list(_sources(2, 4)))
+    assert all(is_blob_ref(ref) for ref in state)
+    assert [source.url for source in load_sources(state)] == [
+        f"https://example.com/{i}" for i in range(6)
+    ]
+    # 下一轮只多出一个引用，从缓存的前缀接着去重
+    state = merge_sources(state, store_list(_sources(5, 2)))
+    assert len(load_sources(state)) == 7
+
+
+def test_inline_sources_followed_by_references(store):
+    state = merge_sources(_sources(0, 2), store_list(_sources(1, 2)))
+    assert [source.url for source in load_sources(state)] == [
+        f"https://example.com/{i}" for i in range(3)
+    ]
+
+
+def test_file_store_prunes_blobs_not_written_recently(tmp_path):
+    backend = FileBlobStore(str(tmp_path))
+    backend.put("aa" + "0" * 62, b"old")
+    backend.put("bb" + "0" * 62, b"new")
+    old = tmp_path / "aa" / ("0" * 62)
+    stale = time.time() - 3600
+    os.utime(old, (stale, stale))
+    assert backend.prune(60) == 1
+    assert backend.get("aa" + "0" * 62) is None
+    assert backend.get("bb" + "0" * 62) == b"new"
+
+
+def test_rewriting_a_blob_refreshes_its_age(tmp_path):
+    backend = FileBlobStore(str(tmp_path))
+    digest = "cc" + "0" * 62
+    backend.put(digest, b"shared")
+    stale = time.time() - 3600
+    os.utime(tmp_path / "cc" / ("0" * 62), (stale, stale))
+    backend.put(digest, b"shared")
+    assert backend.prune(60) == 0
+
+
+def test_cached_reput_refreshes_age_before_prune(tmp_path):
+    store = ContentStore(FileBlobStore(str(tmp_path)))
+    ref = store.put_json({"count": 1, "items": ["a"]})
+    path = next(p for p in tmp_path.glob("*/*"))
+    stale = time.time() - 3600
+    os.utime(path, (stale, stale))
+    # 同一内容仍在进程内缓存中，再次写入也要刷新后端的时间
+    assert store.put_json({"count": 1, "items": ["a"]}) == ref
+    assert store.backend.prune(60) == 0
+    assert store.backend.get(ref.removeprefix(blob_store.BLOB_REF_PREFIX)) is not None
+
+
+def test_cached_reput_rewrites_blob_pruned_elsewhere(tmp_path):
+    store = ContentStore(FileBlobStore(str(tmp_path)))
+    ref = store.put_json({"count": 1, "items": ["a"]})
+    # 另一个进程已经清理了这个 blob，本进程的缓存里还有它
+    next(p for p in tmp_path.glob("*/*")).unlink()
+    store.put_json({"count": 1, "items": ["a"]})
+    assert store.backend.get(ref.removeprefix(blob_store.BLOB_REF_PREFIX)) is not None
+
+
+def test_web_research_reports_a_summary_alongside_blob_refs(store, monkeypatch):
+    graph = importlib.import_module("agents.research_agent.graph")
+
+    async def fake_search(query, **kwargs):
+        return {"organic_results": [
+            {"link": "https://a.example/1", "title": "A", "snippet": "one"},
+            {"link": "https://a.example/2", "title": "A", "snippet": "two"},
+            {"link": "https://b.example/1", "title": "B", "snippet": "three"},
+        ]}
+
+    monkeypatch.setattr(graph, "cached_search", fake_search)
+    update = asyncio.run(graph.web_research(
+        {"search_query": "q", "id": 0, "batch": 0, "deadline": None},
+        {"configurable": {}},
+    ))
+    assert all(is_blob_ref(ref) for ref in update["sources_gathered"])
+    assert update["sources_summary"] == {"count": 3, "labels": ["A", "B"]}
+
+
+def test_postgres_store_without_psycopg_names_the_extra(monkeypatch):
+    monkeypatch.setitem(sys.modules, "psycopg", None)
+    monkeypatch.setenv("BLOB_STORE_URI", "postgresql://localhost/agent")
+    monkeypatch.setattr(blob_store, "_store", None)
+    with pytest.raises(ImportError, match=r"agent\[postgres\]"):
+        get_blob_store()
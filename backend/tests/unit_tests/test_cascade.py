@@ -0,0 +1,94 @@
+import asyncio
+from typing import Optional
+
+import pytest
+from langchain_core.runnables import RunnableLambda
+from pydantic import BaseModel
+
+from agents.common import cascade
+from agents.common.cascade import ainvoke_cascade, invoke_cascade, low_confidence
+from agents.common.deadline import DeadlineExceeded
+
+
+class Answer(BaseModel):
+    text: str
+    confidence: Optional[float] = None
+
+
+def _models(monkeypatch, **outputs):
+    calls = []
+
+    def get_structured_model(model, temperature, schema):
+        def run(prompt):
+            calls.append(model)
+            output = outputs[model]
+            if isinstance(output, Exception):
+                raise output
+            return output
+
+        return RunnableLambda(run)
+
+    monkeypatch.setattr(cascade, "get_structured_model", get_structured_model)
+    return calls
+
+
+def _run(mode: str, **kwargs):
+    kwargs = {
+        "fast_model": "fast",
+        "strong_model": "strong",
+        "temperature": 0,
+        "schema": Answer,
+        "check": lambda result: low_confidence(result, 0.5),
+        "use_cache": False,
+        **kwargs,
+    }
+    if mode == "sync":
+        return invoke_cascade("prompt", **kwargs)
+    return asyncio.run(ainvoke_cascade("prompt", **kwargs))
+
+
+@pytest.fixture(params=["sync", "async"])
+def mode(request):
+    return request.param
+
+
+def test_confident_fast_result_is_accepted(monkeypatch, mode):
+    calls = _models(monkeypatch, fast=Answer(text="f", confidence=0.9), strong=Answer(text="s"))
+    result, stats = _run(mode)
+    assert result.text == "f"
+    assert stats == {"cascade_fast_accepted": 1}
+    assert calls == ["fast"]
+
+
+@pytest.mark.parametrize(
+    "fast",
+    [Answer(text="f", confidence=0.1), None, ValueError("boom")],
+    ids=["low_confidence", "parse", "error"],
+)
+def test_untrusted_fast_result_escalates(monkeypatch, mode, fast):
+    calls = _models(monkeypatch, fast=fast, strong=Answer(text="s"))
+    result, stats = _run(mode)
+    assert result.text == "s"
+    assert stats == {"cascade_escalations": 1}
+    assert calls == ["fast", "strong"]
+
+
+def test_deadline_error_is_not_escalated(monkeypatch, mode):
+    calls = _models(monkeypatch, fast=DeadlineExceeded("late"), strong=Answer(text="s"))
+    with pytest.raises(DeadlineExceeded):
+        _run(mode)
+    assert calls == ["fast"]
+
+
+def test_strong_error_propagates(monkeypatch, mode):
+    _models(monkeypatch, fast=None, strong=RuntimeError("down"))
+    with pytest.raises(RuntimeError, match="down"):
+        _run(mode)
+
+
+def test_without_fast_model_only_strong_is_called(monkeypatch, mode):
+    calls = _models(monkeypatch, strong=Answer(text="s"))
+    result, stats = _run(mode, fast_model="")
+    assert result.text == "s"
+    assert stats == {}
+    assert calls == ["strong"]
@@ -0,0 +1,58 @@
+import asyncio
+import pickle
+from typing import TypedDict
+
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import END, START, StateGraph
+
+from agents.common.checkpoint_serde import (
+    ZSTD_TYPE_PREFIX,
+    CompressedSerializer,
+    create_checkpointer,
+)
+
+STATE = {"sources_gathered": [{"url": f"https://example.com/{i}", "snippet": "大模型推理优化" * 20} for i in range(50)]}
+
+
+def test_large_values_are_compressed_and_round_trip():
+    serde = CompressedSerializer()
+    type_, data = serde.dumps_typed(STATE)
+    assert type_.startswith(ZSTD_TYPE_PREFIX)
+    assert len(data) < len(JsonPlusSerializer().dumps_typed(STATE)[1])
+    assert serde.loads_typed((type_, data)) == STATE
+
+
+def test_small_values_are_left_uncompressed():
+    type_, _ = CompressedSerializer().dumps_typed({"a": 1})
+    assert not type_.startswith(ZSTD_TYPE_PREFIX)
+
+
+def test_reads_checkpoints_written_by_the_default_serde():
+    serde = CompressedSerializer()
+    assert serde.loads_typed(JsonPlusSerializer().dumps_typed(STATE)) == STATE
+    assert serde.loads_typed(("pickle", pickle.dumps(STATE))) == STATE
+
+
+class State(TypedDict):
+    sources_gathered: list
+
+
+def test_create_checkpointer_persists_compressed_checkpoints(monkeypatch):
+    monkeypatch.delenv("CHECKPOINT_POSTGRES_URI", raising=False)
+    builder = StateGraph(State)
+    builder.add_node("gather", lambda state: STATE)
+    builder.add_edge(START, "gather")
+    builder.add_edge("gather", END)
+
+    async def run() -> None:
+        async with create_checkpointer() as saver:
+            graph = builder.compile(checkpointer=saver)
+            config = {"configurable": {"thread_id": "t"}}
+            await graph.ainvoke({"sources_gathered": []}, config)
+            assert (await graph.aget_state(config)).values == STATE
+            assert any(
+                type_.startswith(ZSTD_TYPE_PREFIX)
+                for type_, _ in saver.blobs.values()
+            )
+
+    asyncio.run(run())
@@ -0,0 +1,33 @@
+import pytest
+
+from agents.diagnostic_agent.configuration import (
+    Configuration as DiagnosticConfiguration,
+)
+from agents.research_agent.configuration import Configuration as ResearchConfiguration
+
+
+@pytest.fixture(params=[ResearchConfiguration, DiagnosticConfiguration])
+def configuration(request):
+    cls = request.param
+    cls.invalidate_cache()
+    yield cls
+    cls.invalidate_cache()
+
+
+def test_environment_set_after_import_is_used(configuration, monkeypatch):
+    # load_dotenv() runs after the configuration module has been imported
+    monkeypatch.setenv("MAX_RESEARCH_LOOPS", "7")
+    assert configuration.from_runnable_config({}).max_research_loops == 7
+
+
+def test_environment_overrides_configurable(configuration, monkeypatch):
+    monkeypatch.setenv("NUMBER_OF_INITIAL_QUERIES", "5")
+    config = {"configurable": {"number_of_initial_queries": 1, "max_research_loops": 4}}
+    resolved = configuration.from_runnable_config(config)
+    assert resolved.number_of_initial_queries == 5
+    assert resolved.max_research_loops == 4
+
+
+def test_resolved_configuration_is_memoized(configuration):
+    config = {"configurable": {"max_research_loops": 3}}
+    assert configuration.from_runnable_config(config) is configuration.from_runnable_config(config)
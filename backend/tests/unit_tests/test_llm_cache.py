@@ -0,0 +1,13 @@
+import sys
+
+import pytest
+
+from agents.common import llm_cache
+
+
+def test_postgres_cache_without_psycopg_names_the_extra(monkeypatch):
+    monkeypatch.setitem(sys.modules, "psycopg", None)
+    monkeypatch.setenv("LLM_CACHE_URI", "postgresql://localhost/agent")
+    monkeypatch.setattr(llm_cache, "_cache", None)
+    with pytest.raises(ImportError, match=r"agent\[postgres\]"):
+        llm_cache.get_llm_cache()
@@ -0,0 +1,62 @@
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agents.common import llm_registry
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        type(self).connections += 1
+
+    def do_GET(self):
+        body = b'{"data": []}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def api_base():
+    _Handler.connections = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    llm_registry.reset_registry()
+    yield f"http://127.0.0.1:{server.server_address[1]}/v1"
+    llm_registry.reset_registry()
+    server.shutdown()
+    server.server_close()
+
+
+def test_async_prewarm_connection_is_reused_on_the_same_loop(api_base):
+    async def run() -> None:
+        await llm_registry.aprewarm_connections(api_base)
+        assert _Handler.connections == 1
+        response = await llm_registry._shared_async_http_client().get(f"{api_base}/models")
+        assert response.status_code == 200
+
+    asyncio.run(run())
+    assert _Handler.connections == 1
+
+
+def test_sync_prewarm_does_not_warm_the_async_pool(api_base):
+    llm_registry.prewarm_connections(api_base)
+    assert _Handler.connections == 1
+
+    async def run() -> None:
+        await llm_registry._shared_async_http_client().get(f"{api_base}/models")
+
+    asyncio.run(run())
+    assert _Handler.connections == 2
@@ -0,0 +1,44 @@
+from agents.common.source_record import SourceRecord
+from agents.research_agent.utils import estimate_novelty
+
+
+def _source(i: int, query: str, batch=None) -> SourceRecord:
+    return SourceRecord(
+        url=f"https://example.com/{i}",
+        title=f"标题 {i}",
+        snippet=f"第 {i} 条结果的摘要内容" * 3,
+        query=query,
+        batch=batch,
+    )
+
+
+def test_repeated_query_from_earlier_turn_is_not_new():
+    # 上一轮对话（batch 0）和本轮（batch 3）都搜索了同一个查询
+    earlier = [_source(i, "同一个查询", batch=0) for i in range(3)]
+    latest = [_source(10, "同一个查询", batch=3)]
+    novelty, new_sources = estimate_novelty(earlier + latest, 3, ["同一个查询"])
+    assert new_sources == 1
+    assert 0 < novelty < 1
+
+
+def test_loop_that_refound_only_known_pages_scores_zero():
+    # merge_sources 丢弃了重复页面，本批次没有留下来源
+    sources = [_source(i, "q", batch=0) for i in range(3)]
+    assert estimate_novelty(sources, 3, ["q"]) == (0.0, 0)
+
+
+def test_first_batch_scores_one():
+    sources = [_source(i, "q", batch=0) for i in range(3)]
+    assert estimate_novelty(sources, 0, ["q"]) == (1.0, 3)
+
+
+def test_untagged_sources_fall_back_to_query_match():
+    sources = [_source(0, "旧查询"), _source(1, "新查询")]
+    novelty, new_sources = estimate_novelty(sources, 5, ["新查询"])
+    assert new_sources == 1
+    assert novelty > 0
+
+
+def test_batch_survives_the_state_round_trip():
+    source = _source(0, "q", batch=4)
+    assert SourceRecord.coerce(source.to_dict()) == source
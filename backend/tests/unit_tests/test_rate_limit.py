@@ -0,0 +1,125 @@
+import asyncio
+import threading
+import time
+
+import httpx
+import pytest
+
+from agents.common.deadline import DeadlineExceeded, deadline_scope
+from agents.common.rate_limit import (
+    LimitedAsyncTransport,
+    LimitedTransport,
+    UpstreamLimiter,
+)
+
+
+def test_sync_wait_times_out_and_leaves_queue():
+    limiter = UpstreamLimiter("test-sync-timeout", max_concurrency=1)
+    limiter.acquire()
+    start = time.perf_counter()
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=0.05)
+    assert time.perf_counter() - start < 0.5
+    assert limiter.queued == 0
+    limiter.release()
+    assert limiter.in_flight == 0
+
+
+def test_async_wait_times_out_and_slot_passes_on():
+    limiter = UpstreamLimiter("test-async-timeout", max_concurrency=1)
+
+    async def run() -> None:
+        await limiter.aacquire()
+        with pytest.raises(TimeoutError):
+            await limiter.aacquire(timeout=0.05)
+        assert limiter.queued == 0
+        waiter = asyncio.create_task(limiter.aacquire("other"))
+        await asyncio.sleep(0)
+        limiter.release()
+        await asyncio.wait_for(waiter, 1)
+        limiter.release()
+        assert limiter.in_flight == 0
+
+    asyncio.run(run())
+
+
+def test_token_wait_beyond_timeout_is_refused():
+    limiter = UpstreamLimiter("test-token-timeout", rate=1.0, burst=1.0)
+    limiter.acquire()
+    limiter.release()
+    with pytest.raises(TimeoutError):
+        limiter.acquire(timeout=0.1)
+    assert limiter.in_flight == 0
+
+
+def test_timed_out_waiters_do_not_run_up_token_debt():
+    limiter = UpstreamLimiter("test-token-debt", rate=10.0, burst=1.0)
+    limiter.acquire()
+    limiter.release()
+    for _ in range(20):
+        with pytest.raises(TimeoutError):
+            limiter.acquire(timeout=0.01)
+    # 被拒绝的请求没有扣令牌，下一个请求只等一个令牌的时间
+    assert limiter.bucket.reserve() <= 0.1
+
+
+def test_cancelled_token_wait_refunds_the_token():
+    limiter = UpstreamLimiter("test-token-refund", rate=10.0, burst=1.0)
+
+    async def run() -> None:
+        await limiter.aacquire()
+        limiter.release()
+        waiter = asyncio.create_task(limiter.aacquire())
+        await asyncio.sleep(0.01)
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert limiter.in_flight == 0
+
+    asyncio.run(run())
+    assert limiter.bucket.reserve() <= 0.1
+
+
+def test_transport_queue_wait_is_bounded_by_deadline():
+    limiter = UpstreamLimiter("test-transport-deadline", max_concurrency=1)
+    release = threading.Event()
+
+    def slow(request: httpx.Request) -> httpx.Response:
+        release.wait(2)
+        return httpx.Response(200)
+
+    client = httpx.Client(transport=LimitedTransport(httpx.MockTransport(slow), limiter))
+    holder = threading.Thread(target=client.get, args=("http://upstream/",))
+    holder.start()
+    while limiter.in_flight == 0:
+        time.sleep(0.001)
+    try:
+        start = time.perf_counter()
+        with deadline_scope(time.time() + 0.2), pytest.raises(DeadlineExceeded):
+            client.get("http://upstream/")
+        assert time.perf_counter() - start < 1.0
+        assert limiter.queued == 0
+    finally:
+        release.set()
+        holder.join()
+
+
+def test_async_transport_queue_wait_is_bounded_by_deadline():
+    limiter = UpstreamLimiter("test-async-transport-deadline", max_concurrency=1)
+
+    async def slow(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(1)
+        return httpx.Response(200)
+
+    async def run() -> None:
+        client = httpx.AsyncClient(
+            transport=LimitedAsyncTransport(httpx.MockTransport(slow), limiter)
+        )
+        holder = asyncio.create_task(client.get("http://upstream/"))
+        await asyncio.sleep(0.01)
+        with deadline_scope(time.time() + 0.1), pytest.raises(DeadlineExceeded):
+            await client.get("http://upstream/")
+        assert limiter.queued == 0
+        holder.cancel()
+
+    asyncio.run(run())
@@ -0,0 +1,180 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+from agents.common.deadline import DeadlineExceeded, deadline_scope
+from agents.common.resilience import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientAsyncTransport,
+    ResilientTransport,
+    RetryBudget,
+    RetryPolicy,
+)
+
+
+def _policy(name: str) -> RetryPolicy:
+    return RetryPolicy(
+        name,
+        max_retries=0,
+        breaker=CircuitBreaker(name, failure_threshold=2, cooldown=0.0),
+        budget=RetryBudget(),
+    )
+
+
+def _connect_error(request: httpx.Request) -> httpx.Response:
+    raise httpx.ConnectError("refused", request=request)
+
+
+def test_breaker_opens_and_recovers_through_probe():
+    breaker = CircuitBreaker("test-probe", failure_threshold=2, cooldown=0.0)
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success()
+    assert breaker.state == CLOSED
+
+
+def test_cancelled_async_probe_releases_slot():
+    policy = _policy("test-cancel")
+
+    async def slow(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(10)
+        return httpx.Response(200)
+
+    async def run() -> None:
+        failing = httpx.AsyncClient(
+            transport=ResilientAsyncTransport(httpx.MockTransport(_connect_error), policy)
+        )
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await failing.get("http://upstream/")
+        assert policy.breaker.state == OPEN
+
+        hanging = httpx.AsyncClient(
+            transport=ResilientAsyncTransport(httpx.MockTransport(slow), policy)
+        )
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(hanging.get("http://upstream/"), 0.05)
+        assert policy.breaker.state == HALF_OPEN
+
+        ok = httpx.AsyncClient(
+            transport=ResilientAsyncTransport(
+                httpx.MockTransport(lambda request: httpx.Response(200)), policy
+            )
+        )
+        response = await ok.get("http://upstream/")
+        assert response.status_code == 200
+        assert policy.breaker.state == CLOSED
+
+    asyncio.run(run())
+
+
+def test_deadline_capped_probe_releases_slot():
+    policy = _policy("test-deadline")
+
+    def timeout(request: httpx.Request) -> httpx.Response:
+        raise httpx.ReadTimeout("timed out", request=request)
+
+    client = httpx.Client(transport=ResilientTransport(httpx.MockTransport(_connect_error), policy))
+    for _ in range(2):
+        with pytest.raises(httpx.ConnectError):
+            client.get("http://upstream/")
+
+    client = httpx.Client(transport=ResilientTransport(httpx.MockTransport(timeout), policy))
+    with deadline_scope(time.time() + 5), pytest.raises(DeadlineExceeded):
+        client.get("http://upstream/")
+    assert policy.breaker.state == HALF_OPEN
+    # 探测名额已归还，下一个请求可以作为新的探测发出
+    assert policy.breaker.allow()
+
+
+def test_open_breaker_rejects_without_sending():
+    policy = RetryPolicy(
+        "test-open",
+        max_retries=0,
+        breaker=CircuitBreaker("test-open", failure_threshold=1, cooldown=60.0),
+        budget=RetryBudget(),
+    )
+    client = httpx.Client(transport=ResilientTransport(httpx.MockTransport(_connect_error), policy))
+    with pytest.raises(httpx.ConnectError):
+        client.get("http://upstream/")
+    with pytest.raises(CircuitOpenError):
+        client.get("http://upstream/")
+
+
+def _send(mode: str, policy: RetryPolicy, handler) -> httpx.Response:
+    if mode == "sync":
+        client = httpx.Client(transport=ResilientTransport(httpx.MockTransport(handler), policy))
+        return client.get("http://upstream/")
+
+    async def run() -> httpx.Response:
+        async def async_handler(request: httpx.Request) -> httpx.Response:
+            return handler(request)
+
+        transport = ResilientAsyncTransport(httpx.MockTransport(async_handler), policy)
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get("http://upstream/")
+
+    return asyncio.run(run())
+
+
+def _retrying_policy(name: str) -> RetryPolicy:
+    return RetryPolicy(
+        name,
+        max_retries=2,
+        backoff_base=0.001,
+        breaker=CircuitBreaker(name, failure_threshold=10),
+        budget=RetryBudget(),
+    )
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_retryable_status_and_errors_are_retried(mode):
+    policy = _retrying_policy(f"test-retry-{mode}")
+    outcomes = iter(["error", 503, 200])
+
+    def flaky(request: httpx.Request) -> httpx.Response:
+        outcome = next(outcomes)
+        if outcome == "error":
+            raise httpx.ConnectError("refused", request=request)
+        return httpx.Response(outcome)
+
+    assert _send(mode, policy, flaky).status_code == 200
+    assert policy.breaker.state == CLOSED
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_last_retryable_status_is_returned(mode):
+    policy = _retrying_policy(f"test-retry-exhausted-{mode}")
+    calls = 0
+
+    def unavailable(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(503)
+
+    assert _send(mode, policy, unavailable).status_code == 503
+    assert calls == 3
+
+
+@pytest.mark.parametrize("mode", ["sync", "async"])
+def test_client_errors_are_not_retried(mode):
+    policy = _retrying_policy(f"test-no-retry-{mode}")
+    calls = 0
+
+    def not_found(request: httpx.Request) -> httpx.Response:
+        nonlocal calls
+        calls += 1
+        return httpx.Response(404)
+
+    assert _send(mode, policy, not_found).status_code == 404
+    assert calls == 1
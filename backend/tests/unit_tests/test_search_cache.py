@@ -0,0 +1,161 @@
+import asyncio
+import time
+
+import fakeredis.aioredis
+from prometheus_client import REGISTRY
+
+from agents.common.search_cache import SearchCache, make_cache_key
+
+RESULT = {"organic_results": [{"title": "t", "link": "https://example.com"}]}
+
+
+class BrokenRedis:
+    async def get(self, key):
+        raise ConnectionError("redis is down")
+
+    async def set(self, key, value, ex=None):
+        raise ConnectionError("redis is down")
+
+
+def _exported(event: str) -> float:
+    value = REGISTRY.get_sample_value("agent_search_cache_events_total", {"event": event})
+    return value or 0.0
+
+
+def test_local_entries_expire_after_ttl():
+    async def run() -> None:
+        cache = SearchCache(ttl=0.01)
+        await cache.set("q", "baidu", RESULT)
+        assert await cache.get("q", "baidu") == RESULT
+        time.sleep(0.02)
+        assert await cache.get("q", "baidu") is None
+        assert cache.stats["expirations"] == 1
+
+    asyncio.run(run())
+
+
+def test_least_recently_used_entry_is_evicted():
+    async def run() -> None:
+        cache = SearchCache(maxsize=2)
+        await cache.set("a", "baidu", {"q": "a"})
+        await cache.set("b", "baidu", {"q": "b"})
+        assert await cache.get("a", "baidu") == {"q": "a"}
+        await cache.set("c", "baidu", {"q": "c"})
+        assert await cache.get("b", "baidu") is None
+        assert await cache.get("a", "baidu") == {"q": "a"}
+        assert cache.stats["evictions"] == 1
+
+    asyncio.run(run())
+
+
+def test_normalized_queries_share_an_entry():
+    assert make_cache_key("Ｌａｎｇ  Graph ", "baidu") == make_cache_key("lang graph", "baidu")
+    assert make_cache_key("q", "baidu") != make_cache_key("q", "bing")
+
+
+def test_redis_hit_fills_local_tier():
+    async def run() -> None:
+        redis = fakeredis.aioredis.FakeRedis()
+        await SearchCache(redis_client=redis).set("q", "baidu", RESULT)
+
+        cache = SearchCache(redis_client=redis)
+        assert await cache.get("q", "baidu") == RESULT
+        assert cache.stats["redis_hits"] == 1
+        await redis.flushall()
+        assert await cache.get("q", "baidu") == RESULT
+        assert cache.stats["hits"] == 1
+
+    asyncio.run(run())
+
+
+def test_redis_errors_fall_back_to_fetch():
+    async def run() -> None:
+        cache = SearchCache(redis_client=BrokenRedis())
+        calls = 0
+
+        async def fetch() -> dict:
+            nonlocal calls
+            calls += 1
+            return RESULT
+
+        assert await cache.get_or_fetch("q", "baidu", fetch) == RESULT
+        assert await cache.get_or_fetch("q", "baidu", fetch) == RESULT
+        assert calls == 1
+        assert cache.stats["redis_errors"] == 2
+
+    asyncio.run(run())
+
+
+def test_concurrent_misses_share_one_fetch():
+    async def run() -> None:
+        cache = SearchCache()
+        calls = 0
+
+        async def fetch() -> dict:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return RESULT
+
+        results = await asyncio.gather(
+            *(cache.get_or_fetch("q", "baidu", fetch) for _ in range(5))
+        )
+        assert results == [RESULT] * 5
+        assert calls == 1
+        assert cache.stats["coalesced"] == 4
+
+    asyncio.run(run())
+
+
+def test_failed_fetch_is_not_cached():
+    async def run() -> None:
+        cache = SearchCache()
+
+        async def fail() -> dict:
+            raise RuntimeError("upstream error")
+
+        async def ok() -> dict:
+            return RESULT
+
+        try:
+            await cache.get_or_fetch("q", "baidu", fail)
+        except RuntimeError:
+            pass
+        assert await cache.get_or_fetch("q", "baidu", ok) == RESULT
+
+    asyncio.run(run())
+
+
+def test_corrupt_redis_entry_is_a_miss_and_is_deleted():
+    async def run() -> None:
+        redis = fakeredis.aioredis.FakeRedis()
+        cache = SearchCache(redis_client=redis)
+        redis_key = cache.key_prefix + make_cache_key("q", "baidu")
+        for raw in (b"{not json", b"\xff\xfe", b'["old", "format"]'):
+            await redis.set(redis_key, raw)
+            assert await cache.get("q", "baidu") is None
+            assert await redis.get(redis_key) is None
+        assert cache.stats["redis_corrupt"] == 3
+        assert cache.stats["misses"] == 3
+
+        async def fetch() -> dict:
+            return RESULT
+
+        await redis.set(redis_key, b"{not json")
+        assert await cache.get_or_fetch("q", "baidu", fetch) == RESULT
+        assert await redis.get(redis_key) is not None
+
+    asyncio.run(run())
+
+
+def test_stats_are_exported_to_prometheus():
+    async def run() -> None:
+        cache = SearchCache()
+        await cache.set("q", "baidu", RESULT)
+        await cache.get("q", "baidu")
+        await cache.get("other", "baidu")
+
+    hits, misses = _exported("hits"), _exported("misses")
+    asyncio.run(run())
+    assert _exported("hits") == hits + 1
+    assert _exported("misses") == misses + 1
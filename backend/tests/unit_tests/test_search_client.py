@@ -0,0 +1,16 @@
+import asyncio
+
+from agents.common import search_client
+
+
+def test_base_url_is_read_when_the_client_is_created(monkeypatch):
+    # 模拟 load_dotenv() 在导入 search_client 之后才设置环境变量
+    monkeypatch.setenv("SEARCHAPI_BASE_URL", "http://searchapi.test/search")
+
+    async def run() -> str:
+        try:
+            return search_client.get_search_client().base_url
+        finally:
+            await search_client.close_search_client()
+
+    assert asyncio.run(run()) == "http://searchapi.test/search"
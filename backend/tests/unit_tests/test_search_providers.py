@@ -0,0 +1,198 @@
+import asyncio
+import time
+from typing import Any, Callable
+
+import httpx
+import pytest
+
+from agents.common.resilience import (
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    ResilientAsyncTransport,
+    RetryBudget,
+    RetryPolicy,
+)
+from agents.common.search_client import SearchAPIError
+from agents.common.search_providers import HedgedSearch, normalize_payload
+
+NORMALIZED_KEYS = {"title", "link", "snippet", "display_link", "date"}
+
+
+def baidu_payload(query: str) -> dict:
+    return {
+        "organic_results": [
+            {"title": f"{query} baidu", "link": "https://a.example.com/1",
+             "snippet": "s", "display_link": "a.example.com", "date": "2024-01-01"}
+        ]
+    }
+
+
+def bing_payload(query: str) -> dict:
+    return {
+        "organic_results": [
+            {"title": f"{query} bing", "url": "https://b.example.com/1",
+             "description": "d", "displayed_link": "b.example.com"}
+        ]
+    }
+
+
+class StubServer:
+    """Stand-in for an engine's HTTP API with injected latency and status."""
+
+    def __init__(self, payload: Callable[[str], dict], delay: float = 0.0, status: int = 200):
+        self.payload = payload
+        self.delay = delay
+        self.status = status
+        self.requests = 0
+        self.cancelled = 0
+
+    async def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.status != 200:
+            return httpx.Response(self.status, text="upstream error")
+        return httpx.Response(200, json=self.payload(request.url.params["q"]))
+
+
+class StubProvider:
+    def __init__(self, name: str, server: StubServer, policy: RetryPolicy | None = None):
+        self.name = name
+        transport: httpx.AsyncBaseTransport = httpx.MockTransport(server)
+        if policy is not None:
+            transport = ResilientAsyncTransport(transport, policy)
+        self._client = httpx.AsyncClient(transport=transport)
+
+    async def search(self, query: str) -> dict[str, Any]:
+        try:
+            response = await self._client.get("http://stub/search", params={"q": query})
+        except httpx.HTTPError as e:
+            raise SearchAPIError(repr(e)) from e
+        if response.status_code != 200:
+            raise SearchAPIError(response.text, status_code=response.status_code)
+        return normalize_payload(self.name, response.json())
+
+
+def test_hedge_fires_after_delay():
+    primary = StubServer(baidu_payload, delay=0.5)
+    backup = StubServer(bing_payload, delay=0.01)
+
+    async def run() -> tuple[dict, float]:
+        hedged = HedgedSearch(
+            [StubProvider("baidu", primary), StubProvider("bing", backup)], initial_delay=0.05
+        )
+        start = time.perf_counter()
+        result = await hedged.search("q")
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(run())
+    assert result["engine"] == "bing"
+    assert 0.05 <= elapsed < 0.4
+    assert backup.requests == 1
+
+
+def test_no_hedge_when_primary_is_fast():
+    primary = StubServer(baidu_payload, delay=0.01)
+    backup = StubServer(bing_payload)
+
+    async def run() -> dict:
+        hedged = HedgedSearch(
+            [StubProvider("baidu", primary), StubProvider("bing", backup)], initial_delay=0.2
+        )
+        return await hedged.search("q")
+
+    assert asyncio.run(run())["engine"] == "baidu"
+    assert backup.requests == 0
+
+
+def test_failover_when_primary_errors():
+    primary = StubServer(baidu_payload, status=500)
+    backup = StubServer(bing_payload, delay=0.01)
+
+    async def run() -> tuple[dict, float]:
+        hedged = HedgedSearch(
+            [StubProvider("baidu", primary), StubProvider("bing", backup)], initial_delay=5.0
+        )
+        start = time.perf_counter()
+        result = await hedged.search("q")
+        return result, time.perf_counter() - start
+
+    result, elapsed = asyncio.run(run())
+    assert result["engine"] == "bing"
+    # 主引擎报错立即转移，不等对冲延迟
+    assert elapsed < 1.0
+
+
+def test_all_engines_failing_raises():
+    async def run() -> None:
+        hedged = HedgedSearch(
+            [
+                StubProvider("baidu", StubServer(baidu_payload, status=500)),
+                StubProvider("bing", StubServer(bing_payload, status=503)),
+            ],
+            initial_delay=5.0,
+        )
+        await hedged.search("q")
+
+    with pytest.raises(SearchAPIError) as info:
+        asyncio.run(run())
+    assert "baidu" in str(info.value) and "bing" in str(info.value)
+
+
+def test_losing_request_is_cancelled():
+    primary = StubServer(baidu_payload, delay=1.0)
+    backup = StubServer(bing_payload, delay=0.01)
+
+    async def run() -> None:
+        hedged = HedgedSearch(
+            [StubProvider("baidu", primary), StubProvider("bing", backup)], initial_delay=0.05
+        )
+        await hedged.search("q")
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert primary.cancelled == 1
+
+
+def test_cancelled_loser_does_not_wedge_circuit_breaker():
+    policy = RetryPolicy(
+        "test-hedge-breaker",
+        max_retries=0,
+        breaker=CircuitBreaker("test-hedge-breaker", failure_threshold=1, cooldown=0.0),
+        budget=RetryBudget(),
+    )
+    policy.breaker.record_failure()
+    assert policy.breaker.state == OPEN
+    primary = StubServer(baidu_payload, delay=1.0)
+
+    async def run() -> None:
+        hedged = HedgedSearch(
+            [
+                StubProvider("baidu", primary, policy),
+                StubProvider("bing", StubServer(bing_payload, delay=0.01)),
+            ],
+            initial_delay=0.05,
+        )
+        await hedged.search("q")
+        await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert primary.cancelled == 1
+    assert policy.breaker.state == HALF_OPEN
+    # 被取消的探测请求已归还名额，下一个请求可以继续探测
+    assert policy.breaker.allow()
+
+
+def test_results_share_one_shape():
+    baidu = normalize_payload("baidu", baidu_payload("q"))
+    bing = normalize_payload("bing", bing_payload("q"))
+    for payload in (baidu, bing):
+        assert set(payload) == {"engine", "organic_results"}
+        assert all(set(item) == NORMALIZED_KEYS for item in payload["organic_results"])
+    assert bing["organic_results"][0]["link"] == "https://b.example.com/1"
+    assert bing["organic_results"][0]["snippet"] == "d"
+    assert bing["organic_results"][0]["display_link"] == "b.example.com"
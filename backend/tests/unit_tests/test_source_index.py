@@ -0,0 +1,42 @@
+import pytest
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+from agents.common.source_index import load_sources, merge_sources
+from agents.common.source_record import SourceRecord
+
+
+@pytest.fixture(autouse=True)
+def _inline_state(monkeypatch):
+    monkeypatch.delenv("BLOB_STORE_URI", raising=False)
+
+
+def _records(start: int, n: int, query: str = "q") -> list[SourceRecord]:
+    return [
+        SourceRecord(url=f"https://example.com/{i}", title=f"title {i}", query=query)
+        for i in range(start, start + n)
+    ]
+
+
+def test_merge_keeps_plain_dicts_and_skips_duplicates():
+    merged = merge_sources([], _records(0, 10))
+    merged = merge_sources(merged, _records(5, 10))
+    assert len(merged) == 15
+    assert all(type(source) is dict for source in merged)
+    assert merged[0]["url"] == "https://example.com/0"
+
+
+def test_checkpoint_round_trip_in_strict_mode():
+    serde = JsonPlusSerializer(allowed_msgpack_modules=None)
+    merged = merge_sources(merge_sources([], _records(0, 10)), _records(10, 10))
+
+    restored = serde.loads_typed(serde.dumps_typed({"sources_gathered": merged}))
+    sources = restored["sources_gathered"]
+    assert sources == list(merged)
+    assert len(load_sources(sources)) == 20
+    # 恢复后的普通列表可以继续合并，索引会重建
+    assert len(merge_sources(sources, _records(15, 10))) == 25
+
+
+def test_old_dict_sources_are_coerced():
+    old = {"label": "t", "short_url": "https://a", "value": "https://a", "title": "t"}
+    assert SourceRecord.coerce(old).url == "https://a"
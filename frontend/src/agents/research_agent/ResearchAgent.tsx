@@ -5,6 +5,7 @@ import { ProcessedEvent } from "@/components/ActivityTimeline";
 import { WelcomeScreen } from "@/components/WelcomeScreen";
 import { ChatMessagesView } from "@/components/ChatMessagesView";
 import { Button } from "@/components/ui/button";
+import { Textarea } from "@/components/ui/textarea";
 
 export default function ResearchAgent() {
   const [processedEventsTimeline, setProcessedEventsTimeline] = useState<
@@ -16,6 +17,7 @@ export default function ResearchAgent() {
   const scrollAreaRef = useRef<HTMLDivElement>(null);
   const hasFinalizeEventOccurredRef = useRef(false);
   const [error, setError] = useState<string | null>(null);
+  const [editedQueries, setEditedQueries] = useState("");
   const thread = useStream<{
     messages: Message[];
     initial_search_query_count: number;
@@ -35,14 +37,28 @@ export default function ResearchAgent() {
       if (event.generate_query) {
         processedEvent = {
           title: "Generating Search Queries",
-          data: event.generate_query?.search_query?.join(", ") || "",
+          data:
+            (
+              event.generate_query?.pending_queries ||
+              event.generate_query?.search_query
+            )?.join(", ") || "",
         };
       } else if (event.web_research) {
-        const sources = event.web_research.sources_gathered || [];
-        const numSources = sources.length;
-        const uniqueLabels = [
-          ...new Set(sources.map((s: any) => s.label).filter(Boolean)),
-        ];
+        // 启用 blob 存储时 sources_gathered 只是引用，数量和标签取自 sources_summary
+        const summary = event.web_research.sources_summary;
+        const sources = (event.web_research.sources_gathered || []).filter(
+          (s: any) => typeof s === "object"
+        );
+        const numSources = summary ? summary.count : sources.length;
+        const uniqueLabels: string[] = summary
+          ? summary.labels
+          : [
+              ...new Set<string>(
+                sources
+                  .map((s: any) => s.label || s.title || s.display_link)
+                  .filter(Boolean)
+              ),
+            ];
         const exampleLabels = uniqueLabels.slice(0, 5).join(", ");
         processedEvent = {
           title: "Web Research",
@@ -143,6 +159,13 @@ export default function ResearchAgent() {
     [thread]
   );
 
+  // 批量审批中断带有待搜索的查询，用户可以逐行编辑或删减后再继续
+  const pendingQueries: string[] | undefined = thread.interrupt?.value?.queries;
+  const pendingQueryText = (pendingQueries || []).join("\n");
+  useEffect(() => {
+    setEditedQueries(pendingQueryText);
+  }, [pendingQueryText]);
+
   const handleCancel = useCallback(() => {
     thread.stop();
     window.location.reload();
@@ -158,11 +181,27 @@ export default function ResearchAgent() {
               <p className="text-yellow-400 text-center">
                 {thread.interrupt.value?.message || "需要您的确认才能继续"}
               </p>
+              {pendingQueries && (
+                <Textarea
+                  value={editedQueries}
+                  onChange={(e) => setEditedQueries(e.target.value)}
+                  className="w-full min-w-[32rem] text-neutral-100 bg-neutral-700 border-neutral-600"
+                  rows={Math.max(pendingQueries.length, 3)}
+                />
+              )}
               <div className="flex gap-4">
                 <Button
                   variant="default"
                   onClick={() => {
-                    thread.submit(undefined, { command: { resume: true } });
+                    const resume = pendingQueries
+                      ? {
+                          queries: editedQueries
+                            .split("\n")
+                            .map((q) => q.trim())
+                            .filter(Boolean),
+                        }
+                      : true;
+                    thread.submit(undefined, { command: { resume } });
                   }}
                 >
                   继续